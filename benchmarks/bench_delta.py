@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Upstream traffic of a full invoice re-read vs a delta read with a sync token.
+
+A reconciliation poll either re-reads every invoice page or asks only for
+invoices modified since its last sync token. Both run against the local fake
+API, which honours ``search[updated_min]``; the delta starts from a point
+that leaves a handful of recently modified invoices.
+
+    python benchmarks/bench_delta.py --invoices 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import httpx  # noqa: E402
+
+import fake_upstream  # noqa: E402
+from freshbooks_mcp.simple_oauth_server import FreshBooksOAuthClient  # noqa: E402
+
+SINCE = "2026-12-28 12:50:00"
+
+
+async def _measure(upstream, label, call):
+    upstream.bytes_sent = 0
+    start = time.perf_counter()
+    result = await call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:12s} bytes={upstream.bytes_sent:<10d} seconds={elapsed:.3f}")
+    return result
+
+
+async def run(invoices: int):
+    upstream, base_url = fake_upstream.start(default_total=invoices)
+    client = FreshBooksOAuthClient("bench", "bench")
+    client.client = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+    client.account_id = fake_upstream.ACCOUNT_ID
+    try:
+        full = await _measure(upstream, "full", lambda: client.get_invoices(max_pages=0))
+        print(f"             records={len(full['response']['result']['invoices'])}")
+        delta = await _measure(upstream, "delta", lambda: client.changes_since("invoices", since=SINCE))
+        print(f"             changed={len(delta['changed'])} deleted={len(delta['deleted'])}")
+        again = await _measure(
+            upstream, "delta again", lambda: client.changes_since("invoices", sync_token=delta["sync_token"])
+        )
+        print(f"             changed={len(again['changed'])} (records at the token's timestamp are not repeated)")
+    finally:
+        await client.close()
+        upstream.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.invoices))
+
+
+if __name__ == "__main__":
+    main()
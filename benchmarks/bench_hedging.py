@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Read latency with and without hedging against a long-tailed API.
+
+The API is simulated in process: most GETs answer in ``--fast`` ms, and
+``--slow-share`` of them stall for ``--slow`` ms, which puts p99 far above
+p50. Each mode sends ``--reads`` GETs, ``--concurrency`` at a time, through
+the same transport stack as the servers, and reports latency percentiles
+and the share of extra requests the hedges cost.
+
+    python benchmarks/bench_hedging.py --reads 2000 --budget 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import httpx  # noqa: E402
+
+from freshbooks_mcp.hedging import HedgedTransport  # noqa: E402
+from freshbooks_mcp.limits import LimitedTransport  # noqa: E402
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_mode(args, budget: float):
+    sent = 0
+    rng = random.Random(args.seed)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal sent
+        sent += 1
+        delay = args.slow if rng.random() < args.slow_share else args.fast * rng.uniform(0.8, 1.2)
+        await asyncio.sleep(delay / 1000)
+        return httpx.Response(200, json={"response": {"result": {}}})
+
+    hedging = HedgedTransport(LimitedTransport(httpx.MockTransport(handler), max_concurrency=64, endpoint_concurrency=64), budget=budget)
+    client = httpx.AsyncClient(transport=hedging, base_url="http://fake")
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def read(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/accounting/account/ABC/invoices/invoices/{i}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        await asyncio.gather(*(read(i) for i in range(args.reads)))
+    finally:
+        await client.aclose()
+    latencies.sort()
+    label = f"budget {budget:g}" if budget else "no hedging"
+    print(f"{label:12s} p50={1000 * _percentile(latencies, 0.5):7.1f}ms p95={1000 * _percentile(latencies, 0.95):7.1f}ms "
+          f"p99={1000 * _percentile(latencies, 0.99):7.1f}ms extra requests={100 * (sent - args.reads) / args.reads:.1f}% "
+          f"hedged={hedging.hedged} hedge wins={hedging.hedge_wins}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fast", type=float, default=20.0, help="Typical latency in ms")
+    parser.add_argument("--slow", type=float, default=200.0, help="Stalled latency in ms")
+    parser.add_argument("--slow-share", type=float, default=0.03)
+    parser.add_argument("--budget", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    for budget in (0.0, args.budget):
+        asyncio.run(run_mode(args, budget))
+
+
+if __name__ == "__main__":
+    main()
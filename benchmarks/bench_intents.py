@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Intent resolution cost: compiled matcher vs a linear keyword scan.
+
+The linear scan mirrors host-side routing: every manifest keyword is tested
+as a substring of the lowercased utterance and the highest priority, longest
+hit wins. Both are run over the same generated utterances and must agree.
+``--extra-intents`` adds synthetic keywords to show how each approach scales
+past the manifest's few dozen intents.
+
+    python benchmarks/bench_intents.py --utterances 100000 --extra-intents 0 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from freshbooks_mcp.intents import IntentMatcher, load_manifest  # noqa: E402
+
+FILLERS = [
+    "please", "can you", "I need to", "quickly", "for Acme Corp", "from last month",
+    "with the usual terms", "thanks", "asap", "for client Grace Hopper", "and email it",
+]
+MISSES = ["what is the weather", "open the pod bay doors", "summarize my inbox", "freshbooks help"]
+
+
+def _utterances(keywords, count, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            out.append(rng.choice(MISSES))
+            continue
+        words = rng.sample(FILLERS, 2)
+        words.insert(1, rng.choice(keywords).title() if rng.random() < 0.5 else rng.choice(keywords))
+        out.append(" ".join(words))
+    return out
+
+
+def _linear(intents):
+    ordered = sorted(intents, key=lambda i: (-int(i["priority"]), -len(i["keyword"].split())))
+
+    def resolve(text):
+        lowered = text.lower()
+        for intent in ordered:
+            if intent["keyword"] in lowered:
+                return intent["tool_name"]
+        return None
+    return resolve
+
+
+def run(count: int, extra: int):
+    intents = list(load_manifest()["intents"])
+    intents += [
+        {"keyword": f"freshbooks report {i} summary", "tool_name": f"report_{i}", "priority": 5}
+        for i in range(extra)
+    ]
+    start = time.perf_counter()
+    matcher = IntentMatcher(intents)
+    print(f"compiled {len(matcher.intents)} intents in {(time.perf_counter() - start) * 1e3:.2f} ms")
+    utterances = _utterances([i["keyword"] for i in intents], count)
+
+    linear = _linear(intents)
+    start = time.perf_counter()
+    expected = [linear(text) for text in utterances]
+    linear_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    resolved = [matcher.resolve(text) for text in utterances]
+    compiled_s = time.perf_counter() - start
+
+    got = [intent.tool_name if intent else None for intent in resolved]
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    n = len(utterances)
+    print(f"linear scan  {linear_s / n * 1e6:6.2f} us/utterance  ({n / linear_s:10.0f}/s)")
+    print(f"compiled     {compiled_s / n * 1e6:6.2f} us/utterance  ({n / compiled_s:10.0f}/s)")
+    print(f"mismatches   {mismatches}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=100000)
+    parser.add_argument("--extra-intents", type=int, nargs="+", default=[0, 1000])
+    args = parser.parse_args()
+
+    for extra in args.extra_intents:
+        run(args.utterances, extra)
+
+
+if __name__ == "__main__":
+    main()
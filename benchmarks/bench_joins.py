@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""One page of invoices with client names: in-context join vs ``include``.
+
+Without ``include`` an agent lists the invoices, then every client and every
+project, and joins them itself. With ``include=["client"]`` the invoice call
+resolves client ids from the client index and fetches only the missing ones,
+100 per request. Both run against the local fake API with a cold client.
+
+    python benchmarks/bench_joins.py --clients 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import httpx  # noqa: E402
+
+import fake_upstream  # noqa: E402
+from freshbooks_mcp.simple_oauth_server import FreshBooksOAuthClient  # noqa: E402
+
+
+def _client(base_url: str) -> FreshBooksOAuthClient:
+    client = FreshBooksOAuthClient("bench", "bench")
+    client.client = httpx.AsyncClient(base_url=base_url, timeout=60.0)
+    client.account_id = fake_upstream.ACCOUNT_ID
+    return client
+
+
+async def _manual(client: FreshBooksOAuthClient) -> int:
+    invoices = (await client.get_invoices())["response"]["result"]["invoices"]
+    clients = (await client.get_clients(max_pages=0))["response"]["result"]["clients"]
+    await client.get_projects(max_pages=0)
+    names = {c["id"]: c["organization"] for c in clients}
+    return sum(1 for invoice in invoices if invoice["customerid"] in names)
+
+
+async def _included(client: FreshBooksOAuthClient) -> int:
+    invoices = (await client.get_invoices(include=["client"]))["response"]["result"]["invoices"]
+    return sum(1 for invoice in invoices if invoice["client"])
+
+
+async def run(clients: int):
+    upstream, base_url = fake_upstream.start(default_total=clients)
+    try:
+        for label, call in (("manual join", _manual), ("include", _included)):
+            client = _client(base_url)
+            upstream.bytes_sent = upstream.requests = 0
+            start = time.perf_counter()
+            try:
+                joined = await call(client)
+            finally:
+                await client.close()
+            elapsed = time.perf_counter() - start
+            print(f"{label:12s} requests={upstream.requests:<4d} bytes={upstream.bytes_sent:<10d} "
+                  f"seconds={elapsed:.3f} invoices with client={joined}")
+    finally:
+        upstream.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.clients))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Bytes per record of plain FreshBooks dicts vs the slotted record classes.
+
+Records are decoded from JSON (as they would be off the wire) so no string is
+shared by accident. Each representation is measured with tracemalloc and
+checked to round-trip losslessly back to the original dicts.
+
+    python benchmarks/bench_records.py --records 200000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import fake_upstream  # noqa: E402
+from freshbooks_mcp.records import from_dicts, to_dicts  # noqa: E402
+
+RESOURCES = ["clients", "invoices", "projects", "expenses", "time_entries"]
+
+
+def _payload(resource: str, count: int) -> str:
+    return json.dumps([fake_upstream.make_record(resource, i) for i in range(count)])
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--resources", nargs="+", default=RESOURCES, choices=RESOURCES)
+    args = parser.parse_args()
+
+    for resource in args.resources:
+        payload = _payload(resource, args.records)
+        dicts, dict_bytes, _ = _measure(lambda: json.loads(payload))
+        records, record_bytes, elapsed = _measure(lambda: from_dicts(resource, json.loads(payload)))
+        assert to_dicts(records) == dicts, f"{resource} did not round-trip"
+        del dicts, records
+        print(f"{resource:13s} dict={dict_bytes / args.records:7.0f} B/rec  "
+              f"slotted={record_bytes / args.records:7.0f} B/rec  "
+              f"saving={1 - record_bytes / dict_bytes:6.1%}  build={elapsed:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
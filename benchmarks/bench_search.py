@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Build time and lookup latency of the in-memory client search index.
+
+The synthetic clients reuse eight first and last names, so common words match
+thousands of clients; real client lists are far less repetitive.
+
+    python benchmarks/bench_search.py --clients 20000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import fake_upstream  # noqa: E402
+from freshbooks_mcp.search import ClientIndex  # noqa: E402
+
+QUERIES = [
+    "grace", "hopp", "Lovelace 12", "analytcal", "knuth donald", "1097",
+    "ada.lovelace0@example.com", "enigma turing", "barbra liskov", "nobody",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    records = [fake_upstream.make_record("clients", i, clients=args.clients) for i in range(args.clients)]
+    index = ClientIndex()
+    start = time.perf_counter()
+    index.load(records)
+    print(f"indexed {len(index)} clients in {time.perf_counter() - start:.2f}s")
+
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            results = index.search(query)
+            samples.append((time.perf_counter() - start) * 1e6)
+        samples.sort()
+        p99 = samples[int(len(samples) * 0.99) - 1]
+        top = results[0]["id"] if results else "-"
+        print(f"{query!r:30s} median={statistics.median(samples):7.1f} us  p99={p99:7.1f} us  "
+              f"results={len(results)} top={top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Cold start vs warm start from the memory-mapped columnar snapshot.
+
+A cold process has to list every resource before it can aggregate invoices
+or search clients; a warm one maps the snapshot the previous process left
+behind. Each start runs in a fresh interpreter against the local fake API
+and reports the time to its first answers and the upstream bytes it read.
+
+    python benchmarks/bench_snapshot.py --records 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+async def _start(base_url: str) -> dict:
+    import httpx
+
+    import fake_upstream
+    from freshbooks_mcp.simple_oauth_server import FreshBooksOAuthClient
+
+    client = FreshBooksOAuthClient("bench", "bench")
+    client.client = httpx.AsyncClient(base_url=base_url, timeout=120.0)
+    client.account_id = fake_upstream.ACCOUNT_ID
+    began = time.perf_counter()
+    try:
+        totals = await client.aggregate("invoices", metric="sum", column="outstanding", group_by="v3_status")
+        first = time.perf_counter() - began
+        found = await client.search_clients("hopper")
+        lookup = await client.lookup_record("invoices", 50123)
+        elapsed = time.perf_counter() - began
+        if client._snapshot_refresh is not None:
+            await client._snapshot_refresh
+    finally:
+        await client.close()
+    return {
+        "first_answer_ms": first * 1e3,
+        "three_answers_ms": elapsed * 1e3,
+        "groups": len(totals["groups"]),
+        "clients_found": len(found["clients"]),
+        "lookup_hit": lookup["record"] is not None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--child", metavar="BASE_URL", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_start(args.child))))
+        return
+
+    import fake_upstream
+
+    upstream, base_url = fake_upstream.start(default_total=args.records)
+    with tempfile.TemporaryDirectory() as state:
+        env = dict(os.environ, FRESHBOOKS_MCP_STATE_DIR=state)
+        for label in ("cold", "warm"):
+            upstream.bytes_sent = 0
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", base_url], env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{label:5s} first answer {r['first_answer_ms']:9.1f} ms  three answers {r['three_answers_ms']:9.1f} ms  "
+                  f"upstream bytes {upstream.bytes_sent:>10d}  groups={r['groups']} clients={r['clients_found']} "
+                  f"lookup={r['lookup_hit']}")
+        size = os.path.getsize(os.path.join(state, f"snapshot-{fake_upstream.ACCOUNT_ID}.fbsnap"))
+        print(f"snapshot file {size} bytes for {args.records} records of each resource")
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
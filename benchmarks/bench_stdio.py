@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""JSON-RPC frame overhead of the stdio transport.
+
+A child process answers every request line with a small result, framed in
+one of two ways: ``thread`` reads with ``asyncio.to_thread(readline)`` and
+writes with ``print`` and ``flush``, as the Simple OAuth server used to;
+``streams`` uses ``freshbooks_mcp.stdio.StdioTransport``. ``server`` runs
+the Simple OAuth server itself on ``initialize`` requests. Requests are
+either pipelined (all sent, then all read) or sent one at a time.
+
+    python benchmarks/bench_stdio.py --frames 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+THREAD_CHILD = """
+import asyncio, json, sys
+async def main():
+    while True:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break
+        request = json.loads(line)
+        print(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": {}}))
+        sys.stdout.flush()
+asyncio.run(main())
+"""
+
+STREAMS_CHILD = """
+import asyncio, json
+from freshbooks_mcp.stdio import StdioTransport
+async def main():
+    stdio = StdioTransport()
+    await stdio.start()
+    while True:
+        line = await stdio.readline()
+        if not line:
+            break
+        request = json.loads(line)
+        stdio.send({"jsonrpc": "2.0", "id": request["id"], "result": {}})
+    await stdio.close()
+asyncio.run(main())
+"""
+
+
+def _command(mode: str):
+    if mode == "server":
+        return [sys.executable, "-m", "freshbooks_mcp.simple_oauth_server"]
+    return [sys.executable, "-c", THREAD_CHILD if mode == "thread" else STREAMS_CHILD]
+
+
+def _frame(i: int, mode: str) -> bytes:
+    method = "initialize" if mode == "server" else "ping"
+    return json.dumps({"jsonrpc": "2.0", "id": i, "method": method, "params": {}}).encode() + b"\n"
+
+
+async def run_mode(mode: str, frames: int, pipelined: bool, env: dict) -> float:
+    process = await asyncio.create_subprocess_exec(
+        *_command(mode), stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, env=env, limit=2 ** 24
+    )
+    start = time.perf_counter()
+    if pipelined:
+        async def send():
+            for i in range(frames):
+                process.stdin.write(_frame(i, mode))
+                if i % 256 == 0:
+                    await process.stdin.drain()
+            await process.stdin.drain()
+
+        sender = asyncio.create_task(send())
+        for _ in range(frames):
+            await process.stdout.readline()
+        await sender
+    else:
+        for i in range(frames):
+            process.stdin.write(_frame(i, mode))
+            await process.stdin.drain()
+            await process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.stdin.close()
+    await process.wait()
+    return elapsed
+
+
+async def run(frames: int):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")]))
+    # Keep the server from finding a saved token and authenticating
+    env["HOME"] = tempfile.mkdtemp()
+    for mode in ("thread", "streams", "server"):
+        for pipelined in (True, False):
+            count = frames if pipelined else frames // 4
+            elapsed = await run_mode(mode, count, pipelined, env)
+            label = "pipelined" if pipelined else "one at a time"
+            print(f"{mode:8s} {label:14s} frames={count:<7d} frames/sec={count / elapsed:10.0f} "
+                  f"us/frame={1e6 * elapsed / count:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.frames))
+
+
+if __name__ == "__main__":
+    main()
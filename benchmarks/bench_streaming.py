@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Peak memory of buffered vs streaming decoding of multi-page invoice pulls.
+
+Each mode runs in a fresh interpreter against a local fake API and reports
+the peak RSS growth over the interpreter's baseline:
+
+- ``buffered``: ``response.json()`` per page, all records kept, projected at the end
+- ``streaming``: records decoded one by one, projected as they arrive
+- ``streaming-count``: records decoded one by one and discarded (export/mirror style)
+
+    python benchmarks/bench_streaming.py --pages 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+FIELDS = ["id", "customerid", "v3_status", "amount"]
+
+
+async def _run(mode: str, base_url: str, pages: int) -> dict:
+    import httpx
+
+    from freshbooks_mcp.resources import MAX_PER_PAGE, resource_path
+    from freshbooks_mcp.streaming import project, stream_records
+
+    import fake_upstream
+
+    path = resource_path(fake_upstream.ACCOUNT_ID, "invoices")
+    kept = []
+    count = 0
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        if mode == "buffered":
+            full = []
+            for page in range(1, pages + 1):
+                response = await client.get(path, params={"page": page, "per_page": MAX_PER_PAGE})
+                full.extend(response.json()["response"]["result"]["invoices"])
+            kept = [project(record, FIELDS) for record in full]
+            count = len(full)
+        else:
+            async for record in stream_records(client, path, "invoices", max_pages=pages):
+                count += 1
+                if mode == "streaming":
+                    kept.append(project(record, FIELDS))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"records": count, "kept": len(kept), "peak_delta_kib": peak - baseline, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "BASE_URL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_run(args.child[0], args.child[1], args.pages))))
+        return
+
+    import fake_upstream
+
+    upstream, base_url = fake_upstream.start(default_total=args.pages * 100)
+    try:
+        for mode in ("buffered", "streaming", "streaming-count"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--pages", str(args.pages), "--child", mode, base_url],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out)
+            print(f"{mode:16s} records={r['records']:<7d} kept={r['kept']:<7d} "
+                  f"peak_rss_growth={r['peak_delta_kib'] / 1024:7.1f} MiB  time={r['seconds']:6.2f}s")
+    finally:
+        upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
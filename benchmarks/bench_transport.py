@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Compare one stdio process per client against one shared HTTP server.
+
+For each model the benchmark opens ``--sessions`` MCP sessions against
+``freshbooks_mcp.server``, issues ``--calls`` ``get_clients`` tool calls per
+session concurrently and reports resident memory per session and tool call
+throughput. The FreshBooks API is replaced by a local fake.
+
+    python benchmarks/bench_transport.py --sessions 20 --calls 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import fake_upstream  # noqa: E402
+from mcp import ClientSession, StdioServerParameters  # noqa: E402
+from mcp.client.stdio import stdio_client  # noqa: E402
+from mcp.client.streamable_http import streamablehttp_client  # noqa: E402
+
+
+def _server_env(base_url: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "FRESHBOOKS_API_TOKEN": "bench",
+        "FRESHBOOKS_BUSINESS_ID": fake_upstream.ACCOUNT_ID,
+        "FRESHBOOKS_BASE_URL": base_url,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+    })
+    return env
+
+
+async def _drive(session: ClientSession, calls: int):
+    for _ in range(calls):
+        await session.call_tool("get_clients", {})
+
+
+async def bench_stdio(base_url: str, sessions: int, calls: int) -> dict:
+    """One server process per session, like most MCP hosts spawn today."""
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "freshbooks_mcp.server", "--transport", "stdio"],
+        env=_server_env(base_url),
+    )
+    ready = asyncio.Event()
+    opened = []
+    stop = asyncio.Event()
+    result = {}
+
+    async def one_session():
+        async with stdio_client(params) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.call_tool("get_clients", {})
+                opened.append(session)
+                if len(opened) == sessions:
+                    ready.set()
+                await stop.wait()
+
+    tasks = [asyncio.create_task(one_session()) for _ in range(sessions)]
+    await ready.wait()
+    rss = sum(fake_upstream.rss_kib(pid) for pid in fake_upstream.child_pids(os.getpid()))
+    start = time.perf_counter()
+    await asyncio.gather(*(_drive(s, calls) for s in opened))
+    elapsed = time.perf_counter() - start
+    result = {"rss_kib_total": rss, "rss_kib_per_session": rss / sessions, "calls_per_s": sessions * calls / elapsed}
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def bench_http(base_url: str, sessions: int, calls: int) -> dict:
+    """One long-lived HTTP server multiplexing every session."""
+    port = _free_port()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "freshbooks_mcp.server", "--transport", "http", "--port", str(port),
+        env=_server_env(base_url),
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/health", timeout=1).read()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    baseline = fake_upstream.rss_kib(proc.pid)
+
+    ready = asyncio.Event()
+    opened = []
+    stop = asyncio.Event()
+
+    async def one_session():
+        async with streamablehttp_client(url + "/mcp") as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                await session.call_tool("get_clients", {})
+                opened.append(session)
+                if len(opened) == sessions:
+                    ready.set()
+                await stop.wait()
+
+    try:
+        tasks = [asyncio.create_task(one_session()) for _ in range(sessions)]
+        await ready.wait()
+        rss = fake_upstream.rss_kib(proc.pid)
+        start = time.perf_counter()
+        await asyncio.gather(*(_drive(s, calls) for s in opened))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        proc.terminate()
+        await proc.wait()
+    return {
+        "rss_kib_total": rss,
+        "rss_kib_per_session": (rss - baseline) / sessions,
+        "rss_kib_baseline": baseline,
+        "calls_per_s": sessions * calls / elapsed,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--records", type=int, default=100, help="clients returned per call")
+    args = parser.parse_args()
+
+    upstream, base_url = fake_upstream.start(default_total=args.records)
+    try:
+        for name, bench in (("stdio-per-process", bench_stdio), ("http-shared", bench_http)):
+            r = await bench(base_url, args.sessions, args.calls)
+            print(f"{name:18s} sessions={args.sessions:<4d} "
+                  f"rss_total={r['rss_kib_total'] / 1024:8.1f} MiB  "
+                  f"rss/session={r['rss_kib_per_session'] / 1024:7.2f} MiB  "
+                  f"throughput={r['calls_per_s']:8.1f} calls/s")
+    finally:
+        upstream.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
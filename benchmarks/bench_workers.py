@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Measure HTTP throughput of the worker pool on large payloads.
+
+Starts ``freshbooks_mcp.server --transport http --workers N`` for each
+requested worker count and drives ``get_invoices`` calls returning
+``--records`` invoices each from several load generator processes. Responses
+come from the shared SQLite cache after the first call, so the measurement is
+dominated by JSON decoding and encoding in the workers.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --records 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_upstream  # noqa: E402
+
+REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tools/call",
+    "params": {"name": "get_invoices", "arguments": {}},
+}
+HEADERS = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+
+
+def _load(url: str, calls: int) -> int:
+    with httpx.Client(timeout=60.0) as client:
+        for _ in range(calls):
+            client.post(url, json=REQUEST, headers=HEADERS).raise_for_status()
+    return calls
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench(workers: int, base_url: str, clients: int, calls: int) -> float:
+    port = _free_port()
+    state_dir = tempfile.mkdtemp(prefix="fb-bench-")
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = dict(os.environ)
+    env.update({
+        "FRESHBOOKS_API_TOKEN": "bench",
+        "FRESHBOOKS_BUSINESS_ID": fake_upstream.ACCOUNT_ID,
+        "FRESHBOOKS_BASE_URL": base_url,
+        "FRESHBOOKS_MCP_STATE_DIR": state_dir,
+        "FRESHBOOKS_CACHE_TTL": "3600",
+        "PYTHONPATH": src + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "freshbooks_mcp.server", "--transport", "http",
+         "--port", str(port), "--workers", str(workers)],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}/mcp"
+    try:
+        for _ in range(200):
+            try:
+                _load(url, 1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        with multiprocessing.get_context("spawn").Pool(clients) as pool:
+            start = time.perf_counter()
+            done = sum(pool.starmap(_load, [(url, calls)] * clients))
+            elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+    return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--records", type=int, default=2000, help="invoices per response")
+    parser.add_argument("--clients", type=int, default=8, help="load generator processes")
+    parser.add_argument("--calls", type=int, default=25, help="calls per load generator")
+    args = parser.parse_args()
+
+    upstream, base_url = fake_upstream.start(default_total=args.records, per_page=args.records)
+    print(f"cpu_count={os.cpu_count()} records/response={args.records}")
+    baseline = None
+    try:
+        for workers in args.workers:
+            rate = bench(workers, base_url, args.clients, args.calls)
+            baseline = baseline or rate
+            print(f"workers={workers:<3d} throughput={rate:8.1f} calls/s  speedup={rate / baseline:5.2f}x")
+    finally:
+        upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
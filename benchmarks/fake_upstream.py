@@ -0,0 +1,271 @@
+"""Local stand-in for the FreshBooks API used by the benchmarks.
+
+Serves deterministic, paginated list responses shaped like the FreshBooks
+accounting API so benchmarks run without credentials or network access.
+"""
+
+import functools
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+ACCOUNT_ID = "bench01"
+BUSINESS_ID = "4242"
+
+STATUSES = ["draft", "sent", "viewed", "paid", "partial", "overdue"]
+CURRENCIES = ["USD", "CAD", "EUR"]
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson"]
+ORGS = ["Analytical", "Compiler", "Enigma", "Semaphore", "Abstraction", "Typesetting", "Optimizing", "Unix"]
+
+
+def make_record(resource: str, i: int, clients: int = 500, projects: int = 200) -> Dict[str, Any]:
+    """Return the ``i``-th synthetic record of ``resource``."""
+    client_id = 1000 + (i % clients)
+    day = 1 + (i % 28)
+    month = 1 + (i // 28) % 12
+    date = f"2026-{month:02d}-{day:02d}"
+    updated = f"{date} 12:{i % 60:02d}:00"
+    currency = CURRENCIES[i % len(CURRENCIES)]
+    if resource == "clients":
+        first, last = FIRST_NAMES[i % 8], LAST_NAMES[(i // 8) % 8]
+        return {
+            "id": 1000 + i,
+            "userid": 1000 + i,
+            "fname": first,
+            "lname": last,
+            "organization": f"{ORGS[(i // 64) % 8]} {last} {i}",
+            "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+            "currency_code": currency,
+            "vis_state": 0,
+            "updated": updated,
+        }
+    if resource == "invoices":
+        amount = f"{(i * 37) % 5000 + 50}.00"
+        return {
+            "id": 50000 + i,
+            "invoiceid": 50000 + i,
+            "invoice_number": f"{i:07d}",
+            "customerid": client_id,
+            "create_date": date,
+            "due_date": date,
+            "status": 2,
+            "v3_status": STATUSES[i % len(STATUSES)],
+            "payment_status": "unpaid",
+            "amount": {"amount": amount, "code": currency},
+            "outstanding": {"amount": amount, "code": currency},
+            "currency_code": currency,
+            "created_at": updated,
+            "updated": updated,
+            "vis_state": 0,
+            "notes": "Thank you for your business.",
+        }
+    if resource == "projects":
+        return {
+            "id": 7000 + (i % projects),
+            "title": f"Project {i % projects}",
+            "client_id": client_id,
+            "description": "Synthetic benchmark project",
+            "active": True,
+            "complete": False,
+            "billing_method": "project_rate",
+            "rate": "120.00",
+            "created_at": updated,
+            "updated_at": updated,
+        }
+    if resource == "expenses":
+        return {
+            "id": 90000 + i,
+            "expenseid": 90000 + i,
+            "amount": {"amount": f"{(i * 13) % 900 + 5}.00", "code": currency},
+            "categoryid": 10 + i % 20,
+            "clientid": client_id,
+            "projectid": 7000 + (i % projects),
+            "date": date,
+            "vendor": f"Vendor {i % 40}",
+            "notes": "Synthetic expense",
+            "status": 0,
+            "updated": updated,
+            "vis_state": 0,
+        }
+    if resource == "time_entries":
+        return {
+            "id": 300000 + i,
+            "client_id": client_id,
+            "project_id": 7000 + (i % projects),
+            "identity_id": 1,
+            "duration": 900 * (1 + i % 16),
+            "started_at": f"{date}T09:00:00Z",
+            "created_at": f"{date}T17:00:00Z",
+            "note": "Synthetic work",
+            "billable": True,
+            "billed": False,
+            "active": True,
+        }
+    raise KeyError(resource)
+
+
+def list_payload(
+    resource: str, total: int, page: int, per_page: int, updated_min: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build a FreshBooks-style list response for one page.
+
+    ``updated_min`` keeps only records whose modification time is not older.
+    """
+    start = (page - 1) * per_page
+    if updated_min is None:
+        indexes = range(start, min(start + per_page, total))
+    else:
+        matching = _matching(resource, total, updated_min.replace("T", " ").rstrip("Z"))
+        total, indexes = len(matching), matching[start:start + per_page]
+    pages = max(1, -(-total // per_page))
+    records = [make_record(resource, i) for i in indexes]
+    return {"response": {"result": {
+        resource: records, "page": page, "pages": pages, "per_page": per_page, "total": total
+    }}}
+
+
+@functools.lru_cache(maxsize=32)
+def _matching(resource: str, total: int, updated_min: str) -> Tuple[int, ...]:
+    return tuple(i for i in range(total) if _updated(resource, i) >= updated_min)
+
+
+def _updated(resource: str, i: int) -> str:
+    record = make_record(resource, i)
+    return record.get("updated") or record.get("updated_at") or record["created_at"].replace("T", " ").rstrip("Z")
+
+
+_PATH = re.compile(r"/accounting/account/[^/]+/[a-z_]+/([a-z_]+)$")
+_RECORD_PATH = re.compile(r"/accounting/account/[^/]+/[a-z_]+/([a-z_]+)/(\d+)$")
+
+# Resource -> id of its first synthetic record
+ID_BASE = {"clients": 1000, "invoices": 50000, "projects": 7000, "expenses": 90000, "time_entries": 300000}
+SINGULAR = {"clients": "client", "invoices": "invoice", "projects": "project", "expenses": "expense", "time_entries": "time_entry"}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.server.fail_status:
+            self.send_response(self.server.fail_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        if parsed.path == "/auth/api/v1/users/me":
+            body = {"response": {"id": 1, "business_memberships": [
+                {"business": {"id": int(BUSINESS_ID), "account_id": ACCOUNT_ID, "name": "Bench"}}
+            ]}}
+        elif _RECORD_PATH.search(parsed.path):
+            resource, record_id = _RECORD_PATH.search(parsed.path).groups()
+            record = self.server.overrides.get((resource, int(record_id)))
+            if record is None and resource in ID_BASE:
+                record = make_record(resource, int(record_id) - ID_BASE[resource])
+            body = {"response": {"result": {SINGULAR.get(resource, resource): record}}}
+        else:
+            match = _PATH.search(parsed.path)
+            resource = match.group(1) if match else None
+            if resource not in ("clients", "invoices", "projects", "expenses", "time_entries"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("per_page", [str(self.server.per_page)])[0])
+            updated_min = (query.get("search[updated_min]") or query.get("updated_since") or [None])[0]
+            total = self.server.totals.get(resource, self.server.default_total)
+            if "search[userids][]" in query:
+                indexes = [int(i) - ID_BASE[resource] for i in query["search[userids][]"]]
+                records = [make_record(resource, i) for i in indexes if 0 <= i < total]
+                body = {"response": {"result": {
+                    resource: records, "page": 1, "pages": 1, "per_page": per_page, "total": len(records)
+                }}}
+            else:
+                body = list_payload(resource, total, page, per_page, updated_min)
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.bytes_sent += len(data)
+        self.server.requests += 1
+
+    def do_POST(self):
+        """Create: echo the record back with a fresh id and keep it in ``server.created``."""
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        match = _PATH.search(urllib.parse.urlparse(self.path).path)
+        resource = match.group(1) if match else None
+        if resource not in SINGULAR or SINGULAR[resource] not in body:
+            self.send_response(400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+        record = dict(body[SINGULAR[resource]])
+        record["id"] = 10_000_000 + len(self.server.created)
+        if resource == "invoices":
+            record["customerid"] = record.pop("client_id", None)
+            total = sum(float(line.get("qty", 1)) * float(line["unit_cost"]["amount"]) for line in record.get("lines", []))
+            record["amount"] = {"amount": f"{total:.2f}", "code": (record.get("lines") or [{}])[0].get("unit_cost", {}).get("code")}
+        self.server.created.append((resource, record))
+        data = json.dumps({"response": {"result": {SINGULAR[resource]: record}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.requests += 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(
+    default_total: int = 100,
+    per_page: int = 100,
+    totals: Optional[Dict[str, int]] = None,
+    delay: float = 0.0,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the fake API in a daemon thread and return ``(server, base_url)``."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.default_total = default_total
+    server.per_page = per_page
+    server.totals = totals or {}
+    server.delay = delay
+    # (resource, id) -> record served instead of the synthetic one
+    server.overrides = {}
+    server.bytes_sent = 0
+    server.requests = 0
+    # (resource, record) of every POSTed create, in order
+    server.created = []
+    # Status every request fails with while set (simulates an outage)
+    server.fail_status = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def rss_kib(pid: int) -> int:
+    """Return the resident set size of ``pid`` in KiB (Linux only)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child_pids(pid: int) -> List[int]:
+    """Return the direct children of ``pid`` (Linux only)."""
+    children = []
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        children.extend(int(p) for p in f.read().split())
+    return children
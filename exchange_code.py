@@ -2,11 +2,16 @@
 """Exchange OAuth authorization code for access token."""
 
 import asyncio
-import json
 import os
 import sys
+import time
 import httpx
 
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from freshbooks_mcp.token_store import TokenStore
+
 async def exchange_code_for_token(auth_code: str):
     """Exchange authorization code for access token."""
     client_id = os.getenv("FRESHBOOKS_CLIENT_ID")
@@ -38,17 +43,18 @@ async def exchange_code_for_token(auth_code: str):
             token_data = response.json()
             
             # Save token to file
-            token_file = os.path.expanduser("~/.freshbooks_token")
+            token_store = TokenStore()
+            token_file = token_store.path
             token_info = {
                 "access_token": token_data.get("access_token"),
                 "refresh_token": token_data.get("refresh_token"),
+                "expires_in": token_data.get("expires_in"),
                 "account_id": token_data.get("account_id"),
                 "business_id": os.getenv("FRESHBOOKS_BUSINESS_ID"),
-                "timestamp": __import__('time').time()
+                "timestamp": time.time()
             }
             
-            with open(token_file, 'w') as f:
-                json.dump(token_info, f, indent=2)
+            token_store.save(token_info)
             
             print(f"✅ Token exchange successful!")
             print(f"Access token saved to: {token_file}")
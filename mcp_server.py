@@ -5,10 +5,16 @@ import asyncio
 import json
 import os
 import sys
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Set, Union
 
 import httpx
 
+# Run from a checkout without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from freshbooks_mcp.deadlines import DeadlineExceeded, clamp_timeout, with_deadline  # noqa: E402
+from freshbooks_mcp.stdio import StdioTransport  # noqa: E402
+
 
 class FreshBooksMCPServer:
     """FreshBooks MCP Server."""
@@ -18,6 +24,10 @@ class FreshBooksMCPServer:
         self.business_id = os.getenv("FRESHBOOKS_BUSINESS_ID")
         self.base_url = "https://api.freshbooks.com"
         self.account_id = None
+        # Requests being handled, by JSON-RPC id, so the client can cancel them
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+        self.stdio: Optional[StdioTransport] = None
+        self._batches: Set[asyncio.Task] = set()
         
         if not self.api_token:
             self._send_error("FreshBooks API token must be set in environment variables")
@@ -30,10 +40,14 @@ class FreshBooksMCPServer:
                 "Content-Type": "application/json",
             },
             timeout=30.0,
+            event_hooks={"request": [clamp_timeout]},
         )
     
-    def _send_response(self, response: Dict[str, Any]):
+    def _send_response(self, response: Union[Dict[str, Any], List[Dict[str, Any]]]):
         """Send a JSON response."""
+        if self.stdio is not None:
+            self.stdio.send(response)
+            return
         print(json.dumps(response))
         sys.stdout.flush()
     
@@ -245,43 +259,151 @@ class FreshBooksMCPServer:
         response = await self.client.get(f"/accounting/account/{self.account_id}/time_entries/time_entries")
         return response.json()
     
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        if method == "initialize":
+            return await self.handle_initialize(request)
+        if method == "tools/list":
+            return await self.handle_list_tools(request)
+        if method == "tools/call":
+            return await self._call_tool(request)
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "error": {
+                "code": -32601,
+                "message": f"Unknown method: {method}"
+            }
+        }
+    
+    async def _call_tool(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = request.get("params", {}).get("name")
+        try:
+            return await with_deadline(tool_name, self.handle_call_tool(request))
+        except DeadlineExceeded as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {
+                    "code": -32603,
+                    "message": str(e)
+                }
+            }
+    
+    async def _respond(self, request: Dict[str, Any]):
+        request_id = request.get("id")
+        try:
+            response = await self._dispatch(request)
+        except asyncio.CancelledError:
+            # Cancelled by the client, which expects no response
+            return
+        except Exception as e:
+            self._send_response({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32000,
+                    "message": f"Server error: {e}"
+                }
+            })
+            return
+        finally:
+            self._in_flight.pop(request_id, None)
+        self._send_response(response)
+    
+    @staticmethod
+    def _invalid(request_id: Any = None, message: str = "Invalid Request", code: int = -32600) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+    
+    async def _respond_batch(self, batch: List[Any]):
+        """Run a JSON-RPC batch concurrently and send its responses as one array."""
+        if not batch:
+            self._send_response(self._invalid())
+            return
+        responses: List[Dict[str, Any]] = []
+        calls = []
+        for request in batch:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                responses.append(self._invalid(request.get("id") if isinstance(request, dict) else None))
+            elif request["method"] == "notifications/cancelled":
+                self._cancel(request.get("params") or {})
+            elif "id" in request and request["id"] in self._in_flight:
+                # Answers to the same id could not be told apart
+                responses.append(self._invalid(request["id"], "Duplicate request id"))
+            elif "id" in request:
+                task = asyncio.create_task(self._dispatch(request))
+                self._in_flight[request["id"]] = task
+                calls.append((request["id"], task))
+        results = await asyncio.gather(*(task for _, task in calls), return_exceptions=True)
+        for (request_id, _), result in zip(calls, results):
+            self._in_flight.pop(request_id, None)
+            if isinstance(result, asyncio.CancelledError):
+                # Cancelled by the client, which expects no response
+                continue
+            if isinstance(result, BaseException):
+                result = self._invalid(request_id, f"Server error: {result}", -32000)
+            responses.append(result)
+        if responses:
+            self._send_response(responses)
+    
+    def _cancel(self, params: Dict[str, Any]):
+        task = self._in_flight.get(params.get("requestId"))
+        if task is not None:
+            task.cancel()
+    
     async def run(self):
         """Run the MCP server."""
+        self.stdio = StdioTransport()
+        await self.stdio.start()
+        # Requests run as tasks so a slow call does not hold up the ones
+        # behind it and a notifications/cancelled can stop it
         while True:
             try:
-                line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
+                try:
+                    line = await self.stdio.readline()
+                except ValueError as e:
+                    self._send_error(f"Request too large: {e}")
+                    continue
                 if not line:
                     break
                 
-                request = json.loads(line.strip())
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self._send_response(self._invalid(message="Parse error", code=-32700))
+                    continue
+                if isinstance(request, list):
+                    task = asyncio.create_task(self._respond_batch(request))
+                    self._batches.add(task)
+                    task.add_done_callback(self._batches.discard)
+                    continue
+                if not isinstance(request, dict):
+                    self._send_response(self._invalid())
+                    continue
                 method = request.get("method")
                 
-                if method == "initialize":
-                    response = await self.handle_initialize(request)
-                elif method == "initialized":
-                    # No response needed for initialized notification
+                if method == "notifications/cancelled":
+                    self._cancel(request.get("params") or {})
+                elif "id" not in request:
+                    # No response is due for other notifications (initialized, ...)
                     continue
-                elif method == "tools/list":
-                    response = await self.handle_list_tools(request)
-                elif method == "tools/call":
-                    response = await self.handle_call_tool(request)
+                elif not isinstance(method, str):
+                    self._send_response(self._invalid(request["id"]))
+                elif request["id"] in self._in_flight:
+                    # Answers to the same id could not be told apart
+                    self._send_response(self._invalid(request["id"], "Duplicate request id"))
                 else:
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.get("id"),
-                        "error": {
-                            "code": -32601,
-                            "message": f"Unknown method: {method}"
-                        }
-                    }
-                
-                self._send_response(response)
+                    self._in_flight[request["id"]] = asyncio.create_task(self._respond(request))
                 
-            except json.JSONDecodeError:
-                continue
             except Exception as e:
                 self._send_error(f"Server error: {e}")
-                break
+        
+        # Answer what is still running before shutting down
+        if self._in_flight or self._batches:
+            await asyncio.gather(*self._in_flight.values(), *self._batches, return_exceptions=True)
+        await self.stdio.close()
     
     async def close(self):
         """Close the HTTP client."""
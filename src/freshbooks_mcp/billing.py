@@ -0,0 +1,174 @@
+"""Month-end billing: invoices built from unbilled time entries.
+
+``TimeLedger`` folds streamed time entries into seconds per client and
+project, keeping only the entry ids. ``plan_invoices`` turns the totals into
+one invoice per client with one line per project, priced at the project's
+rate or a default hourly rate, and ``create_all`` sends the invoices with
+bounded concurrency. The plans are ordinary ``create_invoice`` arguments, so
+they go through the same validation as single creates. Duplicate
+suppression keys an invoice on the client and the ids of the entries it
+bills, so a re-run with another invoice date still finds it.
+"""
+
+import asyncio
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from freshbooks_mcp.extractors import DEFAULT_CURRENCY
+from freshbooks_mcp.progress import report
+
+DEFAULT_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+
+_HOURS = Decimal("0.01")
+_CENTS = Decimal("0.01")
+
+
+def _flag(value: Any) -> bool:
+    return value is True or str(value).lower() in ("true", "1")
+
+
+def _rate(value: Any) -> Optional[Decimal]:
+    if isinstance(value, dict):
+        value = value.get("amount")
+    try:
+        rate = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+    return rate if rate.is_finite() and rate > 0 else None
+
+
+class TimeLedger:
+    """Unbilled seconds per (client, project) within a date range."""
+
+    def __init__(self, start_date: str, end_date: str, client_ids: Optional[Iterable[int]] = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.client_ids = {int(client_id) for client_id in client_ids} if client_ids else None
+        self.scanned = 0
+        self.unbilled = 0
+        # client id -> project id (None for entries without one) -> (seconds, entry ids)
+        self.totals: Dict[int, Dict[Optional[int], List[Any]]] = {}
+        self.without_client = 0
+
+    def add(self, entry: Dict[str, Any]):
+        self.scanned += 1
+        day = str(entry.get("started_at") or "")[:10]
+        if not self.start_date <= day <= self.end_date:
+            return
+        if _flag(entry.get("billed")) or not _flag(entry.get("billable", True)):
+            return
+        seconds = int(entry.get("duration") or 0)
+        if seconds <= 0:
+            return
+        self.unbilled += 1
+        client_id = entry.get("client_id")
+        if not client_id:
+            self.without_client += 1
+            return
+        client_id = int(client_id)
+        if self.client_ids is not None and client_id not in self.client_ids:
+            return
+        project_id = int(entry["project_id"]) if entry.get("project_id") else None
+        totals = self.totals.setdefault(client_id, {}).setdefault(project_id, [0, []])
+        totals[0] += seconds
+        totals[1].append(int(entry["id"]))
+
+    def project_ids(self) -> set:
+        return {project_id for projects in self.totals.values() for project_id in projects if project_id is not None}
+
+
+def plan_invoices(
+    ledger: TimeLedger,
+    clients: Dict[int, Dict[str, Any]],
+    projects: Dict[int, Dict[str, Any]],
+    default_rate: Optional[Any] = None,
+    date: Optional[str] = None,
+    due_date: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Build ``create_invoice`` arguments per client from ``ledger``.
+
+    Returns ``(plans, skipped)``. A plan holds the invoice ``arguments``
+    plus ``client``, ``entries`` and ``hours`` for reporting and the sorted
+    ``entry_ids`` it bills; clients with time that has no rate are skipped
+    with the reason.
+    """
+    fallback = _rate(default_rate)
+    plans, skipped = [], []
+    for client_id in sorted(ledger.totals):
+        client = clients.get(client_id)
+        currency = (client or {}).get("currency_code") or DEFAULT_CURRENCY
+        lines, unpriced, entry_ids, hours_total = [], [], [], Decimal(0)
+        for project_id, (seconds, ids) in sorted(ledger.totals[client_id].items(), key=lambda item: item[0] or 0):
+            project = projects.get(project_id) if project_id is not None else None
+            rate = _rate(project.get("rate")) if project else None
+            rate = rate or fallback
+            title = project.get("title") if project else None
+            if rate is None:
+                unpriced.append(title or project_id or "time without a project")
+                continue
+            hours = (Decimal(seconds) / 3600).quantize(_HOURS, ROUND_HALF_UP)
+            lines.append({
+                "name": title or "Time",
+                "description": f"{len(ids)} time entries, {ledger.start_date} to {ledger.end_date}",
+                "qty": str(hours),
+                "unit_cost": {"amount": str(rate.quantize(_CENTS, ROUND_HALF_UP)), "code": currency},
+            })
+            entry_ids.extend(ids)
+            hours_total += hours
+        if unpriced:
+            names = ", ".join(str(name) for name in unpriced)
+            skipped.append({"client_id": client_id, "reason": f"no rate for {names}; pass default_rate"})
+            continue
+        arguments: Dict[str, Any] = {"client_id": client_id, "lines": lines}
+        if date:
+            arguments["date"] = date
+        if due_date:
+            arguments["due_date"] = due_date
+        plans.append({
+            "client": client,
+            "entries": len(entry_ids),
+            "entry_ids": sorted(entry_ids),
+            "hours": str(hours_total),
+            "arguments": arguments,
+        })
+    return plans, skipped
+
+
+async def create_all(
+    plans: List[Dict[str, Any]],
+    create: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+):
+    """Run ``create`` for every plan, at most ``concurrency`` at a time, recording each outcome in its plan.
+
+    ``create`` receives the plan and returns the ``create_invoice`` result,
+    optionally with ``time_entries_billed`` and ``time_entries_unmarked``.
+    """
+    semaphore = asyncio.Semaphore(max(1, min(int(concurrency), MAX_CONCURRENCY)))
+    finished = 0
+
+    async def run(plan: Dict[str, Any]):
+        nonlocal finished
+        async with semaphore:
+            try:
+                result = await create(plan)
+            except Exception as e:
+                plan.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+                result = None
+        finished += 1
+        report(finished, len(plans), f"{finished} of {len(plans)} invoices sent")
+        if result is None:
+            return
+        if "error" in result:
+            plan.update({"status": "failed", "error": result["error"]})
+            return
+        invoice = result.get("response", {}).get("result", {}).get("invoice") or {}
+        plan.update({
+            "status": "deduplicated" if result.get("deduplicated") else "created",
+            "invoice_id": invoice.get("id"),
+            "invoice_number": invoice.get("invoice_number"),
+        })
+        plan.update({key: result[key] for key in ("time_entries_billed", "time_entries_unmarked") if key in result})
+
+    await asyncio.gather(*(run(plan) for plan in plans))
@@ -0,0 +1,157 @@
+"""Response caches for FreshBooks GET requests.
+
+``ResponseCache`` keeps decoded responses in process memory.
+``SQLiteResponseCache`` stores them in a SQLite database (WAL mode) so that
+several worker processes on one machine share a single cache.
+``SingleFlight`` joins identical calls that are in flight at the same time.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_TTL = float(os.getenv("FRESHBOOKS_CACHE_TTL", "30"))
+
+
+class ResponseCache:
+    """In-process TTL cache keyed by request path."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Return ``(stored_at, value)`` for ``key`` regardless of its age."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` if it is still fresh."""
+        entry = self.get_entry(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any):
+        """Store ``value`` under ``key``."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str = ""):
+        """Drop every entry whose key starts with ``prefix``."""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteResponseCache(ResponseCache):
+    """TTL cache shared between processes through a SQLite database."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_entries: int = 4096):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, body TEXT NOT NULL)"
+        )
+        self._writes = 0
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM responses WHERE key = ? AND stored_at >= ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any):
+        body = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, stored_at, body) VALUES (?, ?, ?)",
+                (key, time.time(), body),
+            )
+            self._writes += 1
+            if self._writes % 64 == 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN "
+                    "(SELECT key FROM responses ORDER BY stored_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def invalidate(self, prefix: str = ""):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result.
+
+    The shared call is cancelled only when every caller waiting on it has
+    been cancelled.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict["asyncio.Future[Any]", int] = {}
+        self.shared = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Await ``call()``, or the identical call already running under ``key``."""
+        future = self._calls.get(key)
+        if future is None:
+            future = self._calls[key] = asyncio.ensure_future(call())
+            future.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.shared += 1
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters[future] == 1 and not future.done():
+                future.cancel()
+            raise
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+
+    def _finished(self, key: str, future: "asyncio.Future[Any]"):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Retrieved here so it is not logged when every caller has gone
+            future.exception()
@@ -0,0 +1,154 @@
+"""Self-signed TLS certificate for the local OAuth callback listener.
+
+The certificate and key are generated once, stored together in a single
+``0600`` PEM file inside the state directory and reused until shortly before
+they expire. Generation happens in-process when the ``cryptography`` package
+is installed and falls back to the ``openssl`` command line tool otherwise.
+"""
+
+import datetime
+import ipaddress
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Optional, Tuple
+
+from freshbooks_mcp.paths import state_dir
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+except ImportError:  # pragma: no cover - optional dependency
+    x509 = None
+
+CERT_FILENAME = "callback-cert.pem"
+CERT_VALIDITY_DAYS = 30
+# Regenerate when less than this many seconds of validity remain
+RENEW_BEFORE_SECONDS = 24 * 3600
+
+_lock = threading.Lock()
+_cached_context: Optional[Tuple[str, float, ssl.SSLContext]] = None
+
+
+def _cert_expiry(path: str) -> float:
+    """Return the expiry of the certificate at ``path`` as a UNIX timestamp."""
+    if x509 is not None:
+        with open(path, "rb") as f:
+            cert = x509.load_pem_x509_certificate(f.read())
+        not_after = getattr(cert, "not_valid_after_utc", None)
+        if not_after is None:
+            not_after = cert.not_valid_after.replace(tzinfo=datetime.timezone.utc)
+        return not_after.timestamp()
+    # Without cryptography we cannot parse the file; rely on the validity we wrote
+    return os.path.getmtime(path) + CERT_VALIDITY_DAYS * 86400
+
+
+def _generate_pem_inprocess() -> bytes:
+    """Generate a key and certificate with ``cryptography``."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=CERT_VALIDITY_DAYS))
+        .add_extension(
+            x509.SubjectAlternativeName([
+                x509.DNSName("localhost"),
+                x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+            ]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    key_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return key_pem + cert.public_bytes(serialization.Encoding.PEM)
+
+
+def _generate_pem_openssl() -> bytes:
+    """Generate a key and certificate by shelling out to ``openssl``."""
+    if shutil.which("openssl") is None:
+        raise RuntimeError(
+            "Cannot create a TLS certificate for the OAuth callback: "
+            "install the 'cryptography' package or make 'openssl' available"
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        key_path = os.path.join(tmp, "key.pem")
+        cert_path = os.path.join(tmp, "cert.pem")
+        subprocess.run([
+            'openssl', 'req', '-x509', '-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1',
+            '-keyout', key_path, '-out', cert_path, '-days', str(CERT_VALIDITY_DAYS),
+            '-nodes', '-subj', '/CN=localhost'
+        ], check=True, capture_output=True)
+        with open(key_path, "rb") as f:
+            key_pem = f.read()
+        with open(cert_path, "rb") as f:
+            cert_pem = f.read()
+    return key_pem + cert_pem
+
+
+def _write_private(path: str, data: bytes):
+    """Atomically write ``data`` to ``path`` with owner-only permissions."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".cert-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def ensure_self_signed_cert(directory: Optional[str] = None) -> str:
+    """Return the path of a valid combined key+certificate PEM file.
+
+    An existing file is reused until it is within ``RENEW_BEFORE_SECONDS`` of
+    expiry; otherwise a new one is generated and atomically swapped in.
+    """
+    path = os.path.join(directory or state_dir(), CERT_FILENAME)
+    try:
+        if _cert_expiry(path) - time.time() > RENEW_BEFORE_SECONDS:
+            return path
+    except (OSError, ValueError):
+        pass
+
+    pem = _generate_pem_inprocess() if x509 is not None else _generate_pem_openssl()
+    _write_private(path, pem)
+    return path
+
+
+def callback_ssl_context(directory: Optional[str] = None) -> ssl.SSLContext:
+    """Return a server-side SSL context for the OAuth callback listener.
+
+    The context is cached in-process and rebuilt only when the certificate
+    file on disk changes.
+    """
+    global _cached_context
+    with _lock:
+        path = ensure_self_signed_cert(directory)
+        mtime = os.path.getmtime(path)
+        if _cached_context and _cached_context[0] == path and _cached_context[1] == mtime:
+            return _cached_context[2]
+
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(path)
+        _cached_context = (path, mtime, context)
+        return context
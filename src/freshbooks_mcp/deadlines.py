@@ -0,0 +1,101 @@
+"""Per-tool deadlines.
+
+Every tool call runs under a deadline, ``FRESHBOOKS_TOOL_DEADLINE`` seconds
+by default (60). ``FRESHBOOKS_TOOL_DEADLINES`` overrides it per tool, e.g.
+``get_invoices=20,export_resource=0``, where 0 means no deadline. The
+deadline lives in a context variable, so every request made on the call's
+behalf sees it. ``clamp_timeout`` is an httpx request hook that shortens
+each request's timeouts to the time left and refuses to send once none is
+left. A page loop or retry therefore stops at the deadline instead of
+starting more work, and the call itself is cancelled when the deadline
+passes.
+
+Background work started from a tool call (index and snapshot refreshes,
+probes, the outbox drainer) must not inherit the deadline or the call's
+progress reporting; start it with ``detached``.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+DEFAULT_DEADLINE = float(os.getenv("FRESHBOOKS_TOOL_DEADLINE", "60"))
+# Tools expected to outlast the default
+LONG_RUNNING: Dict[str, float] = {
+    "authenticate": 0,
+    "export_resource": 3600,
+    "generate_invoices_from_time": 900,
+}
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("freshbooks_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """A tool call ran out of time."""
+
+
+def _overrides() -> Dict[str, float]:
+    overrides = {}
+    for item in os.getenv("FRESHBOOKS_TOOL_DEADLINES", "").split(","):
+        tool, _, seconds = item.partition("=")
+        if tool.strip() and seconds.strip():
+            overrides[tool.strip()] = float(seconds)
+    return overrides
+
+
+def deadline_for(tool: str) -> Optional[float]:
+    """Seconds ``tool`` may run, or None for no deadline."""
+    seconds = _overrides().get(tool, LONG_RUNNING.get(tool, DEFAULT_DEADLINE))
+    return seconds if seconds > 0 else None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current call's deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+async def with_deadline(tool: str, call: Awaitable[T]) -> T:
+    """Await ``call`` under the deadline of ``tool``; cancel it and raise ``DeadlineExceeded`` when it passes."""
+    seconds = deadline_for(tool)
+    if seconds is None:
+        return await call
+    outer = remaining()
+    if outer is not None:
+        seconds = min(seconds, max(outer, 0.0))
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        return await asyncio.wait_for(call, seconds)
+    except asyncio.TimeoutError:
+        if not expired():
+            raise
+        raise DeadlineExceeded(f"{tool} did not finish within its {seconds:g}s deadline") from None
+    finally:
+        _deadline.reset(token)
+
+
+def detached(call: Awaitable[T]) -> "asyncio.Task[T]":
+    """Start ``call`` as a task outside the current call's context: no deadline, no progress reporting."""
+    return contextvars.Context().run(asyncio.create_task, call)
+
+
+async def clamp_timeout(request: httpx.Request):
+    """httpx request hook: cap the request's timeouts at the time left."""
+    left = remaining()
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded(f"deadline passed before {request.method} {request.url.path}")
+    timeout: Dict[str, Any] = request.extensions.get("timeout", {})
+    request.extensions["timeout"] = {key: left if value is None else min(value, left) for key, value in timeout.items()}
@@ -0,0 +1,293 @@
+"""Stream FreshBooks list resources to NDJSON or CSV files on disk.
+
+Records are written as they are decoded, one page at a time, so memory stays
+bounded however large the resource is. After every page the output is
+flushed and a checkpoint (``<output>.checkpoint``) records the page and the
+file size; an interrupted export resumes after the last complete page,
+discarding anything written past it. Compressed output (``.gz``) is written
+as one gzip member per page, so a truncated file is still valid after the
+partial member is cut off. The checkpoint is removed once the export
+finishes. An existing file is never overwritten unless it is the output of
+the interrupted export its checkpoint describes (or ``overwrite`` is set).
+
+CSV columns are the fields requested, or else the fields declared for the
+resource in ``records``; keys outside them go to a final ``_extra`` column
+as one JSON object, so no value is dropped.
+
+The ``export_resource`` tool writes only inside ``export_dir()`` (the
+``exports`` directory of the server's state directory).
+
+    freshbooks-mcp export invoices invoices.ndjson.gz
+    python -m freshbooks_mcp.export time_entries entries.csv --fields id,client_id,duration
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freshbooks_mcp.paths import state_path
+from freshbooks_mcp.records import RECORD_TYPES
+from freshbooks_mcp.resources import MAX_PER_PAGE, RESOURCE_PATHS, resource_path
+from freshbooks_mcp.streaming import matches, project, stream_records
+
+FORMATS = ("ndjson", "csv")
+# CSV column holding the keys of a record outside the declared columns
+EXTRA_COLUMN = "_extra"
+
+
+def export_dir() -> str:
+    """The directory tool exports are written to, created if needed."""
+    path = state_path("exports")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def export_path(name: str) -> str:
+    """Resolve ``name`` to a path inside ``export_dir()``; raise ``ValueError`` for anything outside it."""
+    root = os.path.realpath(export_dir())
+    if not name or os.path.isabs(os.path.expanduser(name)):
+        raise ValueError(f"output must be a file name relative to {root}")
+    path = os.path.realpath(os.path.join(root, name))
+    if not path.startswith(root + os.sep):
+        raise ValueError(f"output must stay inside {root}")
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    return path
+
+
+def declared_columns(resource: str) -> List[str]:
+    """CSV columns of ``resource`` when no fields are given."""
+    return [*RECORD_TYPES[resource].FIELDS, EXTRA_COLUMN]
+
+
+def infer_format(output: str) -> str:
+    """Pick the format from the output name (``.csv``, anything else is NDJSON)."""
+    name = output[:-3] if output.endswith(".gz") else output
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def checkpoint_path(output: str) -> str:
+    return output + ".checkpoint"
+
+
+def _load_checkpoint(output: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(checkpoint_path(output)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_checkpoint(output: str, state: Dict[str, Any]):
+    """Atomically replace the checkpoint file."""
+    path = checkpoint_path(output)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".export-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _csv_value(value: Any) -> Any:
+    return json.dumps(value, separators=(",", ":")) if isinstance(value, (dict, list)) else value
+
+
+class _PageWriter:
+    """Encodes the records of one page into the output file."""
+
+    def __init__(self, raw, fmt: str, columns: Optional[List[str]], compress: bool):
+        self.raw = raw
+        self.fmt = fmt
+        self.columns = columns
+        self.compress = compress
+
+    def write_page(self, records: List[Dict[str, Any]], header: bool = False):
+        text = io.StringIO()
+        if self.fmt == "csv":
+            writer = csv.DictWriter(text, fieldnames=self.columns)
+            known = set(self.columns)
+            if header:
+                writer.writeheader()
+            for record in records:
+                row = {key: _csv_value(value) for key, value in record.items() if key in known}
+                extra = {key: value for key, value in record.items() if key not in known}
+                if extra:
+                    if EXTRA_COLUMN not in known:
+                        raise ValueError(f"fields {', '.join(extra)} are not among the export columns")
+                    row[EXTRA_COLUMN] = json.dumps(extra, separators=(",", ":"))
+                writer.writerow(row)
+        else:
+            for record in records:
+                text.write(json.dumps(record, separators=(",", ":")))
+                text.write("\n")
+        data = text.getvalue().encode("utf-8")
+        if self.compress:
+            with gzip.GzipFile(filename="", fileobj=self.raw, mode="wb", mtime=0) as member:
+                member.write(data)
+        else:
+            self.raw.write(data)
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+
+
+async def export_resource(
+    client: httpx.AsyncClient,
+    account_id: str,
+    resource: str,
+    output: str,
+    fmt: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    compress: Optional[bool] = None,
+    resume: bool = True,
+    per_page: int = MAX_PER_PAGE,
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """Write every record of ``resource`` to ``output`` and return throughput stats.
+
+    ``on_page`` is called with the checkpoint state after each page. An
+    existing ``output`` is only continued from its checkpoint, or replaced
+    when ``overwrite`` is set; otherwise ``ValueError`` is raised.
+    """
+    if resource not in RESOURCE_PATHS:
+        raise ValueError(f"Unknown resource: {resource}")
+    fmt = fmt or infer_format(output)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    compress = output.endswith(".gz") if compress is None else compress
+
+    settings = {"resource": resource, "format": fmt, "compress": compress, "fields": fields, "filters": filters}
+    state = _load_checkpoint(output) if resume else None
+    if state is not None and any(state.get(key) != value for key, value in settings.items()):
+        raise ValueError(f"{checkpoint_path(output)} belongs to a different export; remove it or pass resume=False")
+    if state is not None and os.path.exists(output):
+        raw = open(output, "r+b")
+        raw.truncate(state["bytes"])
+        raw.seek(state["bytes"])
+    else:
+        if os.path.lexists(output) and not overwrite:
+            raise ValueError(f"{output} already exists and is not an interrupted export of the same data; choose another name")
+        columns = fields if fields or fmt != "csv" else declared_columns(resource)
+        state = dict(settings, page=0, pages=None, records=0, bytes=0, columns=columns, header=False)
+        # "x" fails rather than follow a file or link created in the meantime
+        raw = open(output, "wb" if overwrite else "xb")
+    resumed_from = state["page"] + 1
+
+    path = resource_path(account_id, resource)
+    written = 0
+    start = time.perf_counter()
+    try:
+        writer = _PageWriter(raw, fmt, state["columns"], compress)
+        page = state["page"]
+        while state["pages"] is None or page < state["pages"]:
+            page += 1
+            meta: Dict[str, Any] = {}
+            records = []
+            async for record in stream_records(
+                client, path, resource, per_page=per_page, max_pages=1, meta=meta, start_page=page
+            ):
+                if filters and not matches(record, filters):
+                    continue
+                records.append(project(record, fields) if fields else record)
+            header = fmt == "csv" and not state["header"] and bool(records)
+            if records:
+                writer.write_page(records, header=header)
+                state["header"] = True
+            written += len(records)
+            state.update(page=page, pages=int(meta.get("pages") or 1), records=state["records"] + len(records),
+                         bytes=raw.tell())
+            _save_checkpoint(output, state)
+            if on_page:
+                on_page(state)
+    finally:
+        raw.close()
+    elapsed = time.perf_counter() - start
+    os.unlink(checkpoint_path(output))
+    return {
+        "resource": resource,
+        "output": os.path.abspath(output),
+        "format": fmt,
+        "compressed": compress,
+        "pages": state["pages"],
+        "records": state["records"],
+        "records_this_run": written,
+        "resumed_from_page": resumed_from,
+        "bytes_written": state["bytes"],
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(written / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def _client_from_env() -> Tuple[httpx.AsyncClient, str]:
+    """Authenticate like the servers: an API token, else the shared OAuth token."""
+    base_url = os.getenv("FRESHBOOKS_BASE_URL", "https://api.freshbooks.com")
+    if os.getenv("FRESHBOOKS_API_TOKEN") and os.getenv("FRESHBOOKS_BUSINESS_ID"):
+        token, account_id = os.getenv("FRESHBOOKS_API_TOKEN"), os.getenv("FRESHBOOKS_BUSINESS_ID")
+    else:
+        from freshbooks_mcp.simple_oauth_server import FreshBooksOAuthClient
+        from freshbooks_mcp.token_store import TokenStore
+
+        store = TokenStore(os.path.expanduser("~/.freshbooks_token"))
+        oauth = FreshBooksOAuthClient(os.getenv("FRESHBOOKS_CLIENT_ID", ""), os.getenv("FRESHBOOKS_CLIENT_SECRET", ""))
+        try:
+            token_data = await store.get_valid_token(oauth.refresh_access_token)
+        finally:
+            await oauth.close()
+        if not token_data or not token_data.get("account_id"):
+            raise SystemExit("Set FRESHBOOKS_API_TOKEN and FRESHBOOKS_BUSINESS_ID, or authenticate the OAuth server first")
+        token, account_id = token_data["access_token"], token_data["account_id"]
+    client = httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"}, timeout=60.0)
+    return client, account_id
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="freshbooks-mcp export", description="Export a FreshBooks resource to a file")
+    parser.add_argument("resource", choices=list(RESOURCE_PATHS))
+    parser.add_argument("output", help="Output file; .csv selects CSV, a .gz suffix compresses")
+    parser.add_argument("--format", choices=FORMATS, help="Override the format inferred from the file name")
+    parser.add_argument("--fields", help="Comma-separated fields to keep per record")
+    parser.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE", help="Equality filter (repeatable)")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--force", action="store_true", help="Replace an existing output file")
+    parser.add_argument("--quiet", action="store_true", help="Do not report progress per page")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    args = _parse_args(argv)
+    filters = dict(item.split("=", 1) for item in args.filter) or None
+    fields = args.fields.split(",") if args.fields else None
+
+    def report(state: Dict[str, Any]):
+        print(f"page {state['page']}/{state['pages']}: {state['records']} records, {state['bytes']} bytes", file=sys.stderr)
+
+    client, account_id = await _client_from_env()
+    try:
+        result = await export_resource(
+            client, account_id, args.resource, args.output, fmt=args.format, fields=fields, filters=filters,
+            resume=not args.no_resume, on_page=None if args.quiet else report, overwrite=args.force,
+        )
+    finally:
+        await client.aclose()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,316 @@
+"""Extract create-tool arguments from natural-language requests.
+
+``extract_arguments("create_invoice", "invoice Acme for 3 hours of design at
+$120/hr, due in 30 days")`` returns the tool arguments it could recognise
+plus the required ones it could not, so a caller can fill the gaps with one
+follow-up question instead of re-prompting for everything. All patterns are
+compiled at import time; client names are resolved to ids through a
+``ClientIndex`` when one is given.
+"""
+
+import datetime
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from freshbooks_mcp.search import SEARCH_FIELDS, ClientIndex, words
+
+DEFAULT_CURRENCY = os.getenv("FRESHBOOKS_CURRENCY", "USD")
+
+REQUIRED = {
+    "create_client": ["first_name", "last_name"],
+    "create_invoice": ["client_id", "lines"],
+    "create_project": ["name", "client_id"],
+}
+
+_MONTHS = {
+    name: i + 1
+    for i, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",),
+        ("jun", "june"), ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"),
+        ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ])
+    for name in names
+}
+_MONTH = r"(?:" + "|".join(sorted(_MONTHS, key=len, reverse=True)) + r")\.?"
+_SYMBOLS = {"$": None, "€": "EUR", "£": "GBP"}
+_CODES = r"usd|cad|eur|gbp|aud|nzd|dollars?|euros?|pounds?"
+_CODE_ALIASES = {"dollar": None, "dollars": None, "euro": "EUR", "euros": "EUR", "pound": "GBP", "pounds": "GBP"}
+
+AMOUNT = r"(?P<sym>[$€£])\s?(?P<num>\d[\d,]*(?:\.\d{1,2})?)(?:\s?(?P<code>" + _CODES + r")\b)?" \
+         r"|(?P<num2>\d[\d,]*(?:\.\d{1,2})?)\s?(?P<code2>" + _CODES + r")\b"
+DATE = (
+    r"(?P<iso>\d{4}-\d{2}-\d{2})"
+    r"|(?P<us>\d{1,2}/\d{1,2}/\d{4})"
+    r"|(?P<mdy>" + _MONTH + r"\s+\d{1,2}(?:st|nd|rd|th)?(?:,?\s+\d{4})?)"
+    r"|(?P<dmy>\d{1,2}(?:st|nd|rd|th)?\s+" + _MONTH + r"(?:,?\s+\d{4})?)"
+    r"|(?P<rel>today|tomorrow)"
+    r"|in\s+(?P<days>\d+)\s+days?"
+)
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<![\w.])\+?\d[\d\s().-]{5,}\d(?![\w.])")
+_DUE = re.compile(r"\b(?:due(?:\s+(?:on|by|date))?|payable\s+by)\s+(?:" + DATE + r")|\bnet\s?(?P<net>\d+)\b", re.I)
+_DATED = re.compile(r"\b(?:dated|date|issued(?:\s+on)?)\s+(?:" + DATE + r")", re.I)
+_NOTES = re.compile(r"\bnotes?\s*[:=]?\s*(?:\"(?P<quoted>[^\"]*)\"|'(?P<single>[^']*)'|(?P<rest>.+)$)", re.I)
+_QUOTED = re.compile(r"\"([^\"]+)\"|'([^']+)'")
+_CLIENT_ID = re.compile(r"\bclient(?:[\s_-]?id)?\s*(?:#|no\.?|number)?\s*(?P<id>\d+)\b", re.I)
+_CLIENT_NAME = re.compile(
+    r"\b(?:for|to|bill|invoice)\s+(?:(?:for|to)\s+)?(?:client\s+|customer\s+)?(?P<name>[A-Za-z][\w&'.-]*(?:\s+[A-Za-z][\w&'.-]*){0,4})",
+    re.I,
+)
+_NEW_CLIENT = re.compile(
+    r"\b(?:client|customer|contact)\s+(?:named\s+|called\s+)?(?P<first>[A-Za-z][\w'-]*)\s+(?P<last>[A-Za-z][\w'-]*)",
+    re.I,
+)
+_NAMED = re.compile(r"\b(?:named|called)\s+(?P<first>[A-Za-z][\w'-]*)\s+(?P<last>[A-Za-z][\w'-]*)", re.I)
+_PROJECT_NAME = re.compile(r"\bproject\s+(?:named\s+|called\s+)?(?P<name>.+?)(?=\s+(?:for|with|at|billed|rate|description)\b|[,;]|$)", re.I)
+_RATE = re.compile(r"\b(?:at|rate(?:\s+of)?|@)\s*(?:" + AMOUNT + r"|(?P<bare>\d+(?:\.\d{1,2})?))\s*(?:/|per\s+)?\s*(?:h|hr|hour)?", re.I)
+_BILL_METHOD = re.compile(r"\b(project|task|staff|service|business)[\s_-]rate\b", re.I)
+_DESCRIPTION = re.compile(r"\bdescri(?:ption|bed\s+as)\s*[:=]?\s*(?:\"(?P<quoted>[^\"]*)\"|(?P<rest>[^,;]+))", re.I)
+_ADDRESS = re.compile(
+    r"\b(?:address|at|lives\s+at)\s+(?P<street>\d+\s+[\w\s.'-]+?(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|way|court|ct)\.?)(?=[,;\s]|$)",
+    re.I,
+)
+_CITY = re.compile(r"\b(?:in|city)\s+(?P<city>[A-Z][a-zA-Z.'-]*(?:\s+[A-Z][a-zA-Z.'-]*){0,2})")
+_POSTAL = re.compile(r"\b(?:zip|postal(?:\s+code)?|postcode)\s*[:=]?\s*(?P<code>[A-Za-z0-9][A-Za-z0-9 -]{2,8}[A-Za-z0-9])\b", re.I)
+
+# Filler before the first line item ("freshbooks create invoice ...")
+_LEAD = re.compile(r"^.*?\b(?:invoice|bill)\b\s*", re.I)
+# Line items are separated by commas (not thousands separators), ";", "and", "plus"
+_SEGMENT = re.compile(r"\s*(?:,(?!\d)|;|\band\b|\bplus\b|\+)\s*", re.I)
+_FILLER = re.compile(r"^(?:(?:freshbooks|create|add|new|an?|the|invoice|for|bill|client|customer|with)\b\s*)+", re.I)
+# One invoice line: "3 hours of design at $120/hr", "2 x widgets @ €40 each", "consulting $1,500", "$500 for setup"
+_LINE = re.compile(
+    r"^(?:(?P<qty>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)\s*(?:x\b|hours?\b|hrs?\b|h\b|units?\b|items?\b|days?\b)?\s*(?:of\s+)?)?"
+    r"(?P<desc>.*?)\s*(?:\bat\b|@|\bfor\b|:|-)?\s*(?:" + AMOUNT.replace("?P<", "?P<l") + r")"
+    r"(?:\s*(?:/|\bper\b|\ban?\b)\s*(?:h|hr|hour|unit|item|day)s?\b)?(?:\s*each)?$"
+    r"|^(?:" + AMOUNT.replace("?P<", "?P<m") + r")\s+(?:for|of)\s+(?P<desc2>.+)$",
+    re.I,
+)
+_CLIENT_STOP = re.compile(
+    r"\s+(?:for|at|with|due|dated|on|and|notes?|email|phone|fixed|flat|billed|rate|hourly|description|project|\d).*$",
+    re.I,
+)
+
+
+def _money(match: "re.Match", prefix: str = "") -> Tuple[str, str]:
+    group = match.groupdict()
+    number = group.get(prefix + "num") or group.get(prefix + "num2")
+    code = group.get(prefix + "code") or group.get(prefix + "code2")
+    symbol = group.get(prefix + "sym")
+    currency = None
+    if code:
+        currency = _CODE_ALIASES.get(code.lower(), code.upper())
+    if currency is None and symbol:
+        currency = _SYMBOLS.get(symbol)
+    return f"{float(number.replace(',', '')):.2f}", currency or DEFAULT_CURRENCY
+
+
+def _date(match: "re.Match", today: datetime.date, after: Optional[datetime.date] = None) -> Optional[str]:
+    """The date ``match`` names; a month and day without a year before ``after`` is taken as next year's."""
+    group = match.groupdict()
+    try:
+        if group.get("iso"):
+            return datetime.date.fromisoformat(group["iso"]).isoformat()
+        if group.get("us"):
+            month, day, year = (int(part) for part in group["us"].split("/"))
+            return datetime.date(year, month, day).isoformat()
+        text = group.get("mdy") or group.get("dmy")
+        if text:
+            parts = re.findall(r"[a-z]+|\d+", text.lower())
+            month = next(_MONTHS[p] for p in parts if p in _MONTHS)
+            numbers = [int(p) for p in parts if p.isdigit()]
+            if len(numbers) > 1:
+                return datetime.date(numbers[1], month, numbers[0]).isoformat()
+            date = datetime.date(today.year, month, numbers[0])
+            if after is not None and date < after:
+                date = datetime.date(after.year + (date.replace(year=after.year) < after), month, numbers[0])
+            return date.isoformat()
+        if group.get("rel"):
+            offset = 1 if group["rel"].lower() == "tomorrow" else 0
+            return (today + datetime.timedelta(days=offset)).isoformat()
+        if group.get("days"):
+            return (today + datetime.timedelta(days=int(group["days"]))).isoformat()
+    except ValueError:
+        return None
+    return None
+
+
+_WHOLE_DATE = re.compile(r"^\s*(?:" + DATE + r")\s*$", re.I)
+
+
+def parse_date(text: str, today: Optional[datetime.date] = None, after: Optional[datetime.date] = None) -> Optional[str]:
+    """Parse a whole string in any form ``DATE`` accepts to ``YYYY-MM-DD``, or None.
+
+    A month and day without a year falls in ``today``'s year, or in the
+    next year that puts it on or after ``after`` when given.
+    """
+    match = _WHOLE_DATE.match(text)
+    return _date(match, today or datetime.date.today(), after) if match else None
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip(" ,;:.-")
+
+
+def _cut(text: str, start: int, end: int) -> str:
+    return text[:start] + " , " + text[end:]
+
+
+def _names_client(name: str, candidate: Dict[str, Any]) -> bool:
+    """True if every word of ``name`` is a word of the client, or the start of one."""
+    client_words = words(" ".join(str(candidate.get(field) or "") for field in SEARCH_FIELDS))
+    return all(any(word.startswith(query) for word in client_words) for query in words(name))
+
+
+def _resolve_client(text: str, client_index: Optional[ClientIndex], result: Dict[str, Any]) -> str:
+    """Set ``client_id`` from an id or client name in ``text``; return the rest of ``text``."""
+    match = _CLIENT_ID.search(text)
+    if match:
+        result["arguments"]["client_id"] = int(match.group("id"))
+        return _cut(text, match.start(), match.end())
+    match = _CLIENT_NAME.search(text)
+    if not match:
+        return text
+    raw = _CLIENT_STOP.sub("", match.group("name"))
+    name = _clean(raw)
+    if not name or name.lower() in ("client", "customer", "the", "a", "an"):
+        return text
+    result["client_name"] = name
+    if client_index is not None:
+        candidates = client_index.search(name, limit=3)
+        # A partial or misspelt match is offered, never picked: the create would go to the wrong client
+        if candidates and (len(candidates) == 1 or candidates[0]["score"] > candidates[1]["score"]) \
+                and _names_client(name, candidates[0]):
+            result["arguments"]["client_id"] = candidates[0]["id"]
+        elif candidates:
+            result["client_candidates"] = candidates
+    return _cut(text, match.start("name"), match.start("name") + len(raw))
+
+
+def _invoice_lines(text: str) -> List[Dict[str, Any]]:
+    lines = []
+    for segment in _SEGMENT.split(_LEAD.sub("", text)):
+        match = _LINE.match(_FILLER.sub("", segment.strip(" :-")))
+        if not match:
+            continue
+        if match.group("lnum") or match.group("lnum2"):
+            description = match.group("desc")
+            quantity = float((match.group("qty") or "1").replace(",", ""))
+            amount, currency = _money(match, "l")
+        else:
+            description = match.group("desc2")
+            quantity = 1.0
+            amount, currency = _money(match, "m")
+        lines.append({
+            "name": _clean(description) or "Services",
+            "qty": int(quantity) if quantity.is_integer() else quantity,
+            "unit_cost": {"amount": amount, "code": currency},
+        })
+    return lines
+
+
+def _extract_client(text: str, result: Dict[str, Any]):
+    args = result["arguments"]
+    match = _NAMED.search(text) or _NEW_CLIENT.search(text)
+    if match:
+        for key, group in (("first_name", "first"), ("last_name", "last")):
+            value = match.group(group)
+            args[key] = value.capitalize() if value.islower() else value
+    email = _EMAIL.search(text)
+    if email:
+        args["email"] = email.group(0)
+    phone = _PHONE.search(_EMAIL.sub(" ", text))
+    if phone:
+        args["phone"] = _clean(phone.group(0))
+    address = _ADDRESS.search(text)
+    if address:
+        args["address"] = _clean(address.group("street"))
+    city = _CITY.search(text)
+    if city:
+        args["city"] = city.group("city")
+    postal = _POSTAL.search(text)
+    if postal:
+        args["postal_code"] = postal.group("code").upper()
+
+
+def _extract_invoice(text: str, client_index: Optional[ClientIndex], today: datetime.date, result: Dict[str, Any]):
+    args = result["arguments"]
+    body = text
+    notes = _NOTES.search(body)
+    if notes:
+        args["notes"] = _clean(notes.group("quoted") or notes.group("single") or notes.group("rest"))
+        body = body[:notes.start()]
+    dated = _DATED.search(body)
+    issued = _date(dated, today) if dated else None
+    if issued:
+        args["date"] = issued
+    if dated:
+        body = _cut(body, dated.start(), dated.end())
+    due = _DUE.search(body)
+    if due:
+        start = datetime.date.fromisoformat(issued) if issued else today
+        if due.group("net"):
+            due_date = (start + datetime.timedelta(days=int(due.group("net")))).isoformat()
+        else:
+            # "due March 5" in October means next March, never before the invoice date
+            due_date = _date(due, today, after=start)
+        if due_date:
+            args["due_date"] = due_date
+        body = _cut(body, due.start(), due.end())
+    body = _resolve_client(body, client_index, result)
+    lines = _invoice_lines(body)
+    if lines:
+        args["lines"] = lines
+
+
+def _extract_project(text: str, client_index: Optional[ClientIndex], result: Dict[str, Any]):
+    args = result["arguments"]
+    body = text
+    match = _QUOTED.search(body)
+    if match:
+        args["name"] = match.group(1) or match.group(2)
+        body = _cut(body, match.start(), match.end())
+    else:
+        match = _PROJECT_NAME.search(body)
+        if match and _clean(match.group("name")):
+            args["name"] = _clean(match.group("name"))
+            body = _cut(body, match.start("name"), match.end("name"))
+    description = _DESCRIPTION.search(body)
+    if description:
+        args["description"] = _clean(description.group("quoted") or description.group("rest"))
+        body = _cut(body, description.start(), description.end())
+    method = _BILL_METHOD.search(body)
+    if method:
+        args["bill_method"] = f"{method.group(1).lower()}_rate"
+    rate = _RATE.search(body)
+    if rate:
+        args["rate"] = float(rate.group("bare") or _money(rate)[0])
+    _resolve_client(body, client_index, result)
+
+
+def extract_arguments(
+    tool_name: str,
+    text: str,
+    client_index: Optional[ClientIndex] = None,
+    today: Optional[datetime.date] = None,
+) -> Dict[str, Any]:
+    """Extract arguments for ``tool_name`` from ``text``.
+
+    Returns ``{"tool_name", "arguments", "missing"}`` plus ``client_name``
+    and ``client_candidates`` when a client name was found but not resolved
+    to a single id.
+    """
+    if tool_name not in REQUIRED:
+        raise ValueError(f"No extractor for tool: {tool_name}")
+    today = today or datetime.date.today()
+    result: Dict[str, Any] = {"tool_name": tool_name, "arguments": {}}
+    if tool_name == "create_client":
+        _extract_client(text, result)
+    elif tool_name == "create_invoice":
+        _extract_invoice(text, client_index, today, result)
+    else:
+        _extract_project(text, client_index, result)
+    result["missing"] = [field for field in REQUIRED[tool_name] if field not in result["arguments"]]
+    return result
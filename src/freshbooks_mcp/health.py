@@ -0,0 +1,125 @@
+"""Upstream health tracking for degraded reads.
+
+``CircuitBreaker`` counts consecutive upstream failures (transport errors,
+timeouts and 5xx responses). Once ``failure_threshold`` is reached it opens:
+reads stop calling the API and answer from cached or mirrored data, marked
+``stale``. While open, a background task probes the API every
+``probe_interval`` seconds and closes the breaker on the first healthy reply.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from freshbooks_mcp.deadlines import detached, expired
+
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("FRESHBOOKS_BREAKER_FAILURES", "3"))
+DEFAULT_PROBE_INTERVAL = float(os.getenv("FRESHBOOKS_BREAKER_PROBE_INTERVAL", "15"))
+# How long a read waits on the API before answering from cached data instead
+DEFAULT_STALE_AFTER = float(os.getenv("FRESHBOOKS_STALE_AFTER", "5"))
+# Largest list answer kept in memory as a fallback; bigger ones rely on the snapshot
+LAST_GOOD_MAX_RECORDS = int(os.getenv("FRESHBOOKS_LAST_GOOD_MAX_RECORDS", "1000"))
+
+Probe = Callable[[], Awaitable[bool]]
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """True for errors that say the API is down or overloaded, not that the request was wrong."""
+    if isinstance(error, httpx.TimeoutException) and expired():
+        # Cut short by the tool call's own deadline
+        return False
+    if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return False
+
+
+def describe(error: BaseException) -> str:
+    """Short description of an upstream failure."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError)):
+        return "timeout"
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def as_of(timestamp: float) -> str:
+    """Render a cache timestamp for ``as_of`` annotations."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def stale_result(result: Dict[str, Any], stored_at: float, reason: str) -> Dict[str, Any]:
+    """Copy ``result`` with staleness metadata added."""
+    annotated = dict(result)
+    annotated.update({"stale": True, "as_of": as_of(stored_at), "degraded_reason": reason})
+    return annotated
+
+
+async def probe_get(client: httpx.AsyncClient, path: str, timeout: float = DEFAULT_STALE_AFTER) -> bool:
+    """Probe by GET: any reply below 500 means the API is back."""
+    try:
+        response = await client.get(path, timeout=timeout)
+    except httpx.TransportError:
+        return False
+    return response.status_code < 500
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with background recovery probes."""
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+    ):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, error: BaseException, probe: Optional[Probe] = None):
+        """Count a failure; open the breaker and start probing at the threshold."""
+        self.failures += 1
+        self.last_error = describe(error)
+        if self.failures >= self.failure_threshold and not self.is_open:
+            self.opened_at = time.time()
+            if probe is not None and (self._probe_task is None or self._probe_task.done()):
+                self._probe_task = detached(self._probe(probe))
+
+    async def _probe(self, probe: Probe):
+        while self.is_open:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                healthy = await probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                self.record_success()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": "open" if self.is_open else "closed",
+            "consecutive_failures": self.failures,
+            "opened_at": as_of(self.opened_at) if self.opened_at else None,
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        """Stop probing."""
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
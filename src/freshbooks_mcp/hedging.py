@@ -0,0 +1,156 @@
+"""Hedged reads.
+
+A GET that has not answered within its endpoint's recent p95 latency is sent
+a second time, and whichever response arrives first is used; the other
+request is cancelled. Hedges are paid for from a budget that grows by
+``FRESHBOOKS_HEDGE_BUDGET`` per GET (0.05 allows at most 5% extra requests),
+so a slow API is not met with twice the load. Hedging is off while the
+budget is 0, which is the default. Behind a ``LimitedTransport`` a hedge is
+only sent when a slot is free, so hedges never queue behind real requests.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from freshbooks_mcp.limits import LimitedTransport, endpoint_key
+
+DEFAULT_HEDGE_BUDGET = float(os.getenv("FRESHBOOKS_HEDGE_BUDGET", "0"))
+# Unused budget is capped, so a quiet spell cannot fund a burst of hedges
+MAX_SAVED_HEDGES = 10
+# Latencies kept per endpoint, and how many are needed before hedging it
+LATENCY_SAMPLES = 500
+MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.95
+
+
+class _Latencies:
+    """Recent time-to-response of one endpoint's GETs."""
+
+    def __init__(self):
+        self._samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._cutoff: Optional[float] = None
+        self._since_sorted = 0
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+        self._since_sorted += 1
+
+    def cutoff(self) -> Optional[float]:
+        """The p95 latency, or None until there are enough samples."""
+        if len(self._samples) < MIN_SAMPLES:
+            return None
+        # Re-sorting on every request would cost more than the hedge saves
+        if self._cutoff is None or self._since_sorted >= MIN_SAMPLES:
+            ordered = sorted(self._samples)
+            self._cutoff = ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))]
+            self._since_sorted = 0
+        return self._cutoff
+
+
+async def _close(task: "asyncio.Task[httpx.Response]"):
+    if task.done() and not task.cancelled() and task.exception() is None:
+        await task.result().aclose()
+
+
+class HedgedTransport(httpx.AsyncBaseTransport):
+    """httpx transport that hedges slow GETs within a budget."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, budget: float = DEFAULT_HEDGE_BUDGET):
+        self._transport = transport
+        self.budget = budget
+        self._saved = 0.0
+        self._latencies: Dict[str, _Latencies] = {}
+        self.reads = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped = 0
+
+    def _can_hedge(self, request: httpx.Request) -> bool:
+        if self._saved < 1:
+            self.skipped += 1
+            return False
+        if isinstance(self._transport, LimitedTransport) and not self._transport.has_capacity(request):
+            self.skipped += 1
+            return False
+        self._saved -= 1
+        return True
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or self.budget <= 0:
+            return await self._transport.handle_async_request(request)
+        self.reads += 1
+        self._saved = min(MAX_SAVED_HEDGES, self._saved + self.budget)
+        latencies = self._latencies.setdefault(endpoint_key(request), _Latencies())
+        cutoff = latencies.cutoff()
+        start = time.monotonic()
+        if cutoff is None:
+            response = await self._transport.handle_async_request(request)
+            latencies.add(time.monotonic() - start)
+            return response
+
+        primary = asyncio.ensure_future(self._transport.handle_async_request(request))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=cutoff)
+            if done or not self._can_hedge(request):
+                response = await primary
+                latencies.add(time.monotonic() - start)
+                return response
+        except BaseException:
+            primary.cancel()
+            raise
+        self.hedged += 1
+        copy = httpx.Request(request.method, request.url, headers=request.headers, extensions=request.extensions)
+        hedge = asyncio.ensure_future(self._transport.handle_async_request(copy))
+        winner = await self._first(primary, hedge)
+        # A primary that lost was at least this slow
+        latencies.add(time.monotonic() - start)
+        if winner is hedge:
+            self.hedge_wins += 1
+        return winner.result()
+
+    async def _first(self, primary: "asyncio.Task[httpx.Response]", hedge: "asyncio.Task[httpx.Response]") -> "asyncio.Task[httpx.Response]":
+        """The first of the two to answer; the other is cancelled and closed."""
+        pending = {primary, hedge}
+        winner = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary if both answered at once
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None:
+                        winner = task
+                        break
+        finally:
+            for task in (primary, hedge):
+                if task is not winner:
+                    task.cancel()
+            await asyncio.gather(primary, hedge, return_exceptions=True)
+            for task in (primary, hedge):
+                if task is not winner:
+                    await _close(task)
+        if winner is None:
+            # Both failed; report the request the caller made
+            return primary
+        return winner
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "reads": self.reads,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "skipped": self.skipped,
+            "cutoffs_ms": {
+                key: round(1000 * cutoff, 2)
+                for key, cutoff in sorted((key, latencies.cutoff()) for key, latencies in self._latencies.items())
+                if cutoff is not None
+            },
+        }
@@ -0,0 +1,91 @@
+"""HTTP transports for the MCP SDK based servers.
+
+A single long-lived process serves many MCP clients over streamable HTTP
+(``/mcp``) and the legacy SSE transport (``/sse`` + ``/messages/``). All
+sessions share the server instance, so they also share its FreshBooks HTTP
+connection pool and token state.
+"""
+
+import contextlib
+import socket
+from typing import List, Optional
+
+import uvicorn
+from mcp.server import Server
+from mcp.server.models import InitializationOptions
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from starlette.types import Receive, Scope, Send
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+
+class _StreamableHTTPApp:
+    """ASGI adapter routing requests into the session manager."""
+
+    def __init__(self, session_manager: StreamableHTTPSessionManager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+def build_http_app(
+    server: Server,
+    initialization_options: InitializationOptions,
+    stateless: bool = False,
+    json_response: bool = False,
+) -> Starlette:
+    """Build an ASGI app exposing ``server`` over streamable HTTP and SSE.
+
+    With ``stateless=True`` no per-session state is kept between requests,
+    which lets several worker processes share one listening port. The SSE
+    transport is stateful by design and is only mounted in stateful mode.
+    """
+    session_manager = StreamableHTTPSessionManager(
+        app=server,
+        json_response=json_response,
+        stateless=stateless,
+    )
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request: Request) -> Response:
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, initialization_options)
+        return Response()
+
+    async def handle_health(request: Request) -> Response:
+        return JSONResponse({"status": "ok"})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with session_manager.run():
+            yield
+
+    routes = [
+        Route("/mcp", endpoint=_StreamableHTTPApp(session_manager), methods=["GET", "POST", "DELETE"]),
+        Route("/health", endpoint=handle_health, methods=["GET"]),
+    ]
+    if not stateless:
+        # SSE streams and their message posts must reach the same process
+        routes += [
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+        ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+async def serve_http(
+    app: Starlette,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    sockets: Optional[List[socket.socket]] = None,
+):
+    """Serve ``app`` with uvicorn until cancelled."""
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+    await uvicorn.Server(config).serve(sockets=sockets)
@@ -0,0 +1,162 @@
+"""Duplicate-create suppression.
+
+A create payload is reduced to a fingerprint of the fields that identify the
+record (client, lines and date of an invoice; name and email of a client;
+name and client of a project), normalized so that ``"2"`` and ``2.0``
+quantities or differently cased emails agree. ``FingerprintStore`` keeps the
+fingerprints of recent creates with the ids they produced in a small file in
+the state directory, bounded in age and count, so a retried create can be
+answered with the record the first attempt made. Updates hold an ``flock``
+on a sidecar lock file, so server processes sharing the file do not
+overwrite each other's fingerprints.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, Optional
+
+from freshbooks_mcp.paths import state_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# How long a create suppresses an identical one, and how many creates are remembered
+DEFAULT_WINDOW = float(os.getenv("FRESHBOOKS_DEDUPE_WINDOW", "86400"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("FRESHBOOKS_DEDUPE_MAX_ENTRIES", "1000"))
+
+
+def _text(value: Any) -> str:
+    return " ".join(str(value).split()).casefold() if value is not None else ""
+
+
+def _number(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get("amount")
+    try:
+        return str(Decimal(str(value)).normalize())
+    except (InvalidOperation, ValueError):
+        return _text(value)
+
+
+def _line(line: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "name": _text(line.get("name")),
+        "description": _text(line.get("description")),
+        "qty": _number(line.get("qty", 1)),
+        "unit_cost": _number(line.get("unit_cost", line.get("amount"))),
+    }
+
+
+def canonical(tool: str, account_id: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The identifying fields of a create payload, or None if ``tool`` is not deduplicated."""
+    if tool == "create_invoice":
+        fields = {
+            "client_id": _number(payload.get("client_id")),
+            "lines": [_line(line) for line in payload.get("lines") or () if isinstance(line, dict)],
+            "date": _text(payload.get("date")),
+        }
+    elif tool == "create_client":
+        fields = {
+            "first_name": _text(payload.get("first_name")),
+            "last_name": _text(payload.get("last_name")),
+            "email": _text(payload.get("email")),
+        }
+    elif tool == "create_project":
+        fields = {"name": _text(payload.get("name")), "client_id": _number(payload.get("client_id"))}
+    elif tool == "invoice_time_entries":
+        # An invoice for time is the same invoice whatever its date or rounding
+        fields = {
+            "client_id": _number(payload.get("client_id")),
+            "time_entry_ids": sorted(int(entry_id) for entry_id in payload.get("time_entry_ids") or ()),
+        }
+    else:
+        return None
+    return {"tool": tool, "account_id": str(account_id), **fields}
+
+
+def fingerprint(tool: str, account_id: str, payload: Dict[str, Any]) -> Optional[str]:
+    """Stable hash of ``canonical(tool, account_id, payload)``."""
+    fields = canonical(tool, account_id, payload)
+    if fields is None:
+        return None
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class FingerprintStore:
+    """Recent create fingerprints and the ids they created, shared through a file."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        window: float = DEFAULT_WINDOW,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path or state_path("create-fingerprints.json")
+        self.lock_path = self.path + ".lock"
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Unexpired entries, oldest first."""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        cutoff = time.time() - self.window
+        return {key: entry for key, entry in entries.items() if entry.get("at", 0) >= cutoff}
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".create-fingerprints-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the store against other threads and processes."""
+        with self._lock:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # Closing the descriptor releases the flock
+                os.close(fd)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The entry for fingerprint ``key`` (``id``, ``resource``, ``at``), if still in the window."""
+        return self.load().get(key)
+
+    def add(self, key: str, resource: str, record_id: Any):
+        """Remember that fingerprint ``key`` created ``record_id``, evicting the oldest entries past the bound."""
+        with self._locked():
+            entries = self.load()
+            entries.pop(key, None)
+            entries[key] = {"resource": resource, "id": record_id, "at": time.time()}
+            for stale in list(entries)[: max(0, len(entries) - self.max_entries)]:
+                del entries[stale]
+            self._save(entries)
+
+    def discard(self, key: str):
+        """Forget ``key``, e.g. once the record it points at has been deleted."""
+        with self._locked():
+            entries = self.load()
+            if entries.pop(key, None) is not None:
+                self._save(entries)
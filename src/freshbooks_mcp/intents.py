@@ -0,0 +1,141 @@
+"""Route natural-language requests to tools using the oi-manifest.json intents.
+
+Each manifest intent is a keyword phrase (``"freshbooks get clients"``) with
+a tool name and a priority. The phrases are compiled once into a word-level
+Aho-Corasick automaton, so resolving an utterance is a single pass over its
+words however many intents there are. When several phrases occur in the
+text the highest priority wins, then the longest phrase, then the earliest.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class Intent(NamedTuple):
+    keyword: str
+    tool_name: str
+    priority: int
+    words: int
+
+
+def _rank(intent: Intent) -> tuple:
+    return (intent.priority, intent.words)
+
+
+def manifest_path() -> str:
+    """Locate oi-manifest.json (``FRESHBOOKS_OI_MANIFEST`` overrides)."""
+    override = os.getenv("FRESHBOOKS_OI_MANIFEST")
+    if override:
+        return override
+    here = os.path.dirname(os.path.abspath(__file__))
+    packaged = os.path.join(here, "oi-manifest.json")
+    if os.path.exists(packaged):
+        return packaged
+    return os.path.join(os.path.dirname(os.path.dirname(here)), "oi-manifest.json")
+
+
+def load_manifest(path: Optional[str] = None) -> Dict[str, Any]:
+    """Read the OI manifest."""
+    with open(path or manifest_path(), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class IntentMatcher:
+    """Aho-Corasick automaton over the words of intent keywords."""
+
+    def __init__(self, intents: Iterable[Dict[str, Any]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        # Best intent ending at each state, following failure links
+        self._best: List[Optional[Intent]] = [None]
+        self.intents: Dict[str, Intent] = {}
+        for entry in intents:
+            words = _WORD.findall(entry["keyword"].lower())
+            if not words:
+                continue
+            keyword = " ".join(words)
+            intent = Intent(keyword, entry["tool_name"], int(entry.get("priority", 0)), len(words))
+            known = self.intents.get(keyword)
+            if known is None or intent.priority > known.priority:
+                self.intents[keyword] = intent
+        for intent in self.intents.values():
+            self._insert(intent)
+        self._link()
+        self._compile()
+
+    @classmethod
+    def from_manifest(cls, path: Optional[str] = None) -> "IntentMatcher":
+        return cls(load_manifest(path).get("intents", []))
+
+    def _insert(self, intent: Intent):
+        state = 0
+        for word in intent.keyword.split():
+            following = self._goto[state].get(word)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][word] = following
+                self._goto.append({})
+                self._best.append(None)
+            state = following
+        self._best[state] = intent
+
+    def _link(self):
+        self._fail = [0] * len(self._goto)
+        self._order = list(self._goto[0].values())
+        queue = deque(self._order)
+        while queue:
+            state = queue.popleft()
+            for word, following in self._goto[state].items():
+                queue.append(following)
+                self._order.append(following)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[following] = target if target != following else 0
+                inherited = self._best[self._fail[following]]
+                own = self._best[following]
+                if inherited is not None and (own is None or _rank(inherited) > _rank(own)):
+                    self._best[following] = inherited
+
+    def _compile(self):
+        # Fold the failure links into a full transition table so matching
+        # never backtracks; words outside every keyword reset to the root.
+        # Failure links point to shallower states, hence breadth-first order.
+        self._delta: List[Dict[str, int]] = [{} for _ in self._goto]
+        self._delta[0] = dict(self._goto[0])
+        for state in self._order:
+            row = dict(self._delta[self._fail[state]])
+            row.update(self._goto[state])
+            self._delta[state] = row
+
+    def resolve(self, text: str) -> Optional[Intent]:
+        """Return the winning intent found in ``text``, if any."""
+        delta, best_at = self._delta, self._best
+        state = 0
+        best: Optional[Intent] = None
+        for word in _WORD.findall(text.lower()):
+            state = delta[state].get(word, 0)
+            found = best_at[state]
+            if found is not None and found is not best and (best is None or _rank(found) > _rank(best)):
+                best = found
+        return best
+
+
+@lru_cache(maxsize=None)
+def default_matcher() -> IntentMatcher:
+    """The matcher for the installed manifest, compiled on first use."""
+    return IntentMatcher.from_manifest()
+
+
+def resolve_intent(text: str) -> Optional[Dict[str, Any]]:
+    """Map ``text`` to ``{"tool_name", "keyword", "priority"}`` or None."""
+    intent = default_matcher().resolve(text)
+    if intent is None:
+        return None
+    return {"tool_name": intent.tool_name, "keyword": intent.keyword, "priority": intent.priority}
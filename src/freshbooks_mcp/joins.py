@@ -0,0 +1,84 @@
+"""Related records for list tools (``include=["client", "project"]``).
+
+Each list resource names the foreign keys it can follow. Related records are
+looked up in id-keyed indexes built from cached or mirrored clients and
+projects. Only the ids missing from them are fetched upstream, in batched
+list calls, and each listed record gets a short summary of its client or
+project instead of the caller pulling whole lists to join them itself.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Resource -> include name -> (foreign key field, related resource)
+RELATIONS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "invoices": {"client": ("customerid", "clients")},
+    "projects": {"client": ("client_id", "clients")},
+    "expenses": {"client": ("clientid", "clients"), "project": ("projectid", "projects")},
+    "time_entries": {"client": ("client_id", "clients"), "project": ("project_id", "projects")},
+}
+
+# Fields of a related record attached to the records that reference it
+SUMMARY_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "clients": ("id", "organization", "fname", "lname", "email", "currency_code", "vis_state"),
+    "projects": ("id", "title", "client_id", "billing_method", "rate", "active", "complete"),
+}
+
+INCLUDES = sorted({name for relations in RELATIONS.values() for name in relations})
+
+
+def check_includes(resource: str, include: Iterable[str]) -> List[str]:
+    """Validate ``include`` for ``resource`` and return it without duplicates."""
+    names = list(dict.fromkeys(include))
+    relations = RELATIONS.get(resource, {})
+    unknown = [name for name in names if name not in relations]
+    if unknown:
+        supported = ", ".join(relations) or "nothing"
+        raise ValueError(f"{resource} cannot include {', '.join(unknown)} (supported: {supported})")
+    return names
+
+
+def key_fields(resource: str, include: Iterable[str]) -> List[str]:
+    """Fields a projection must keep for ``include`` to be resolved."""
+    return [RELATIONS[resource][name][0] for name in include]
+
+
+def _key(value: Any) -> Optional[int]:
+    try:
+        key = int(value)
+    except (TypeError, ValueError):
+        return None
+    return key if key > 0 else None
+
+
+def wanted_ids(resource: str, records: Iterable[Dict[str, Any]], include: Iterable[str]) -> Dict[str, Set[int]]:
+    """Related resource -> ids referenced by ``records``."""
+    relations = [RELATIONS[resource][name] for name in include]
+    wanted: Dict[str, Set[int]] = {related: set() for _, related in relations}
+    for record in records:
+        for field, related in relations:
+            key = _key(record.get(field))
+            if key is not None:
+                wanted[related].add(key)
+    return wanted
+
+
+def summary(resource: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: record[field] for field in SUMMARY_FIELDS[resource] if field in record}
+
+
+def attach(
+    resource: str,
+    records: Iterable[Dict[str, Any]],
+    include: Iterable[str],
+    found: Dict[str, Dict[int, Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Copies of ``records`` with each include set to the related summary (None if unknown)."""
+    relations = [(name, *RELATIONS[resource][name]) for name in include]
+    joined = []
+    for record in records:
+        record = dict(record)
+        for name, field, related in relations:
+            key = _key(record.get(field))
+            record[name] = found[related].get(key) if key is not None else None
+        joined.append(record)
+    return joined
@@ -0,0 +1,230 @@
+"""Client-side limits on upstream traffic.
+
+``RateLimiter`` is a token bucket: ``rate`` requests per second on average,
+with bursts of up to ``burst``. Callers ``await acquire()`` before each
+request and are released in FIFO order.
+
+``LimitedTransport`` caps how many requests an httpx client has open at once,
+both in total and per endpoint (method and path with ids left out). Requests
+over a cap wait in a bounded queue; once the queue is full, further requests
+fail at once with ``Overloaded`` instead of piling up, and the caller can
+retry after ``retry_after`` seconds. Each limiter keeps queue wait times for
+``stats()``.
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+import httpx
+
+# FreshBooks does not publish write limits; stay well below what it tolerates
+DEFAULT_WRITE_RATE = float(os.getenv("FRESHBOOKS_WRITE_RATE", "2"))
+DEFAULT_WRITE_BURST = int(os.getenv("FRESHBOOKS_WRITE_BURST", "5"))
+
+
+class RateLimiter:
+    """Token bucket shared by the coroutines of one process."""
+
+    def __init__(self, rate: float = DEFAULT_WRITE_RATE, burst: int = DEFAULT_WRITE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("FRESHBOOKS_MAX_CONCURRENCY", "16"))
+DEFAULT_ENDPOINT_CONCURRENCY = int(os.getenv("FRESHBOOKS_ENDPOINT_CONCURRENCY", "4"))
+# Requests allowed to wait for a slot before new ones are turned away
+DEFAULT_MAX_QUEUED = int(os.getenv("FRESHBOOKS_MAX_QUEUED", "32"))
+# Recent queue waits kept per limiter for percentiles
+WAIT_SAMPLES = 1000
+
+_ACCOUNT = re.compile(r"/(account|business)/[^/]+")
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+class Overloaded(Exception):
+    """Too many requests are already waiting; nothing was sent, so the call can be retried."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Too many requests waiting for {name}; retry in {retry_after:g}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+def endpoint_key(request: httpx.Request) -> str:
+    """``request``'s method and path with account, business and record ids replaced."""
+    path = _ACCOUNT.sub(lambda match: f"/{match.group(1)}/{{{match.group(1)}}}", request.url.path)
+    return f"{request.method} {_ID.sub('/{id}', path)}"
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders, at most ``max_queued`` waiters; any more are rejected."""
+
+    def __init__(self, name: str, limit: int, max_queued: int = DEFAULT_MAX_QUEUED):
+        self.name = name
+        self.limit = limit
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.queued = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.waited = 0.0
+        self.held = 0.0
+        self.released = 0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def busy(self) -> bool:
+        return self._semaphore.locked()
+
+    def _retry_after(self) -> float:
+        # Time for the queue ahead to drain at the average hold time so far
+        average = self.held / self.released if self.released else 1.0
+        return round(max(0.1, average * (self.queued + 1) / self.limit), 1)
+
+    async def acquire(self) -> float:
+        """Take a slot and return when it was taken, or raise ``Overloaded`` if the queue is full."""
+        if self._semaphore.locked() and self.queued >= self.max_queued:
+            self.rejected += 1
+            raise Overloaded(self.name, self._retry_after())
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        acquired_at = time.monotonic()
+        self._waits.append(acquired_at - start)
+        self.waited += acquired_at - start
+        self.acquired += 1
+        self.active += 1
+        return acquired_at
+
+    def release(self, acquired_at: float):
+        self.active -= 1
+        self.released += 1
+        self.held += time.monotonic() - acquired_at
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "wait_avg_ms": round(1000 * self.waited / self.acquired, 2) if self.acquired else 0.0,
+            "wait_p50_ms": round(1000 * _percentile(waits, 0.5), 2),
+            "wait_p95_ms": round(1000 * _percentile(waits, 0.95), 2),
+            "wait_max_ms": round(1000 * waits[-1], 2) if waits else 0.0,
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives its slots back once the response is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class LimitedTransport(httpx.AsyncBaseTransport):
+    """httpx transport with global and per-endpoint concurrency limits."""
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        endpoint_concurrency: int = DEFAULT_ENDPOINT_CONCURRENCY,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+    ):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self.endpoint_concurrency = endpoint_concurrency
+        self.max_queued = max_queued
+        self.total = ConcurrencyLimiter("all endpoints", max_concurrency, max_queued)
+        self.endpoints: Dict[str, ConcurrencyLimiter] = {}
+
+    def _endpoint(self, key: str) -> ConcurrencyLimiter:
+        limiter = self.endpoints.get(key)
+        if limiter is None:
+            limiter = self.endpoints[key] = ConcurrencyLimiter(key, self.endpoint_concurrency, self.max_queued)
+        return limiter
+
+    def has_capacity(self, request: httpx.Request) -> bool:
+        """True if ``request`` would be sent without waiting."""
+        endpoint = self.endpoints.get(endpoint_key(request))
+        return not self.total.busy and (endpoint is None or not endpoint.busy)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Wait for the endpoint first so queued requests do not hold global slots
+        endpoint = self._endpoint(endpoint_key(request))
+        endpoint_acquired = await endpoint.acquire()
+        try:
+            total_acquired = await self.total.acquire()
+        except BaseException:
+            endpoint.release(endpoint_acquired)
+            raise
+
+        def release():
+            self.total.release(total_acquired)
+            endpoint.release(endpoint_acquired)
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Concurrency and queue wait figures, overall and for each endpoint seen."""
+        return {
+            "total": self.total.stats(),
+            "endpoints": {key: limiter.stats() for key, limiter in sorted(self.endpoints.items())},
+        }
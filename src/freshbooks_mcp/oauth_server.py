@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """FreshBooks OAuth MCP Server implementation."""
 
+import argparse
 import asyncio
 import json
 import os
@@ -13,7 +14,7 @@ import threading
 import time
 
 import httpx
-from mcp.server import Server
+from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 from mcp.types import (
     CallToolRequest,
@@ -25,6 +26,10 @@ from mcp.types import (
 )
 from pydantic import BaseModel, Field
 
+from freshbooks_mcp.deadlines import clamp_timeout, with_deadline
+from freshbooks_mcp.hedging import HedgedTransport
+from freshbooks_mcp.limits import LimitedTransport
+
 
 class OAuthCallbackHandler(BaseHTTPRequestHandler):
     """HTTP handler for OAuth callback."""
@@ -82,6 +87,8 @@ class FreshBooksOAuthClient:
                 "Content-Type": "application/json",
             },
             timeout=30.0,
+            event_hooks={"request": [clamp_timeout]},
+            transport=HedgedTransport(LimitedTransport()),
         )
     
     async def start_oauth_flow(self) -> str:
@@ -285,17 +292,17 @@ class FreshBooksOAuthMCPServer:
             
             try:
                 if name == "get_identity":
-                    result = await self.freshbooks_client.get_identity()
+                    result = await with_deadline(name, self.freshbooks_client.get_identity())
                 elif name == "get_clients":
-                    result = await self.freshbooks_client.get_clients()
+                    result = await with_deadline(name, self.freshbooks_client.get_clients())
                 elif name == "get_invoices":
-                    result = await self.freshbooks_client.get_invoices()
+                    result = await with_deadline(name, self.freshbooks_client.get_invoices())
                 elif name == "get_projects":
-                    result = await self.freshbooks_client.get_projects()
+                    result = await with_deadline(name, self.freshbooks_client.get_projects())
                 elif name == "get_expenses":
-                    result = await self.freshbooks_client.get_expenses()
+                    result = await with_deadline(name, self.freshbooks_client.get_expenses())
                 elif name == "get_time_entries":
-                    result = await self.freshbooks_client.get_time_entries()
+                    result = await with_deadline(name, self.freshbooks_client.get_time_entries())
                 else:
                     return [TextContent(
                         type="text",
@@ -415,29 +422,66 @@ class FreshBooksOAuthMCPServer:
                 text=json.dumps({"error": str(e)}, indent=2)
             )]
     
+    def _initialization_options(self) -> InitializationOptions:
+        """Build the MCP initialization options."""
+        return InitializationOptions(
+            server_name="freshbooks-oauth-mcp",
+            server_version="0.1.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={}
+            )
+        )
+    
     async def run(self):
-        """Run the MCP server."""
+        """Run the MCP server over stdio."""
         from mcp.server.stdio import stdio_server
         
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(
                 read_stream,
                 write_stream,
-                InitializationOptions(
-                    server_name="freshbooks-oauth-mcp",
-                    server_version="0.1.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=None,
-                        experimental_capabilities={}
-                    )
-                )
+                self._initialization_options()
             )
+    
+    async def run_http(self, host: str = "127.0.0.1", port: int = 8000):
+        """Run the MCP server over streamable HTTP and SSE.
+        
+        Every connected session shares this instance's FreshBooks client.
+        """
+        from freshbooks_mcp.http_transport import build_http_app, serve_http
+        
+        app = build_http_app(self.server, self._initialization_options())
+        await serve_http(app, host, port)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="FreshBooks MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("FRESHBOOKS_MCP_TRANSPORT", "stdio"),
+        help="Serve over stdio (one client per process) or HTTP (many clients per process)",
+    )
+    parser.add_argument("--host", default=os.getenv("FRESHBOOKS_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FRESHBOOKS_MCP_PORT", "8000")))
+    return parser.parse_args(argv)
 
 
-async def main():
+async def main(argv: Optional[List[str]] = None):
     """Main entry point."""
+    args = _parse_args(argv)
     server = FreshBooksOAuthMCPServer()
-    await server.run()
+    if args.transport == "http":
+        await server.run_http(args.host, args.port)
+    else:
+        await server.run()
+
+
+def cli():
+    """Console script entry point."""
+    asyncio.run(main())
 
 
 if __name__ == "__main__":
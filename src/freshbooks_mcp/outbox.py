@@ -0,0 +1,303 @@
+"""Durable outbox for create operations.
+
+Queued creates are committed to a SQLite database (WAL mode, synchronous
+FULL) before they are acknowledged with a local id, then sent to FreshBooks
+by a drainer under a rate limiter. Items move through::
+
+    queued -> sending -> done
+                      -> queued (retry with backoff) -> ... -> failed
+
+A send whose outcome is unknown (a 5xx, timeout, dropped connection, or a
+process that died mid-send and left its claim to expire) is marked
+``uncertain``; only a 4xx answer says nothing was created.
+Before an uncertain item is sent again the drainer asks ``find_existing``
+whether the record already exists upstream, so a restart does not create it
+twice. Several processes may drain the same database; claims are atomic.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from freshbooks_mcp.health import describe, is_upstream_failure
+from freshbooks_mcp.limits import Overloaded, RateLimiter
+from freshbooks_mcp.paths import state_path
+
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("FRESHBOOKS_OUTBOX_MAX_ATTEMPTS", "8"))
+# Seconds a claimed item may stay in "sending" before another drainer takes it over
+CLAIM_LEASE = float(os.getenv("FRESHBOOKS_OUTBOX_LEASE", "120"))
+MAX_BACKOFF = 300.0
+# How long an idle drainer sleeps between polls for new or due items
+POLL_INTERVAL = 1.0
+
+STATUSES = ("queued", "sending", "done", "failed")
+
+Send = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+# (tool, payload, enqueue time) -> the record an earlier send created, if any
+FindExisting = Callable[[str, Dict[str, Any], float], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def outbox_path() -> str:
+    return state_path("outbox.sqlite3")
+
+
+def _created_id(result: Dict[str, Any]) -> Optional[Any]:
+    """Pull the new record's id out of a create response."""
+    found = result.get("response", {}).get("result", {}) or result
+    for value in found.values() if isinstance(found, dict) else ():
+        if isinstance(value, dict) and "id" in value:
+            return value["id"]
+    return found.get("id") if isinstance(found, dict) else None
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if isinstance(value, dict):
+        value = value.get("amount")
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def line_total(lines: List[Dict[str, Any]]) -> Optional[Decimal]:
+    """Sum of quantity times unit cost over invoice lines, or None if any line is unreadable."""
+    total = Decimal(0)
+    for line in lines or ():
+        qty = _decimal(line.get("qty", 1))
+        unit_cost = _decimal(line.get("unit_cost", line.get("amount")))
+        if qty is None or unit_cost is None:
+            return None
+        total += qty * unit_cost
+    return total
+
+
+def matches_payload(tool: str, record: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+    """Whether ``record`` looks like the result of sending create ``payload``."""
+    if record.get("vis_state") == 1:
+        return False
+    if tool == "create_client":
+        return (
+            record.get("fname") == payload.get("first_name")
+            and record.get("lname") == payload.get("last_name")
+            and (not payload.get("email") or record.get("email") == payload["email"])
+        )
+    if tool == "create_invoice":
+        if str(record.get("customerid")) != str(payload.get("client_id")):
+            return False
+        if payload.get("date") and record.get("create_date") != payload["date"]:
+            return False
+        if payload.get("notes") and record.get("notes") != payload["notes"]:
+            return False
+        expected = line_total(payload.get("lines"))
+        return expected is None or _decimal(record.get("amount")) == expected
+    if tool == "create_project":
+        return record.get("title") == payload.get("name") and str(record.get("client_id")) == str(payload.get("client_id"))
+    return False
+
+
+class Outbox:
+    """SQLite-backed queue of create requests."""
+
+    def __init__(self, path: Optional[str] = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path or outbox_path()
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "local_id TEXT PRIMARY KEY, account_id TEXT NOT NULL, tool TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, uncertain INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, claimed_at REAL, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "remote_id TEXT, result TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+
+    def enqueue(self, account_id: str, tool: str, payload: Dict[str, Any]) -> str:
+        """Durably queue a create and return its local id."""
+        local_id = f"ob_{uuid.uuid4().hex}"
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (local_id, account_id, tool, payload, status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (local_id, account_id, tool, json.dumps(payload), now, now, now),
+            )
+        self._wakeup.set()
+        return local_id
+
+    def claim(self, account_id: str) -> Optional[sqlite3.Row]:
+        """Atomically take the next due item, including expired claims of dead drainers."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM outbox WHERE account_id = ? AND ("
+                    "(status = 'queued' AND next_attempt_at <= ?) OR (status = 'sending' AND claimed_at < ?)) "
+                    "ORDER BY created_at LIMIT 1",
+                    (account_id, now, now - CLAIM_LEASE),
+                ).fetchone()
+                if row is not None:
+                    # A takeover does not know whether the previous send went through
+                    uncertain = 1 if row["status"] == "sending" else row["uncertain"]
+                    self._conn.execute(
+                        "UPDATE outbox SET status = 'sending', claimed_at = ?, updated_at = ?, uncertain = ? "
+                        "WHERE local_id = ?",
+                        (now, now, uncertain, row["local_id"]),
+                    )
+                    row = self._conn.execute("SELECT * FROM outbox WHERE local_id = ?", (row["local_id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _update(self, local_id: str, **values):
+        values["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        with self._lock:
+            self._conn.execute(f"UPDATE outbox SET {assignments} WHERE local_id = ?", (*values.values(), local_id))
+
+    def complete(self, local_id: str, attempts: int, result: Dict[str, Any], remote_id: Any):
+        remote_id = None if remote_id is None else str(remote_id)
+        self._update(local_id, status="done", attempts=attempts, result=json.dumps(result), remote_id=remote_id,
+                     error=None, claimed_at=None)
+
+    def retry(self, local_id: str, attempts: int, error: str, uncertain: bool):
+        """Put an item back with exponential backoff, or fail it after ``max_attempts``."""
+        if attempts >= self.max_attempts:
+            self._update(local_id, status="failed", attempts=attempts, error=error, claimed_at=None)
+            return
+        delay = min(MAX_BACKOFF, 2.0 ** attempts)
+        self._update(local_id, status="queued", attempts=attempts, error=error, uncertain=int(uncertain),
+                     next_attempt_at=time.time() + delay, claimed_at=None)
+
+    def fail(self, local_id: str, attempts: int, error: str):
+        self._update(local_id, status="failed", attempts=attempts, error=error, claimed_at=None)
+
+    @staticmethod
+    def describe_item(row: sqlite3.Row) -> Dict[str, Any]:
+        item = {
+            "local_id": row["local_id"],
+            "tool": row["tool"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        if row["status"] == "queued" and row["attempts"]:
+            item["next_attempt_in"] = round(max(0.0, row["next_attempt_at"] - time.time()), 1)
+        if row["remote_id"] is not None:
+            item["remote_id"] = row["remote_id"]
+        if row["result"] is not None:
+            item["result"] = json.loads(row["result"])
+        if row["error"]:
+            item["error"] = row["error"]
+        return item
+
+    def get(self, local_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM outbox WHERE local_id = ?", (local_id,)).fetchone()
+        return self.describe_item(row) if row is not None else None
+
+    def items(self, account_id: str, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent items first."""
+        query = "SELECT * FROM outbox WHERE account_id = ?"
+        params: List[Any] = [account_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self.describe_item(row) for row in rows]
+
+    def counts(self, account_id: str) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox WHERE account_id = ? GROUP BY status", (account_id,)
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def pending(self, account_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE account_id = ? AND status IN ('queued', 'sending') LIMIT 1", (account_id,)
+            ).fetchone()
+        return row is not None
+
+    async def drain(
+        self,
+        account_id: str,
+        send: Send,
+        find_existing: FindExisting,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        """Send queued items for ``account_id`` until cancelled."""
+        limiter = limiter or RateLimiter()
+        while True:
+            row = self.claim(account_id)
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._deliver(row, send, find_existing, limiter)
+
+    async def _deliver(self, row: sqlite3.Row, send: Send, find_existing: FindExisting, limiter: RateLimiter):
+        local_id, tool = row["local_id"], row["tool"]
+        payload = json.loads(row["payload"])
+        attempts = row["attempts"] + 1
+        if row["uncertain"]:
+            try:
+                existing = await find_existing(tool, payload, row["created_at"])
+            except Exception as e:
+                self.retry(local_id, attempts, f"could not check for an earlier send: {describe(e)}", uncertain=True)
+                return
+            if existing is not None:
+                self.complete(local_id, attempts, {"deduplicated": True, "record": existing}, existing.get("id"))
+                return
+        await limiter.acquire()
+        try:
+            result = await send(tool, payload)
+        except asyncio.CancelledError:
+            # Shutting down mid-send: hand the item straight back rather than leaving the claim to expire
+            self._update(local_id, status="queued", attempts=attempts, uncertain=1, claimed_at=None)
+            raise
+        except Exception as e:
+            if isinstance(e, Overloaded):
+                # Turned away locally before anything was sent
+                self.retry(local_id, attempts, describe(e), uncertain=bool(row["uncertain"]))
+            elif isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+                # Rejected before anything was created
+                self.retry(local_id, attempts, describe(e), uncertain=bool(row["uncertain"]))
+            elif is_upstream_failure(e):
+                # A 5xx, timeout or dropped connection may come after the record was made
+                self.retry(local_id, attempts, describe(e), uncertain=True)
+            elif isinstance(e, httpx.HTTPStatusError):
+                self.fail(local_id, attempts, f"{describe(e)}: {e.response.text[:500]}")
+            else:
+                self.fail(local_id, attempts, describe(e))
+            return
+        if "error" in result:
+            self.fail(local_id, attempts, str(result["error"]))
+            return
+        self.complete(local_id, attempts, result, _created_id(result))
+
+    def close(self):
+        self._conn.close()
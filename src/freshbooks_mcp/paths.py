@@ -0,0 +1,19 @@
+"""Filesystem locations for FreshBooks MCP server state."""
+
+import os
+
+
+def state_dir() -> str:
+    """Return the private state directory, creating it if needed.
+
+    Defaults to ``~/.freshbooks_mcp`` and can be overridden with the
+    ``FRESHBOOKS_MCP_STATE_DIR`` environment variable.
+    """
+    path = os.path.expanduser(os.getenv("FRESHBOOKS_MCP_STATE_DIR", "~/.freshbooks_mcp"))
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def state_path(*parts: str) -> str:
+    """Return a path inside the state directory."""
+    return os.path.join(state_dir(), *parts)
@@ -0,0 +1,91 @@
+"""MCP progress notifications for long tool calls.
+
+When a ``tools/call`` request carries ``_meta.progressToken``, the server
+handles it inside ``reporting``. Code deep in the call (page loops, bulk
+creates) then calls ``report(done, total, message)`` without knowing who is
+listening; outside a reporting call that is a no-op. Notifications are sent
+at most every ``FRESHBOOKS_PROGRESS_INTERVAL`` seconds (default 1), plus
+once when a step reaches its total.
+
+MCP requires progress to increase with every notification. A call can run
+several counted steps in turn (pages of time entries, then invoices
+created), so when a count starts over or its total changes it is added to
+where the previous one ended.
+"""
+
+import contextlib
+import contextvars
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+DEFAULT_INTERVAL = float(os.getenv("FRESHBOOKS_PROGRESS_INTERVAL", "1"))
+
+Send = Callable[[Dict[str, Any]], None]
+
+
+class Progress:
+    """Progress of one request, sent as ``notifications/progress``."""
+
+    def __init__(self, token: Any, send: Send, interval: float = DEFAULT_INTERVAL):
+        self.token = token
+        self.send = send
+        self.interval = interval
+        self.sent = 0
+        self._base = 0.0
+        self._last_done = 0.0
+        self._last_total: Optional[float] = None
+        self._progress = 0.0
+        self._sent_at = 0.0
+
+    def update(self, done: float, total: Optional[float] = None, message: Optional[str] = None):
+        if done <= self._last_done or total != self._last_total:
+            # A new step has started counting
+            self._base = self._progress
+        self._last_done, self._last_total = done, total
+        progress = self._base + done
+        if progress <= self._progress:
+            return
+        self._progress = progress
+        now = time.monotonic()
+        finished = total is not None and done >= total
+        if now - self._sent_at < self.interval and not finished:
+            return
+        self._sent_at = now
+        params: Dict[str, Any] = {"progressToken": self.token, "progress": progress}
+        if total is not None:
+            params["total"] = self._base + total
+        if message:
+            params["message"] = message
+        self.send({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+        self.sent += 1
+
+
+_progress: contextvars.ContextVar[Optional[Progress]] = contextvars.ContextVar("freshbooks_progress", default=None)
+
+
+def progress_token(request: Dict[str, Any]) -> Any:
+    """The request's ``_meta.progressToken``, or None."""
+    meta = (request.get("params") or {}).get("_meta") or {}
+    return meta.get("progressToken")
+
+
+@contextlib.contextmanager
+def reporting(token: Any, send: Send) -> Iterator[Optional[Progress]]:
+    """Send progress reported inside the block for ``token`` (nothing if it is None)."""
+    if token is None:
+        yield None
+        return
+    progress = Progress(token, send)
+    reset = _progress.set(progress)
+    try:
+        yield progress
+    finally:
+        _progress.reset(reset)
+
+
+def report(done: float, total: Optional[float] = None, message: Optional[str] = None):
+    """Report ``done`` of ``total`` units of work for the current call, if anyone listens."""
+    progress = _progress.get()
+    if progress is not None:
+        progress.update(done, total, message)
@@ -0,0 +1,250 @@
+"""Compact in-memory records for FreshBooks entities.
+
+Raw FreshBooks records are dicts with dozens of keys each, which costs
+kilobytes per invoice once thousands of them are cached. A record here is a
+two-slot object: a key layout shared by every record with the same keys (in
+the same order) and a tuple of values. Low-cardinality strings (currency
+codes, statuses, dates) are interned and id-like integers shared so repeated
+values are stored once, and ``{"amount": ..., "code": ...}`` money objects
+collapse into a slotted ``Money``. ``to_dict()`` rebuilds the original JSON
+object exactly, key order included.
+"""
+
+import sys
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple, Type
+
+# Distinct layouts and shared integers kept per process
+MAX_LAYOUTS = 256
+MAX_SHARED_INTS = 1 << 16
+
+_shared_ints: Dict[int, int] = {}
+
+
+class Money:
+    """A FreshBooks money value."""
+
+    __slots__ = ("amount", "code")
+
+    def __init__(self, amount: str, code: str):
+        self.amount = amount
+        self.code = code
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"amount": self.amount, "code": self.code}
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Money) and (self.amount, self.code) == (other.amount, other.code)
+
+    def __repr__(self) -> str:
+        return f"Money({self.amount!r}, {self.code!r})"
+
+
+class _Layout:
+    """Key order of a record and the position of each key."""
+
+    __slots__ = ("keys", "index")
+
+    def __init__(self, keys: Tuple[str, ...]):
+        self.keys = tuple(sys.intern(key) for key in keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+
+
+def _compact(value: Any, shared: bool) -> Any:
+    if isinstance(value, str):
+        return sys.intern(value) if shared else value
+    if isinstance(value, dict):
+        if len(value) == 2 and "amount" in value and "code" in value:
+            amount, code = value["amount"], value["code"]
+            if isinstance(amount, str) and isinstance(code, str):
+                return Money(sys.intern(amount), sys.intern(code))
+        return value
+    if shared and type(value) is int:
+        existing = _shared_ints.get(value)
+        if existing is not None:
+            return existing
+        if len(_shared_ints) < MAX_SHARED_INTS:
+            _shared_ints[value] = value
+    return value
+
+
+def _expand(value: Any) -> Any:
+    return value.to_dict() if isinstance(value, Money) else value
+
+
+def _field(name: str) -> property:
+    def getter(self):
+        return self.get(name)
+    return property(getter, doc=f"The ``{name}`` field, or None when absent.")
+
+
+class Record:
+    """Base class for compact FreshBooks records.
+
+    Subclasses list the fields they expose as attributes in ``FIELDS`` and
+    the fields whose values repeat across records in ``SHARED``. Keys outside
+    ``FIELDS`` are stored and returned all the same.
+    """
+
+    __slots__ = ("_layout", "_values")
+    FIELDS: Tuple[str, ...] = ()
+    SHARED: FrozenSet[str] = frozenset()
+    _layouts: Dict[Tuple[str, ...], _Layout]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._layouts = {}
+        for name in cls.FIELDS:
+            setattr(cls, name, _field(name))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Build a record from a FreshBooks JSON object."""
+        keys = tuple(data)
+        layout = cls._layouts.get(keys)
+        if layout is None:
+            layout = _Layout(keys)
+            if len(cls._layouts) < MAX_LAYOUTS:
+                cls._layouts[keys] = layout
+        shared = cls.SHARED
+        record = cls.__new__(cls)
+        record._layout = layout
+        record._values = tuple(_compact(value, key in shared) for key, value in data.items())
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the record in its FreshBooks JSON shape."""
+        return dict(zip(self._layout.keys, map(_expand, self._values)))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access to a field in its JSON form."""
+        i = self._layout.index.get(key)
+        return default if i is None else _expand(self._values[i])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._layout.index
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.get('id')!r})"
+
+
+class Client(Record):
+    """A FreshBooks client (``users/clients``)."""
+
+    FIELDS = (
+        "id", "userid", "accounting_systemid", "organization", "fname", "lname", "email",
+        "username", "bus_phone", "home_phone", "mob_phone", "fax", "note", "currency_code",
+        "language", "vat_name", "vat_number", "p_street", "p_street2", "p_city", "p_province",
+        "p_code", "p_country", "s_street", "s_street2", "s_city", "s_province", "s_code",
+        "s_country", "company_industry", "company_size", "allow_late_fees",
+        "allow_late_notifications", "pref_email", "pref_gmail", "notified", "num_logins",
+        "level", "role", "signup_date", "last_login", "last_activity", "updated", "vis_state",
+        "direct_link_token", "statement_token", "subdomain",
+    )
+    SHARED = frozenset({
+        "accounting_systemid", "currency_code", "language", "p_city", "p_province", "p_country",
+        "s_city", "s_province", "s_country", "company_industry", "company_size", "role",
+        "organization", "fname", "lname",
+    })
+    __slots__ = ()
+
+
+class Invoice(Record):
+    """A FreshBooks invoice (``invoices/invoices``)."""
+
+    FIELDS = (
+        "id", "invoiceid", "invoice_number", "accountid", "accounting_systemid", "customerid",
+        "ownerid", "estimateid", "basecampid", "sentid", "parent", "create_date", "created_at",
+        "updated", "due_date", "due_offset_days", "date_paid", "generation_date",
+        "fulfillment_date", "status", "v3_status", "display_status", "payment_status",
+        "last_order_status", "dispute_status", "deposit_status", "autobill_status",
+        "amount", "outstanding", "paid", "discount_total", "deposit_amount", "currency_code",
+        "discount_value", "discount_description", "deposit_percentage", "auto_bill",
+        "organization", "fname", "lname", "street", "street2", "city", "province", "code",
+        "country", "current_organization", "vat_name", "vat_number", "language", "template",
+        "terms", "notes", "description", "po_number", "payment_details", "show_attachments",
+        "ext_archive", "return_uri", "gmail", "vis_state",
+    )
+    SHARED = frozenset({
+        "accountid", "accounting_systemid", "customerid", "ownerid", "create_date", "due_date",
+        "date_paid", "generation_date", "fulfillment_date", "v3_status", "display_status",
+        "payment_status", "last_order_status", "dispute_status", "deposit_status",
+        "autobill_status", "currency_code", "discount_value", "auto_bill", "organization",
+        "fname", "lname", "city", "province", "code", "country", "current_organization",
+        "language", "template", "terms", "notes", "payment_details",
+    })
+    __slots__ = ()
+
+
+class Project(Record):
+    """A FreshBooks project."""
+
+    FIELDS = (
+        "id", "title", "description", "client_id", "project_manager_id", "project_type",
+        "billing_method", "bill_method", "rate", "fixed_price", "budget", "billed_amount",
+        "billed_status", "expense_markup", "retainer_id", "group_id", "group", "services",
+        "logged_duration", "due_date", "active", "complete", "internal", "sample",
+        "created_at", "updated_at",
+    )
+    SHARED = frozenset({
+        "client_id", "project_manager_id", "project_type", "billing_method", "bill_method",
+        "rate", "fixed_price", "billed_status", "due_date", "description",
+    })
+    __slots__ = ()
+
+
+class Expense(Record):
+    """A FreshBooks expense (``expenses/expenses``)."""
+
+    FIELDS = (
+        "id", "expenseid", "accountid", "accounting_systemid", "amount", "categoryid",
+        "clientid", "projectid", "modern_projectid", "invoiceid", "staffid", "profileid",
+        "transactionid", "date", "vendor", "notes", "status", "bank_name", "has_receipt",
+        "include_receipt", "is_cogs", "isduplicate", "markup_percent", "compounded_tax",
+        "taxName1", "taxName2", "taxPercent1", "taxPercent2", "taxAmount1", "taxAmount2",
+        "ext_accountid", "ext_invoiceid", "ext_systemid", "from_bulk_import",
+        "potential_bill_payment", "background_jobid", "bill_matches", "updated", "vis_state",
+    )
+    SHARED = frozenset({
+        "accountid", "accounting_systemid", "categoryid", "clientid", "projectid", "staffid",
+        "date", "vendor", "notes", "bank_name", "markup_percent", "taxName1", "taxName2",
+        "taxPercent1", "taxPercent2",
+    })
+    __slots__ = ()
+
+
+class TimeEntry(Record):
+    """A FreshBooks time entry."""
+
+    FIELDS = (
+        "id", "identity_id", "client_id", "project_id", "task_id", "service_id", "retainer_id",
+        "pending_client", "pending_project", "pending_task", "started_at", "created_at",
+        "duration", "note", "active", "billable", "billed", "internal", "is_logged", "timer",
+    )
+    SHARED = frozenset({
+        "identity_id", "client_id", "project_id", "task_id", "service_id", "note",
+        "pending_client", "pending_project", "pending_task",
+    })
+    __slots__ = ()
+
+
+RECORD_TYPES: Dict[str, Type[Record]] = {
+    "clients": Client,
+    "invoices": Invoice,
+    "projects": Project,
+    "expenses": Expense,
+    "time_entries": TimeEntry,
+}
+
+
+def from_dicts(resource: str, records: Iterable[Dict[str, Any]]) -> List[Record]:
+    """Convert FreshBooks JSON records of ``resource`` to compact records."""
+    record_type = RECORD_TYPES[resource]
+    return [record_type.from_dict(record) for record in records]
+
+
+def to_dicts(records: Iterable[Record]) -> List[Dict[str, Any]]:
+    """Convert compact records back to FreshBooks JSON records."""
+    return [record.to_dict() for record in records]
@@ -0,0 +1,65 @@
+"""FreshBooks list resources exposed by the MCP servers."""
+
+from typing import Any, Dict, Optional
+
+# Resource name -> accounting API path below /accounting/account/{account_id}/
+RESOURCE_PATHS: Dict[str, str] = {
+    "clients": "users/clients",
+    "invoices": "invoices/invoices",
+    "projects": "projects/projects",
+    "expenses": "expenses/expenses",
+    "time_entries": "time_entries/time_entries",
+}
+
+# Resource name -> key of a single record in get/create responses
+SINGULAR: Dict[str, str] = {
+    "clients": "client",
+    "invoices": "invoice",
+    "projects": "project",
+    "expenses": "expense",
+    "time_entries": "time_entry",
+}
+
+# Create tool -> list resource its records appear in
+CREATE_RESOURCES: Dict[str, str] = {
+    "create_client": "clients",
+    "create_invoice": "invoices",
+    "create_project": "projects",
+}
+
+# FreshBooks caps list pages at 100 records
+MAX_PER_PAGE = 100
+
+
+def resource_path(account_id: str, resource: str) -> str:
+    """Return the API path listing ``resource`` for ``account_id``."""
+    return f"/accounting/account/{account_id}/{RESOURCE_PATHS[resource]}"
+
+
+def record_path(account_id: str, resource: str, record_id: Any) -> str:
+    """Return the API path of one ``resource`` record."""
+    return f"{resource_path(account_id, resource)}/{record_id}"
+
+
+def single_record(resource: str, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Pull the record out of a get/create response for ``resource``."""
+    return body.get("response", {}).get("result", {}).get(SINGULAR[resource])
+
+
+def replace_record(body: Dict[str, Any], resource: str, record: Dict[str, Any]) -> bool:
+    """Swap ``record`` into a list response in place; False if it is not listed."""
+    records = body.get("response", {}).get("result", {}).get(resource)
+    if not isinstance(records, list):
+        return False
+    for i, listed in enumerate(records):
+        if str(listed.get("id")) == str(record.get("id")):
+            records[i] = record
+            return True
+    return False
+
+
+def list_response(resource: str, records: list, meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap ``records`` in the FreshBooks list response envelope."""
+    result: Dict[str, Any] = {resource: records}
+    result.update(meta)
+    return {"response": {"result": result}}
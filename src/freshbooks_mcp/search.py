@@ -0,0 +1,260 @@
+"""In-memory client search index.
+
+``ClientIndex`` maps the words of each client's organization, first and last
+name and email to client ids. A query word matches index words exactly, by
+prefix (binary search over the sorted vocabulary) or within one edit
+(precomputed single-deletion variants, as in SymSpell), so lookups never
+scan the client list and never call the API.
+"""
+
+import bisect
+import itertools
+import os
+import re
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from freshbooks_mcp.records import Client
+
+# Seconds after a full load before the index is refreshed in the background
+DEFAULT_REFRESH_AFTER = float(os.getenv("FRESHBOOKS_SEARCH_REFRESH", "300"))
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 25
+# Words shorter than this are matched exactly or by prefix only
+MIN_FUZZY_LENGTH = 4
+# Vocabulary words a single prefix may expand to
+MAX_PREFIX_EXPANSION = 64
+# Query words considered (match groups are combined per word)
+MAX_QUERY_WORDS = 5
+
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+SEARCH_FIELDS = ("organization", "fname", "lname", "email")
+RESULT_FIELDS = ("id", "organization", "fname", "lname", "email", "vis_state")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def words(text: str) -> List[str]:
+    """Split ``text`` into lowercase, accent-free words."""
+    return _WORD.findall(_fold(text))
+
+
+def _deletions(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Damerau-Levenshtein distance of ``a`` and ``b`` is at most one."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+def _ranked_groups(per_word: List[List[Tuple[float, Set[Any]]]]) -> Iterator[Tuple[Tuple[int, float], List[Set[Any]]]]:
+    """Yield one match group per word for every subset of the query words.
+
+    Groups come best first: more words matched, then higher summed score,
+    so intersecting them in order visits clients in rank order.
+    """
+    for matched in range(len(per_word), 0, -1):
+        combos = []
+        for subset in itertools.combinations(per_word, matched):
+            for combo in itertools.product(*subset):
+                combos.append((sum(score for score, _ in combo), [ids for _, ids in combo]))
+        combos.sort(key=lambda combo: -combo[0])
+        for score, groups in combos:
+            yield (matched, score), groups
+
+
+class ClientIndex:
+    """Word index over FreshBooks clients for ranked prefix and fuzzy search."""
+
+    def __init__(self, refresh_after: float = DEFAULT_REFRESH_AFTER):
+        self.refresh_after = refresh_after
+        # Time of the last complete load, None until one happened
+        self.loaded_at: Optional[float] = None
+        self._clients: Dict[Any, Client] = {}
+        self._client_words: Dict[Any, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[Any]] = {}
+        self._vocabulary: List[str] = []
+        # Words added during a bulk load, merged into the vocabulary at its end
+        self._pending: Optional[Set[str]] = None
+        self._variants: Dict[str, Set[str]] = {}
+        self._inactive: Set[Any] = set()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def get(self, client_id: Any) -> Optional[Dict[str, Any]]:
+        """The indexed record of ``client_id``, if any."""
+        client = self._clients.get(client_id)
+        return client.to_dict() if client is not None else None
+
+    @property
+    def is_stale(self) -> bool:
+        """True when the index was never fully loaded or is due a refresh."""
+        return self.loaded_at is None or time.time() - self.loaded_at > self.refresh_after
+
+    def _add_word(self, word: str, client_id: Any):
+        postings = self._postings.get(word)
+        if postings is None:
+            postings = self._postings[word] = set()
+            if self._pending is not None:
+                self._pending.add(word)
+            else:
+                bisect.insort(self._vocabulary, word)
+            if len(word) >= MIN_FUZZY_LENGTH:
+                for variant in _deletions(word) | {word}:
+                    self._variants.setdefault(variant, set()).add(word)
+        postings.add(client_id)
+
+    def _remove_word(self, word: str, client_id: Any):
+        postings = self._postings[word]
+        postings.discard(client_id)
+        if postings:
+            return
+        del self._postings[word]
+        if self._pending is not None and word in self._pending:
+            self._pending.discard(word)
+        else:
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        if len(word) >= MIN_FUZZY_LENGTH:
+            for variant in _deletions(word) | {word}:
+                spelled = self._variants[variant]
+                spelled.discard(word)
+                if not spelled:
+                    del self._variants[variant]
+
+    def upsert(self, record: Dict[str, Any]):
+        """Add or replace one client record."""
+        client_id = record.get("id")
+        if client_id is None:
+            return
+        self.remove(client_id)
+        client = Client.from_dict(record)
+        indexed = set()
+        for field in SEARCH_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str):
+                indexed.update(words(value))
+                if field == "email" and value:
+                    indexed.add(_fold(value))
+        self._clients[client_id] = client
+        if record.get("vis_state") not in (0, None):
+            self._inactive.add(client_id)
+        self._client_words[client_id] = tuple(indexed)
+        for word in indexed:
+            self._add_word(word, client_id)
+
+    def remove(self, client_id: Any):
+        """Drop a client from the index."""
+        if self._clients.pop(client_id, None) is None:
+            return
+        self._inactive.discard(client_id)
+        for word in self._client_words.pop(client_id):
+            self._remove_word(word, client_id)
+
+    def retain(self, client_ids: Iterable[Any]):
+        """Finish a complete load: drop clients not in ``client_ids``."""
+        keep = set(client_ids)
+        for client_id in [cid for cid in self._clients if cid not in keep]:
+            self.remove(client_id)
+        self.loaded_at = time.time()
+
+    def load(self, records: Iterable[Dict[str, Any]], loaded_at: Optional[float] = None):
+        """Index a complete client listing (as of ``loaded_at``, default now).
+
+        New words are sorted into the vocabulary once at the end rather than
+        inserted one by one, which keeps large loads O(V log V).
+        """
+        seen = []
+        self._pending = set()
+        try:
+            for record in records:
+                self.upsert(record)
+                seen.append(record.get("id"))
+        finally:
+            self._vocabulary = sorted(self._vocabulary + list(self._pending))
+            self._pending = None
+        self.retain(seen)
+        if loaded_at is not None:
+            self.loaded_at = loaded_at
+
+    def _tiers(self, word: str) -> List[Tuple[float, Set[Any]]]:
+        """Clients matching ``word`` grouped by match quality, best first."""
+        exact = self._postings.get(word, set())
+        start = bisect.bisect_left(self._vocabulary, word)
+        prefixed = []
+        for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not candidate.startswith(word):
+                break
+            prefixed.append(self._postings[candidate])
+        prefix = set().union(*prefixed) - exact
+        fuzzy: Set[Any] = set()
+        if len(word) >= MIN_FUZZY_LENGTH:
+            spelled = set()
+            for variant in _deletions(word) | {word}:
+                spelled.update(self._variants.get(variant, ()))
+            close = [self._postings[candidate] for candidate in spelled
+                     if candidate != word and _within_one_edit(word, candidate)]
+            fuzzy = set().union(*close) - exact - prefix
+        return [(score, ids) for score, ids in ((EXACT, exact), (PREFIX, prefix), (FUZZY, fuzzy)) if ids]
+
+    def _take(self, ids: Set[Any], seen: Dict[Any, Tuple[int, float]], rank: Tuple[int, float], limit: int):
+        groups = (ids - self._inactive, ids & self._inactive) if self._inactive else (ids,)
+        for group in groups:
+            for client_id in group:
+                if len(seen) >= limit:
+                    return
+                if client_id not in seen:
+                    seen[client_id] = rank
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` clients best matching ``query``.
+
+        Clients matching more query words rank first, then by match quality
+        (exact word, prefix, one typo), then active before archived. Match
+        groups are intersected best first and the search stops as soon as
+        ``limit`` clients are found, so common words stay cheap.
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        folded = _fold(query).strip()
+        # An email address is looked up whole (exactly or with one typo)
+        query_words = [folded] if "@" in folded else words(query)
+        per_word = [self._tiers(word) for word in list(dict.fromkeys(query_words))[:MAX_QUERY_WORDS]]
+        per_word = [tiers for tiers in per_word if tiers]
+
+        found: Dict[Any, Tuple[int, float]] = {}
+        for rank, groups in _ranked_groups(per_word):
+            ids = set.intersection(*sorted(groups, key=len))
+            if ids:
+                self._take(ids, found, rank, limit)
+            if len(found) >= limit:
+                break
+        ranked = found.items()
+        results = []
+        for client_id, (_, score) in ranked:
+            client = self._clients[client_id].to_dict()
+            row = {field: client[field] for field in RESULT_FIELDS if field in client}
+            row["score"] = score
+            results.append(row)
+        return results
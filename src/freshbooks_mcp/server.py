@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 """FreshBooks MCP Server implementation."""
 
+import argparse
 import asyncio
 import json
 import os
+import socket
+import sys
 from typing import Any, Dict, List, Optional
 
 import httpx
-from mcp.server import Server
+from httpx import USE_CLIENT_DEFAULT
+from mcp.server import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 from mcp.types import (
     CallToolRequest,
@@ -19,6 +23,14 @@ from mcp.types import (
 )
 from pydantic import BaseModel, Field
 
+from freshbooks_mcp.cache import ResponseCache
+from freshbooks_mcp.deadlines import clamp_timeout, with_deadline
+from freshbooks_mcp.health import DEFAULT_STALE_AFTER, CircuitBreaker, is_upstream_failure, probe_get, stale_result
+from freshbooks_mcp.hedging import HedgedTransport
+from freshbooks_mcp.limits import LimitedTransport
+from freshbooks_mcp.resources import record_path, replace_record, resource_path, single_record
+from freshbooks_mcp.webhooks import WebhookEvent, WebhookListener
+
 
 class FreshBooksConfig(BaseModel):
     """FreshBooks configuration."""
@@ -30,8 +42,10 @@ class FreshBooksConfig(BaseModel):
 class FreshBooksClient:
     """FreshBooks API client."""
     
-    def __init__(self, config: FreshBooksConfig):
+    def __init__(self, config: FreshBooksConfig, cache: Optional[ResponseCache] = None):
         self.config = config
+        self.cache = cache
+        self.breaker = CircuitBreaker()
         self.client = httpx.AsyncClient(
             base_url=config.base_url,
             headers={
@@ -39,44 +53,105 @@ class FreshBooksClient:
                 "Content-Type": "application/json",
             },
             timeout=30.0,
+            event_hooks={"request": [clamp_timeout]},
+            transport=HedgedTransport(LimitedTransport()),
         )
     
+    async def _get(self, path: str) -> Dict[str, Any]:
+        """GET ``path``, serving successful responses from the cache when fresh.
+        
+        When the API is failing, or slower than ``DEFAULT_STALE_AFTER`` while
+        an older cached copy exists, that copy is returned marked stale.
+        """
+        entry = None
+        if self.cache is not None:
+            cached = self.cache.get(path)
+            if cached is not None:
+                return cached
+            entry = self.cache.get_entry(path)
+        
+        if self.breaker.is_open:
+            if entry is not None:
+                return stale_result(entry[1], entry[0], "circuit open")
+            return {"error": "FreshBooks API unavailable and no cached data", "upstream": self.breaker.status()}
+        
+        try:
+            response = await self.client.get(path, timeout=DEFAULT_STALE_AFTER if entry is not None else USE_CLIENT_DEFAULT)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            self.breaker.record_failure(e, self._probe)
+            if entry is not None:
+                return stale_result(entry[1], entry[0], self.breaker.last_error)
+            raise
+        self.breaker.record_success()
+        result = response.json()
+        if self.cache is not None and response.is_success:
+            self.cache.set(path, result)
+        return result
+    
+    async def _probe(self) -> bool:
+        return await probe_get(self.client, f"/accounting/account/{self.config.business_id}/users/clients?per_page=1")
+    
     async def get_clients(self) -> Dict[str, Any]:
         """Get all clients."""
-        response = await self.client.get(f"/accounting/account/{self.config.business_id}/users/clients")
-        return response.json()
+        return await self._get(f"/accounting/account/{self.config.business_id}/users/clients")
     
     async def get_invoices(self) -> Dict[str, Any]:
         """Get all invoices."""
-        response = await self.client.get(f"/accounting/account/{self.config.business_id}/invoices/invoices")
-        return response.json()
+        return await self._get(f"/accounting/account/{self.config.business_id}/invoices/invoices")
     
     async def get_projects(self) -> Dict[str, Any]:
         """Get all projects."""
-        response = await self.client.get(f"/accounting/account/{self.config.business_id}/projects/projects")
-        return response.json()
+        return await self._get(f"/accounting/account/{self.config.business_id}/projects/projects")
     
     async def get_expenses(self) -> Dict[str, Any]:
         """Get all expenses."""
-        response = await self.client.get(f"/accounting/account/{self.config.business_id}/expenses/expenses")
-        return response.json()
+        return await self._get(f"/accounting/account/{self.config.business_id}/expenses/expenses")
     
     async def get_time_entries(self) -> Dict[str, Any]:
         """Get all time entries."""
-        response = await self.client.get(f"/accounting/account/{self.config.business_id}/time_entries/time_entries")
-        return response.json()
+        return await self._get(f"/accounting/account/{self.config.business_id}/time_entries/time_entries")
+    
+    async def apply_event(self, event: WebhookEvent):
+        """Bring cached list responses up to date with a webhook event.
+        
+        An update is patched into the cached list in place; creates and
+        deletes change list membership and totals, so they drop the entry.
+        """
+        if self.cache is None or event.resource is None:
+            return
+        path = resource_path(self.config.business_id, event.resource)
+        cached = self.cache.get(path)
+        if cached is not None and event.action == "update" and event.object_id:
+            response = await self.client.get(record_path(self.config.business_id, event.resource, event.object_id))
+            record = single_record(event.resource, response.json()) if response.is_success else None
+            if record is not None and replace_record(cached, event.resource, record):
+                self.cache.set(path, cached)
+                return
+        self.cache.invalidate(path)
     
     async def close(self):
         """Close the HTTP client."""
+        self.breaker.close()
         await self.client.aclose()
 
 
 class FreshBooksMCPServer:
     """FreshBooks MCP Server."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None, webhook_port: Optional[int] = None):
         self.server = Server("freshbooks-mcp")
+        # A single process only caches GET responses when a TTL is configured;
+        # the worker pool passes its shared SQLite cache
+        if cache is None and os.getenv("FRESHBOOKS_CACHE_TTL"):
+            cache = ResponseCache()
+        self.cache = cache
         self.freshbooks_client: Optional[FreshBooksClient] = None
+        self.webhook_port = webhook_port
+        self.webhook_listener: Optional[WebhookListener] = None
         self._setup_handlers()
     
     def _setup_handlers(self):
@@ -154,19 +229,21 @@ class FreshBooksMCPServer:
                     api_token=api_token,
                     business_id=business_id
                 )
-                self.freshbooks_client = FreshBooksClient(config)
+                if os.getenv("FRESHBOOKS_BASE_URL"):
+                    config.base_url = os.getenv("FRESHBOOKS_BASE_URL")
+                self.freshbooks_client = FreshBooksClient(config, cache=self.cache)
             
             try:
                 if name == "get_clients":
-                    result = await self.freshbooks_client.get_clients()
+                    result = await with_deadline(name, self.freshbooks_client.get_clients())
                 elif name == "get_invoices":
-                    result = await self.freshbooks_client.get_invoices()
+                    result = await with_deadline(name, self.freshbooks_client.get_invoices())
                 elif name == "get_projects":
-                    result = await self.freshbooks_client.get_projects()
+                    result = await with_deadline(name, self.freshbooks_client.get_projects())
                 elif name == "get_expenses":
-                    result = await self.freshbooks_client.get_expenses()
+                    result = await with_deadline(name, self.freshbooks_client.get_expenses())
                 elif name == "get_time_entries":
-                    result = await self.freshbooks_client.get_time_entries()
+                    result = await with_deadline(name, self.freshbooks_client.get_time_entries())
                 else:
                     return [TextContent(
                         type="text",
@@ -184,29 +261,119 @@ class FreshBooksMCPServer:
                     text=json.dumps({"error": str(e)}, indent=2)
                 )]
     
+    def _initialization_options(self) -> InitializationOptions:
+        """Build the MCP initialization options."""
+        return InitializationOptions(
+            server_name="freshbooks-mcp",
+            server_version="0.1.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities={}
+            )
+        )
+    
+    async def _on_webhook(self, event: WebhookEvent):
+        """Apply a verified webhook event to the response cache."""
+        if self.freshbooks_client is not None:
+            await self.freshbooks_client.apply_event(event)
+        elif self.cache is not None and event.resource is not None and os.getenv("FRESHBOOKS_BUSINESS_ID"):
+            self.cache.invalidate(resource_path(os.getenv("FRESHBOOKS_BUSINESS_ID"), event.resource))
+    
+    def _start_webhooks(self):
+        """Start the webhook listener if a port was configured."""
+        if self.webhook_port is None or self.webhook_listener is not None:
+            return
+        self.webhook_listener = WebhookListener(
+            self._on_webhook, host=os.getenv("FRESHBOOKS_WEBHOOK_HOST", "127.0.0.1"), port=self.webhook_port
+        )
+        self.webhook_listener.start()
+    
     async def run(self):
-        """Run the MCP server."""
+        """Run the MCP server over stdio."""
         from mcp.server.stdio import stdio_server
         
+        self._start_webhooks()
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(
                 read_stream,
                 write_stream,
-                InitializationOptions(
-                    server_name="freshbooks-mcp",
-                    server_version="0.1.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=None,
-                        experimental_capabilities={}
-                    )
-                )
+                self._initialization_options()
             )
+    
+    async def run_http(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        sockets: Optional[List[socket.socket]] = None,
+        stateless: bool = False,
+    ):
+        """Run the MCP server over streamable HTTP and SSE.
+        
+        Every connected session shares this instance's FreshBooks client.
+        """
+        from freshbooks_mcp.http_transport import build_http_app, serve_http
+        
+        app = build_http_app(
+            self.server,
+            self._initialization_options(),
+            stateless=stateless,
+            json_response=stateless,
+        )
+        self._start_webhooks()
+        await serve_http(app, host, port, sockets=sockets)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="FreshBooks MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("FRESHBOOKS_MCP_TRANSPORT", "stdio"),
+        help="Serve over stdio (one client per process) or HTTP (many clients per process)",
+    )
+    parser.add_argument("--host", default=os.getenv("FRESHBOOKS_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FRESHBOOKS_MCP_PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("FRESHBOOKS_MCP_WORKERS", "0")),
+        help="Run a supervised pool of this many stateless HTTP worker processes sharing the port",
+    )
+    parser.add_argument(
+        "--webhook-port",
+        type=int,
+        default=int(os.getenv("FRESHBOOKS_WEBHOOK_PORT")) if os.getenv("FRESHBOOKS_WEBHOOK_PORT") else None,
+        help="Receive FreshBooks webhooks on this port to keep cached responses fresh",
+    )
+    return parser.parse_args(argv)
 
 
-async def main():
+async def main(argv: Optional[List[str]] = None):
     """Main entry point."""
-    server = FreshBooksMCPServer()
-    await server.run()
+    args = _parse_args(argv)
+    if args.transport == "http" and args.workers > 0:
+        from freshbooks_mcp.workers import supervise
+        
+        # The supervisor only waits on child processes, so blocking here is fine
+        supervise(args.workers, args.host, args.port)
+        return
+    
+    server = FreshBooksMCPServer(webhook_port=args.webhook_port)
+    if args.transport == "http":
+        await server.run_http(args.host, args.port)
+    else:
+        await server.run()
+
+
+def cli():
+    """Console script entry point (``freshbooks-mcp export ...`` runs an export)."""
+    if sys.argv[1:2] == ["export"]:
+        from freshbooks_mcp.export import main as export_main
+        
+        asyncio.run(export_main(sys.argv[2:]))
+        return
+    asyncio.run(main())
 
 
 if __name__ == "__main__":
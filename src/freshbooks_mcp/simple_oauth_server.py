@@ -7,16 +7,95 @@ import os
 import sys
 import webbrowser
 import urllib.parse
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Union
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import threading
 import time
-import ssl
-import tempfile
-import subprocess
 
 import httpx
 
+if __package__ in (None, ""):
+    # Allow running this file directly as a script
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freshbooks_mcp.billing import DEFAULT_CONCURRENCY, TimeLedger, create_all, plan_invoices
+from freshbooks_mcp.cache import ResponseCache, SingleFlight
+from freshbooks_mcp.certs import callback_ssl_context
+from freshbooks_mcp.deadlines import DeadlineExceeded, clamp_timeout, detached, with_deadline
+from freshbooks_mcp.delta import DELETED, FULL_SYNC_SINCE, UPDATED_FILTERS, DeltaCollector, query_params, start_point
+from freshbooks_mcp.export import FORMATS, export_path, export_resource
+from freshbooks_mcp.extractors import REQUIRED, extract_arguments, parse_date
+from freshbooks_mcp.health import (
+    DEFAULT_STALE_AFTER,
+    LAST_GOOD_MAX_RECORDS,
+    CircuitBreaker,
+    as_of,
+    is_upstream_failure,
+    probe_get,
+    stale_result,
+)
+from freshbooks_mcp.hedging import HedgedTransport
+from freshbooks_mcp.idempotency import FingerprintStore, fingerprint
+from freshbooks_mcp.intents import resolve_intent
+from freshbooks_mcp.joins import INCLUDES, attach, check_includes, key_fields, summary, wanted_ids
+from freshbooks_mcp.limits import DEFAULT_ENDPOINT_CONCURRENCY, LimitedTransport, Overloaded, RateLimiter
+from freshbooks_mcp.outbox import STATUSES, Outbox, matches_payload
+from freshbooks_mcp.progress import progress_token, reporting
+from freshbooks_mcp.records import from_dicts, to_dicts
+from freshbooks_mcp.resources import CREATE_RESOURCES, MAX_PER_PAGE, RESOURCE_PATHS, SINGULAR, list_response, record_path, resource_path, single_record
+from freshbooks_mcp.search import DEFAULT_LIMIT, ClientIndex
+from freshbooks_mcp.snapshot import (
+    DEFAULT_MAX_AGE,
+    METRICS,
+    SCHEMAS,
+    Snapshot,
+    snapshot_path,
+    to_row,
+    write_snapshot,
+)
+from freshbooks_mcp.stdio import StdioTransport
+from freshbooks_mcp.streaming import matches, project, stream_records
+from freshbooks_mcp.token_store import TokenStore
+from freshbooks_mcp.validation import describe_errors, validate
+from freshbooks_mcp.webhooks import (
+    VERIFY_EVENT,
+    WebhookEvent,
+    WebhookListener,
+    confirm_callback,
+    listener_from_env,
+    register_callbacks,
+)
+
+# Optional arguments shared by the list tools
+LIST_INPUT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "fields": {"type": "array", "items": {"type": "string"}, "description": "Only return these fields of each record"},
+        "filters": {"type": "object", "description": "Only return records whose fields equal these values (dotted keys allowed, e.g. amount.code)"},
+        "max_pages": {"type": "integer", "description": "Number of 100-record pages to read (default 1, 0 for all pages)"},
+        "include": {"type": "array", "items": {"type": "string", "enum": INCLUDES}, "description": "Attach related records: client (invoices, projects, expenses, time entries) and project (expenses, time entries)"}
+    },
+    "required": []
+}
+
+
+# Optional free-text argument of the create tools
+TEXT_PROPERTY = {"type": "string", "description": "Natural-language request; arguments not given explicitly are extracted from it"}
+ALLOW_DUPLICATE_PROPERTY = {"type": "boolean", "description": "Create even if an identical create was made recently (by default the earlier record is returned)"}
+QUEUE_PROPERTY = {"type": "boolean", "description": "Queue the create durably and return a local id at once; check it with get_outbox_status"}
+
+# Tools without side effects: identical calls in flight at once share one execution
+READ_ONLY_TOOLS = {
+    "get_identity", "get_clients", "search_clients", "get_invoices", "get_projects", "get_expenses",
+    "get_time_entries", "get_changes_since", "lookup_record", "aggregate", "resolve_intent",
+    "extract_arguments", "get_outbox_status", "get_request_metrics",
+}
+
+
+def _required_or_text(fields: List[str]) -> List[Dict[str, Any]]:
+    """Schema alternatives: either every required field, or ``text``."""
+    return [{"required": fields}, {"required": ["text"]}]
+
 
 class OAuthCallbackHandler(BaseHTTPRequestHandler):
     """HTTP handler for OAuth callback."""
@@ -56,19 +135,40 @@ class FreshBooksOAuthClient:
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
-        self.base_url = "https://api.freshbooks.com"
+        self.base_url = os.getenv("FRESHBOOKS_BASE_URL", "https://api.freshbooks.com")
         self.auth_url = "https://auth.freshbooks.com/oauth/authorize"
         self.token_url = "https://api.freshbooks.com/auth/oauth/token"
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
         self.account_id: Optional[str] = None
         self.business_id: Optional[str] = None
+        # Clients seen in any response, fully reloaded when stale
+        self.client_index = ClientIndex()
+        self._index_refresh: Optional[asyncio.Task] = None
+        # Project summaries by id, for list includes
+        self.project_index: Dict[int, Dict[str, Any]] = {}
+        self._project_index_seeded = False
+        # Columnar snapshot shared with other processes of the same account
+        self.snapshot: Optional[Snapshot] = None
+        self._snapshot_refresh: Optional[asyncio.Task] = None
+        # Upstream health and the last good answer of each list call (as compact records), for degraded reads
+        self.breaker = CircuitBreaker()
+        self.last_good = ResponseCache(ttl=0, max_entries=64)
+        # Recent creates by payload fingerprint, so retried creates return the first record
+        self.fingerprints = FingerprintStore()
+        self._create_locks: Dict[str, asyncio.Lock] = {}
+        self._create_waiters: Dict[str, int] = {}
+        # Caps on requests open at once, with their queue wait metrics, and hedging of slow reads
+        self.transport = LimitedTransport()
+        self.hedging = HedgedTransport(self.transport)
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
             headers={
                 "Content-Type": "application/json",
             },
             timeout=30.0,
+            event_hooks={"request": [clamp_timeout]},
+            transport=self.hedging,
         )
     
     async def start_oauth_flow(self) -> str:
@@ -100,6 +200,24 @@ class FreshBooksOAuthClient:
         response.raise_for_status()
         return response.json()
     
+    async def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+        """Exchange a refresh token for a new access token."""
+        data = {
+            'grant_type': 'refresh_token',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'redirect_uri': self.redirect_uri,
+            'refresh_token': refresh_token
+        }
+        
+        response = await self.client.post(
+            self.token_url,
+            data=data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}
+        )
+        response.raise_for_status()
+        return response.json()
+    
     async def set_access_token(self, access_token: str):
         """Set access token and update client headers."""
         self.access_token = access_token
@@ -123,52 +241,582 @@ class FreshBooksOAuthClient:
         
         return result
     
-    async def get_clients(self) -> Dict[str, Any]:
-        """Get all clients."""
+    async def iter_records(
+        self,
+        resource: str,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        max_pages: Optional[int] = 1,
+        meta: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream records of a list resource, filtering and projecting as they arrive."""
+        path = resource_path(self.account_id, resource)
+        async for record in stream_records(
+            self.client, path, resource, params=params, max_pages=max_pages, meta=meta, timeout=timeout
+        ):
+            if resource == "clients":
+                self.client_index.upsert(record)
+            elif resource == "projects" and record.get("id") is not None:
+                self.project_index[record["id"]] = summary("projects", record)
+            if filters and not matches(record, filters):
+                continue
+            yield project(record, fields) if fields else record
+    
+    async def list_resource(
+        self,
+        resource: str,
+        fields: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        max_pages: Optional[int] = 1,
+        include: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get a list resource in the FreshBooks response shape.
+        
+        While the API is failing, or when it is slower than
+        ``DEFAULT_STALE_AFTER`` and there is data to fall back on, the last
+        good answer to the same call (or else the snapshot) is returned
+        marked stale. ``include`` names related records to attach to each
+        record (see ``joins.RELATIONS``).
+        """
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
-        response = await self.client.get(f"/accounting/account/{self.account_id}/users/clients")
-        response.raise_for_status()
-        return response.json()
+        try:
+            include = check_includes(resource, include) if include else []
+        except ValueError as e:
+            return {"error": str(e)}
+        if include and fields:
+            fields = list(dict.fromkeys([*fields, *key_fields(resource, include)]))
+        result = await self._list_resource(resource, fields, filters, max_pages)
+        if include and "error" not in result:
+            result = await self._include_related(resource, result, include)
+        return result
     
-    async def get_invoices(self) -> Dict[str, Any]:
-        """Get all invoices."""
+    async def _list_resource(
+        self,
+        resource: str,
+        fields: Optional[List[str]],
+        filters: Optional[Dict[str, Any]],
+        max_pages: Optional[int],
+    ) -> Dict[str, Any]:
+        key = json.dumps([self.account_id, resource, fields, filters, max_pages], sort_keys=True)
+        if self.breaker.is_open:
+            return self._degraded(key, resource, fields, filters, "circuit open")
+        
+        has_fallback = self.last_good.get_entry(key) is not None or bool(
+            self.load_snapshot() and self.snapshot.count(resource)
+        )
+        meta: Dict[str, Any] = {}
+        try:
+            records = [
+                record async for record in self.iter_records(
+                    resource, fields, filters, max_pages, meta,
+                    timeout=DEFAULT_STALE_AFTER if has_fallback else httpx.USE_CLIENT_DEFAULT
+                )
+            ]
+        except Exception as e:
+            if not is_upstream_failure(e):
+                raise
+            self.breaker.record_failure(e, self._probe)
+            if not has_fallback:
+                raise
+            return self._degraded(key, resource, fields, filters, self.breaker.last_error)
+        self.breaker.record_success()
+        result = list_response(resource, records, meta)
+        # Full pulls and large pages would pin their records for the life of the process
+        if max_pages and len(records) <= LAST_GOOD_MAX_RECORDS:
+            self.last_good.set(key, (from_dicts(resource, records), meta))
+        return result
+    
+    def _degraded(
+        self, key: str, resource: str, fields: Optional[List[str]], filters: Optional[Dict[str, Any]], reason: str
+    ) -> Dict[str, Any]:
+        """Answer a list call without the API: last good answer, else the snapshot."""
+        entry = self.last_good.get_entry(key)
+        if entry is not None:
+            stored_at, (records, meta) = entry
+            return stale_result(list_response(resource, to_dicts(records), meta), stored_at, reason)
+        snapshot = self.load_snapshot()
+        if snapshot is not None and snapshot.count(resource):
+            records = [
+                project(row, fields) if fields else row
+                for row in snapshot.rows(resource)
+                if not filters or matches(row, filters)
+            ]
+            result = stale_result(list_response(resource, records, {"total": len(records)}), snapshot.created_at, reason)
+            # Snapshot rows only carry the columns listed in snapshot.SCHEMAS
+            result["source"] = "snapshot"
+            return result
+        return {"error": "FreshBooks API unavailable and no cached data", "upstream": self.breaker.status()}
+    
+    async def _include_related(self, resource: str, result: Dict[str, Any], include: List[str]) -> Dict[str, Any]:
+        """Copy of a list response with related client/project summaries attached."""
+        body = result["response"]["result"]
+        records = body.get(resource, [])
+        found = {}
+        for related, ids in wanted_ids(resource, records, include).items():
+            found[related] = await self._related(related, ids)
+        joined = dict(body)
+        joined[resource] = attach(resource, records, include, found)
+        return {**result, "response": {**result["response"], "result": joined}}
+    
+    async def _related(self, resource: str, ids: Set[int]) -> Dict[int, Dict[str, Any]]:
+        """Summaries of the ``resource`` records with ``ids``.
+        
+        Served from the client index and project index, seeded from the
+        snapshot when there is one. Missing clients are fetched 100 ids per
+        list call, a few calls at a time so large joins stay inside the
+        limiter's queue; missing projects by one project listing. Ids that
+        cannot be fetched while the API is failing are left out.
+        """
+        snapshot = self.load_snapshot()
+        if resource == "clients":
+            if self.client_index.loaded_at is None and snapshot is not None and snapshot.count("clients"):
+                self.client_index.load(snapshot.rows("clients"), loaded_at=snapshot.created_at)
+            lookup = self.client_index.get
+        else:
+            if not self._project_index_seeded and snapshot is not None:
+                for row in snapshot.rows("projects"):
+                    self.project_index.setdefault(row["id"], summary("projects", row))
+                self._project_index_seeded = True
+            lookup = self.project_index.get
+        
+        found = {}
+        for record_id in ids:
+            record = lookup(record_id)
+            if record is not None:
+                found[record_id] = summary(resource, record)
+        missing = sorted(ids - found.keys())
+        if missing and not self.breaker.is_open:
+            try:
+                if resource == "clients":
+                    batches = [missing[i:i + MAX_PER_PAGE] for i in range(0, len(missing), MAX_PER_PAGE)]
+                    semaphore = asyncio.Semaphore(DEFAULT_ENDPOINT_CONCURRENCY)
+
+                    async def fetch(batch: List[int]):
+                        async with semaphore:
+                            await self._fetch_clients(batch)
+
+                    await asyncio.gather(*(fetch(batch) for batch in batches))
+                else:
+                    async for _ in self.iter_records("projects", max_pages=0):
+                        pass
+            except Exception as e:
+                if not is_upstream_failure(e):
+                    raise
+                self.breaker.record_failure(e, self._probe)
+            for record_id in missing:
+                record = lookup(record_id)
+                if record is not None:
+                    found[record_id] = summary(resource, record)
+        return found
+    
+    async def _fetch_clients(self, ids: List[int]):
+        """List the clients with ``ids`` (at most one page), which adds them to the client index."""
+        params = {"search[userids][]": ids}
+        async for _ in self.iter_records("clients", max_pages=1, params=params):
+            pass
+    
+    async def _probe(self) -> bool:
+        return await probe_get(self.client, resource_path(self.account_id, "clients") + "?per_page=1")
+    
+    async def changes_since(
+        self,
+        resource: str,
+        since: Optional[str] = None,
+        sync_token: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get the records of a list resource modified since a timestamp or sync token.
+        
+        Every page of the delta is read: upstream order is not by modification
+        time, so a partial read could not be resumed from the token.
+        """
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
-        response = await self.client.get(f"/accounting/account/{self.account_id}/invoices/invoices")
-        response.raise_for_status()
-        return response.json()
+        point = start_point(resource, since, sync_token)
+        collector = DeltaCollector(point)
+        async for record in self.iter_records(resource, max_pages=0, params=query_params(point)):
+            if collector.add(record) and resource == "clients" and record.get("vis_state") == DELETED:
+                self.client_index.remove(record.get("id"))
+        result = collector.result()
+        if fields:
+            result["changed"] = [project(record, fields) for record in result["changed"]]
+        return result
     
-    async def get_projects(self) -> Dict[str, Any]:
-        """Get all projects."""
+    async def find_created(self, tool: str, payload: Dict[str, Any], since: float) -> Optional[Dict[str, Any]]:
+        """Find a record that create ``tool`` with ``payload`` made on or after ``since``.
+        
+        Used before resending a create whose earlier attempt may have gone
+        through. The window starts a day early because FreshBooks stamps
+        accounting records in its own time zone.
+        """
+        changes = await self.changes_since(CREATE_RESOURCES[tool], since=as_of(since - 86400))
+        if "error" in changes:
+            raise RuntimeError(changes["error"])
+        for record in changes["changed"]:
+            if matches_payload(tool, record, payload):
+                return record
+        return None
+    
+    async def unbilled_time(self, start_date: str, end_date: str, client_ids: Optional[List[int]] = None) -> TimeLedger:
+        """Total the unbilled, billable time entries started within a date range."""
+        ledger = TimeLedger(start_date, end_date, client_ids)
+        params = {"billed": "false", "started_from": f"{start_date}T00:00:00Z", "started_to": f"{end_date}T23:59:59Z"}
+        fields = ["id", "started_at", "billed", "billable", "duration", "client_id", "project_id"]
+        async for entry in self.iter_records("time_entries", fields, max_pages=0, params=params):
+            ledger.add(entry)
+        return ledger
+    
+    async def mark_time_billed(self, entry_ids: List[int], limiter: Optional[RateLimiter] = None) -> Dict[str, Any]:
+        """Mark time entries billed; return how many were and the ids that could not be."""
+        billed, unmarked = 0, []
+        for entry_id in entry_ids:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                response = await self.client.put(
+                    record_path(self.account_id, "time_entries", entry_id), json={"time_entry": {"billed": True}}
+                )
+                response.raise_for_status()
+            except httpx.HTTPError:
+                unmarked.append(entry_id)
+                continue
+            billed += 1
+        result: Dict[str, Any] = {"time_entries_billed": billed}
+        if unmarked:
+            result["time_entries_unmarked"] = unmarked
+        return result
+    
+    async def generate_invoices_from_time(
+        self,
+        start_date: str,
+        end_date: str,
+        client_ids: Optional[List[int]] = None,
+        default_rate: Optional[float] = None,
+        date: Optional[str] = None,
+        due_date: Optional[str] = None,
+        dry_run: bool = True,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        limiter: Optional[RateLimiter] = None,
+    ) -> Dict[str, Any]:
+        """Invoice each client for its unbilled time between two dates.
+        
+        One invoice per client, one line per project at the project's rate
+        (or ``default_rate``). With ``dry_run`` the invoices are only
+        returned; otherwise they are created ``concurrency`` at a time,
+        each through ``create_invoice`` keyed on the time entries it bills,
+        so a re-run returns the invoices already made instead of
+        duplicating them. The entries of each invoice are then marked
+        billed.
+        """
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
-        response = await self.client.get(f"/accounting/account/{self.account_id}/projects/projects")
-        response.raise_for_status()
-        return response.json()
+        start, end = parse_date(str(start_date or "")), parse_date(str(end_date or ""))
+        if start is None or end is None or end < start:
+            return {"error": "start_date and end_date must be dates (YYYY-MM-DD), with end_date not before start_date"}
+        
+        ledger = await self.unbilled_time(start, end, client_ids)
+        clients = await self._related("clients", set(ledger.totals))
+        projects = await self._related("projects", ledger.project_ids())
+        plans, skipped = plan_invoices(ledger, clients, projects, default_rate, date, due_date)
+        
+        invalid = []
+        for plan in plans:
+            arguments, errors = validate("create_invoice", plan["arguments"])
+            plan["total"] = arguments.pop("total", None)
+            if errors:
+                invalid.append({"client_id": plan["arguments"]["client_id"], "reason": describe_errors(errors)})
+            plan["arguments"] = arguments
+        if invalid:
+            return {"error": "Some invoices would be rejected", "invalid": invalid}
+        
+        if not dry_run:
+            async def create(plan: Dict[str, Any]) -> Dict[str, Any]:
+                if limiter is not None:
+                    await limiter.acquire()
+                result = await self.create_invoice(**plan["arguments"], time_entry_ids=plan["entry_ids"])
+                if "error" not in result:
+                    result.update(await self.mark_time_billed(plan["entry_ids"], limiter))
+                return result
+            
+            await create_all(plans, create, concurrency)
+        
+        invoices = []
+        for plan in plans:
+            arguments = plan["arguments"]
+            invoice = {
+                "client_id": arguments["client_id"],
+                "client": plan["client"],
+                "entries": plan["entries"],
+                "hours": plan["hours"],
+                "total": plan["total"],
+                "lines": arguments["lines"],
+                "status": plan.get("status", "planned"),
+            }
+            keys = ("invoice_id", "invoice_number", "error", "time_entries_billed", "time_entries_unmarked")
+            invoice.update({key: plan[key] for key in keys if plan.get(key) is not None})
+            invoices.append(invoice)
+        statuses: Dict[str, int] = {}
+        for invoice in invoices:
+            statuses[invoice["status"]] = statuses.get(invoice["status"], 0) + 1
+        return {
+            "dry_run": dry_run,
+            "period": {"start_date": ledger.start_date, "end_date": ledger.end_date},
+            "entries_scanned": ledger.scanned,
+            "unbilled_entries": ledger.unbilled,
+            "entries_without_client": ledger.without_client,
+            "invoices": invoices,
+            "skipped": skipped,
+            "statuses": statuses,
+        }
     
-    async def get_expenses(self) -> Dict[str, Any]:
-        """Get all expenses."""
+    async def export_resource(self, resource: str, output: str, **options) -> Dict[str, Any]:
+        """Stream every record of a list resource to a file on this machine."""
+        if not self.account_id:
+            return {"error": "No account_id available. Please authenticate first."}
+        
+        return await export_resource(self.client, self.account_id, resource, output, **options)
+    
+    async def refresh_client_index(self):
+        """Reload the client index from a full client listing."""
+        path = resource_path(self.account_id, "clients")
+        seen = []
+        async for record in stream_records(self.client, path, "clients", max_pages=0):
+            self.client_index.upsert(record)
+            seen.append(record.get("id"))
+        self.client_index.retain(seen)
+    
+    async def ensure_client_index(self):
+        """Load the client index on first use and refresh it in the background when stale.
+        
+        A mapped snapshot seeds the index without any API call; it is then
+        refreshed in the background like any other stale index.
+        """
+        if self.client_index.loaded_at is None:
+            snapshot = self.load_snapshot()
+            if snapshot is not None and snapshot.count("clients"):
+                self.client_index.load(snapshot.rows("clients"), loaded_at=snapshot.created_at)
+            else:
+                await self.refresh_client_index()
+        if self.client_index.is_stale and not self.breaker.is_open and (self._index_refresh is None or self._index_refresh.done()):
+            # Answer from the current index while it reloads
+            self._index_refresh = detached(self.refresh_client_index())
+    
+    async def search_clients(self, query: str, limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+        """Find clients by organization, name or email from the local index."""
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
-        response = await self.client.get(f"/accounting/account/{self.account_id}/expenses/expenses")
+        await self.ensure_client_index()
+        result = {
+            "clients": self.client_index.search(query, limit),
+            "indexed": len(self.client_index),
+        }
+        if self.breaker.is_open:
+            result.update({"stale": True, "as_of": as_of(self.client_index.loaded_at)})
+        return result
+    
+    async def fetch_record(self, resource: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Get one record of a list resource, or None if it is gone."""
+        response = await self.client.get(record_path(self.account_id, resource, record_id))
+        if response.status_code == 404:
+            return None
         response.raise_for_status()
-        return response.json()
+        return single_record(resource, response.json())
     
-    async def get_time_entries(self) -> Dict[str, Any]:
-        """Get all time entries."""
+    async def check_client(self, client_id: int) -> Optional[str]:
+        """Why ``client_id`` cannot be used for a new record, or None if it can (or cannot be checked).
+        
+        Answers from the client index when it knows the client or is fresh
+        enough to trust a miss; otherwise one GET settles it.
+        """
+        record = self.client_index.get(client_id)
+        if record is None and self.client_index.is_stale:
+            try:
+                record = await self.fetch_record("clients", client_id)
+            except httpx.HTTPError:
+                return None
+            if record is not None:
+                self.client_index.upsert(record)
+        if record is None:
+            return f"{client_id} does not match any client"
+        if record.get("vis_state") == DELETED:
+            return f"{client_id} is a deleted client"
+        return None
+    
+    async def register_webhooks(self, uri: str, events: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Register ``uri`` as the callback for FreshBooks events."""
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
-        response = await self.client.get(f"/accounting/account/{self.account_id}/time_entries/time_entries")
+        callbacks = await register_callbacks(self.client, self.account_id, uri, events)
+        return {"callbacks": callbacks}
+    
+    async def apply_event(self, event: WebhookEvent):
+        """Apply a verified webhook event to the local client index."""
+        if event.name == VERIFY_EVENT:
+            await confirm_callback(self.client, self.account_id, event.object_id, event.fields.get("verifier", ""))
+        elif event.resource == "clients" and event.object_id:
+            client_id = int(event.object_id) if event.object_id.isdigit() else event.object_id
+            record = None if event.action == "delete" else await self.fetch_record("clients", client_id)
+            if record is None:
+                self.client_index.remove(client_id)
+            else:
+                self.client_index.upsert(record)
+    
+    def load_snapshot(self) -> Optional[Snapshot]:
+        """Map this account's snapshot file if one exists."""
+        if self.snapshot is None and self.account_id:
+            self.snapshot = Snapshot.open(snapshot_path(self.account_id))
+        return self.snapshot
+    
+    async def refresh_snapshot(self):
+        """Rewrite the snapshot and remap it.
+        
+        Resources with a sync token from the previous snapshot only fetch
+        their changes; the others are read in full.
+        """
+        previous = self.load_snapshot()
+        tables: Dict[str, List[Dict[str, Any]]] = {}
+        tokens: Dict[str, str] = {}
+        for resource, schema in SCHEMAS.items():
+            fields = sorted({source.split(".")[0] for _, source in schema.values()})
+            token = previous.tokens.get(resource) if previous is not None else None
+            if token:
+                delta = await self.changes_since(resource, sync_token=token, fields=fields)
+                rows = {row["id"]: row for row in previous.rows(resource)}
+            else:
+                delta = await self.changes_since(resource, since=FULL_SYNC_SINCE, fields=fields)
+                rows = {}
+            for record in delta["changed"]:
+                rows[record.get("id")] = to_row(resource, record)
+            for record_id in delta["deleted"]:
+                rows.pop(record_id, None)
+            tables[resource] = list(rows.values())
+            tokens[resource] = delta["sync_token"]
+        path = snapshot_path(self.account_id)
+        await asyncio.to_thread(write_snapshot, path, self.account_id, tables, tokens)
+        if previous is not None:
+            previous.close()
+        self.snapshot = Snapshot.open(path)
+    
+    async def ensure_snapshot(self) -> Snapshot:
+        """Map the snapshot, building it on first use and refreshing it in the background when old."""
+        snapshot = self.load_snapshot()
+        if snapshot is None:
+            await self.refresh_snapshot()
+        elif snapshot.age > DEFAULT_MAX_AGE and not self.breaker.is_open and (self._snapshot_refresh is None or self._snapshot_refresh.done()):
+            # Answer from the mapped file while it is rewritten
+            self._snapshot_refresh = detached(self.refresh_snapshot())
+        return self.snapshot
+    
+    def _snapshot_meta(self, snapshot: Snapshot) -> Dict[str, Any]:
+        return {
+            "as_of": as_of(snapshot.created_at),
+            "age_seconds": round(snapshot.age, 1),
+            "stale": snapshot.age > DEFAULT_MAX_AGE,
+        }
+    
+    async def lookup_record(self, resource: str, record_id: Any) -> Dict[str, Any]:
+        """Find one record's snapshot columns by id."""
+        if not self.account_id:
+            return {"error": "No account_id available. Please authenticate first."}
+        
+        snapshot = await self.ensure_snapshot()
+        result = {"record": snapshot.find(resource, record_id)}
+        result.update(self._snapshot_meta(snapshot))
+        return result
+    
+    async def aggregate(self, resource: str, **options) -> Dict[str, Any]:
+        """Aggregate a snapshot column, optionally grouped and filtered."""
+        if not self.account_id:
+            return {"error": "No account_id available. Please authenticate first."}
+        
+        snapshot = await self.ensure_snapshot()
+        result = snapshot.aggregate(resource, **options)
+        result["rows"] = snapshot.count(resource)
+        result.update(self._snapshot_meta(snapshot))
+        return result
+    
+    async def get_clients(self, **options) -> Dict[str, Any]:
+        """Get all clients."""
+        return await self.list_resource("clients", **options)
+    
+    async def get_invoices(self, **options) -> Dict[str, Any]:
+        """Get all invoices."""
+        return await self.list_resource("invoices", **options)
+    
+    async def get_projects(self, **options) -> Dict[str, Any]:
+        """Get all projects."""
+        return await self.list_resource("projects", **options)
+    
+    async def get_expenses(self, **options) -> Dict[str, Any]:
+        """Get all expenses."""
+        return await self.list_resource("expenses", **options)
+    
+    async def get_time_entries(self, **options) -> Dict[str, Any]:
+        """Get all time entries."""
+        return await self.list_resource("time_entries", **options)
+    
+    async def _create_once(self, tool: str, payload: Dict[str, Any], path: str, body: Dict[str, Any], allow_duplicate: bool, dedupe_as: Optional[str] = None) -> Dict[str, Any]:
+        """POST a create unless an identical one was made within the dedupe window.
+        
+        A repeat gets the record the first create made, marked
+        ``deduplicated``. Identical creates running concurrently are
+        serialized so the second sees the first's fingerprint.
+        ``payload`` is fingerprinted as ``dedupe_as`` (default ``tool``).
+        """
+        resource = CREATE_RESOURCES[tool]
+        key = None if allow_duplicate else fingerprint(dedupe_as or tool, self.account_id, payload)
+        if key is None:
+            return await self._post_create(path, body)
+        
+        lock = self._create_locks.setdefault(key, asyncio.Lock())
+        self._create_waiters[key] = self._create_waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                entry = self.fingerprints.get(key)
+                if entry is not None:
+                    duplicate = await self._existing_record(resource, entry["id"])
+                    if duplicate is not None:
+                        return duplicate
+                    self.fingerprints.discard(key)
+                result = await self._post_create(path, body)
+                record = single_record(resource, result) or result.get(SINGULAR[resource])
+                if isinstance(record, dict) and record.get("id") is not None:
+                    self.fingerprints.add(key, resource, record["id"])
+                return result
+        finally:
+            # Dropped only when no other create holds or awaits this lock
+            self._create_waiters[key] -= 1
+            if not self._create_waiters[key]:
+                del self._create_waiters[key]
+                del self._create_locks[key]
+    
+    async def _existing_record(self, resource: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Create response for an earlier record, or None if it has since been deleted."""
+        try:
+            record = await self.fetch_record(resource, record_id)
+        except httpx.HTTPError as e:
+            if not is_upstream_failure(e):
+                raise
+            # Cannot confirm it still exists; the id alone beats creating a duplicate
+            record = {"id": record_id}
+        if record is None or record.get("vis_state") == DELETED:
+            return None
+        return {"response": {"result": {SINGULAR[resource]: record}}, "deduplicated": True, "duplicate_of": record_id}
+    
+    async def _post_create(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.client.post(path, json=body)
         response.raise_for_status()
         return response.json()
     
-    async def create_client(self, first_name: str, last_name: str, email: str = None, phone: str = None, address: str = None, city: str = None, state: str = None, country: str = None, postal_code: str = None) -> Dict[str, Any]:
+    async def create_client(self, first_name: str, last_name: str, email: str = None, phone: str = None, address: str = None, city: str = None, state: str = None, country: str = None, postal_code: str = None, allow_duplicate: bool = False) -> Dict[str, Any]:
         """Create a new client."""
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
@@ -199,12 +847,24 @@ class FreshBooksOAuthClient:
             if postal_code:
                 client_data["client"]["address"]["postal_code"] = postal_code
         
-        response = await self.client.post(f"/accounting/account/{self.account_id}/users/clients", json=client_data)
-        response.raise_for_status()
-        return response.json()
+        result = await self._create_once(
+            "create_client",
+            {"first_name": first_name, "last_name": last_name, "email": email},
+            f"/accounting/account/{self.account_id}/users/clients",
+            client_data,
+            allow_duplicate,
+        )
+        client = result.get("response", {}).get("result", {}).get("client")
+        if client:
+            self.client_index.upsert(client)
+        return result
     
-    async def create_invoice(self, client_id: int, lines: list, date: str = None, due_date: str = None, notes: str = None) -> Dict[str, Any]:
-        """Create a new invoice."""
+    async def create_invoice(self, client_id: int, lines: list, date: str = None, due_date: str = None, notes: str = None, allow_duplicate: bool = False, time_entry_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Create a new invoice.
+        
+        An invoice for ``time_entry_ids`` is deduplicated on the client and
+        those ids rather than on its lines and date.
+        """
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
         
@@ -224,11 +884,20 @@ class FreshBooksOAuthClient:
         if notes:
             invoice_data["invoice"]["notes"] = notes
         
-        response = await self.client.post(f"/accounting/account/{self.account_id}/invoices/invoices", json=invoice_data)
-        response.raise_for_status()
-        return response.json()
+        if time_entry_ids is not None:
+            dedupe = ("invoice_time_entries", {"client_id": client_id, "time_entry_ids": time_entry_ids})
+        else:
+            dedupe = ("create_invoice", {"client_id": client_id, "lines": lines, "date": date})
+        return await self._create_once(
+            "create_invoice",
+            dedupe[1],
+            f"/accounting/account/{self.account_id}/invoices/invoices",
+            invoice_data,
+            allow_duplicate,
+            dedupe_as=dedupe[0],
+        )
     
-    async def create_project(self, name: str, client_id: int, description: str = None, bill_method: str = "project_rate", rate: float = None) -> Dict[str, Any]:
+    async def create_project(self, name: str, client_id: int, description: str = None, bill_method: str = "project_rate", rate: float = None, allow_duplicate: bool = False) -> Dict[str, Any]:
         """Create a new project."""
         if not self.account_id:
             return {"error": "No account_id available. Please authenticate first."}
@@ -247,12 +916,20 @@ class FreshBooksOAuthClient:
         if rate is not None:
             project_data["project"]["rate"] = rate
         
-        response = await self.client.post(f"/accounting/account/{self.account_id}/projects/projects", json=project_data)
-        response.raise_for_status()
-        return response.json()
+        return await self._create_once(
+            "create_project",
+            {"name": name, "client_id": client_id},
+            f"/accounting/account/{self.account_id}/projects/projects",
+            project_data,
+            allow_duplicate,
+        )
     
     async def close(self):
         """Close the HTTP client."""
+        for task in (self._index_refresh, self._snapshot_refresh):
+            if task and not task.done():
+                task.cancel()
+        self.breaker.close()
         await self.client.aclose()
 
 
@@ -262,10 +939,25 @@ class FreshBooksSimpleOAuthMCPServer:
     def __init__(self):
         self.freshbooks_client: Optional[FreshBooksOAuthClient] = None
         self.callback_server: Optional[HTTPServer] = None
+        self.callback_thread: Optional[threading.Thread] = None
         self.token_file = os.path.expanduser("~/.freshbooks_token")
+        self.token_store = TokenStore(self.token_file)
+        self.webhook_listener: Optional[WebhookListener] = None
+        # Queued creates, sent in the background under the write rate limit
+        self.outbox: Optional[Outbox] = None
+        self.write_limiter = RateLimiter()
+        self._outbox_drainer: Optional[asyncio.Task] = None
+        # Requests being handled, by JSON-RPC id, so the client can cancel them
+        self._in_flight: Dict[Any, asyncio.Task] = {}
+        self.stdio: Optional[StdioTransport] = None
+        self._batches: Set[asyncio.Task] = set()
+        self.single_flight = SingleFlight()
     
-    def _send_response(self, response: Dict[str, Any]):
+    def _send_response(self, response: Union[Dict[str, Any], List[Dict[str, Any]]]):
         """Send a JSON response."""
+        if self.stdio is not None:
+            self.stdio.send(response)
+            return
         print(json.dumps(response))
         sys.stdout.flush()
     
@@ -282,29 +974,17 @@ class FreshBooksSimpleOAuthMCPServer:
             error_response["id"] = id
         self._send_response(error_response)
     
-    def _save_token(self, access_token: str, account_id: str, business_id: str):
-        """Save access token to file."""
+    def _save_token(self, token_response: Dict[str, Any], account_id: str, business_id: str):
+        """Save the token response to the shared token file."""
         token_data = {
-            "access_token": access_token,
+            "access_token": token_response["access_token"],
+            "refresh_token": token_response.get("refresh_token"),
+            "expires_in": token_response.get("expires_in"),
             "account_id": account_id,
             "business_id": business_id,
             "timestamp": time.time()
         }
-        with open(self.token_file, 'w') as f:
-            json.dump(token_data, f)
-    
-    def _load_token(self) -> Optional[Dict[str, Any]]:
-        """Load access token from file."""
-        try:
-            if os.path.exists(self.token_file):
-                with open(self.token_file, 'r') as f:
-                    token_data = json.load(f)
-                    # Check if token is less than 1 hour old
-                    if time.time() - token_data.get('timestamp', 0) < 3600:
-                        return token_data
-        except (json.JSONDecodeError, KeyError, FileNotFoundError):
-            pass
-        return None
+        self.token_store.save(token_data)
     
     async def handle_initialize(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle initialize request."""
@@ -346,48 +1026,167 @@ class FreshBooksSimpleOAuthMCPServer:
             {
                 "name": "get_clients",
                 "description": "Get all clients from FreshBooks",
+                "inputSchema": LIST_INPUT_SCHEMA
+            },
+            {
+                "name": "search_clients",
+                "description": "Find clients by organization, first/last name or email (prefix and typo tolerant) and return their ids",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {},
-                    "required": []
+                    "properties": {
+                        "query": {"type": "string", "description": "Name, organization or email to look for"},
+                        "limit": {"type": "integer", "description": f"Maximum number of clients to return (default {DEFAULT_LIMIT})"}
+                    },
+                    "required": ["query"]
                 }
             },
             {
                 "name": "get_invoices",
                 "description": "Get all invoices from FreshBooks",
+                "inputSchema": LIST_INPUT_SCHEMA
+            },
+            {
+                "name": "get_projects",
+                "description": "Get all projects from FreshBooks",
+                "inputSchema": LIST_INPUT_SCHEMA
+            },
+            {
+                "name": "get_expenses",
+                "description": "Get all expenses from FreshBooks",
+                "inputSchema": LIST_INPUT_SCHEMA
+            },
+            {
+                "name": "get_time_entries",
+                "description": "Get all time entries from FreshBooks",
+                "inputSchema": LIST_INPUT_SCHEMA
+            },
+            {
+                "name": "get_changes_since",
+                "description": "Get only the records of a resource created, updated or deleted since a timestamp or a sync_token from a previous call",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {},
-                    "required": []
+                    "properties": {
+                        "resource": {"type": "string", "enum": list(UPDATED_FILTERS), "description": "Resource to read"},
+                        "since": {"type": "string", "description": "Timestamp (YYYY-MM-DD, YYYY-MM-DD HH:MM:SS or ISO 8601) for the first call; an offset such as Z or +02:00 is honoured"},
+                        "sync_token": {"type": "string", "description": "Token returned by the previous call; takes precedence over since"},
+                        "fields": {"type": "array", "items": {"type": "string"}, "description": "Only return these fields of each changed record"}
+                    },
+                    "required": ["resource"]
                 }
             },
             {
-                "name": "get_projects",
-                "description": "Get all projects from FreshBooks",
+                "name": "export_resource",
+                "description": "Stream every record of a resource to an NDJSON or CSV file (optionally gzip-compressed) on the server's disk; interrupted exports resume after the last complete page",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {},
-                    "required": []
+                    "properties": {
+                        "resource": {"type": "string", "enum": list(RESOURCE_PATHS), "description": "Resource to export"},
+                        "output": {"type": "string", "description": "Output file name, relative to the server's export directory; .csv selects CSV and a .gz suffix compresses. Existing files are not overwritten"},
+                        "format": {"type": "string", "enum": list(FORMATS), "description": "Override the format inferred from the file name"},
+                        "fields": {"type": "array", "items": {"type": "string"}, "description": "Only export these fields of each record"},
+                        "filters": {"type": "object", "description": "Only export records whose fields equal these values (dotted keys allowed)"},
+                        "resume": {"type": "boolean", "description": "Continue from an existing checkpoint (default true)"}
+                    },
+                    "required": ["resource", "output"]
                 }
             },
             {
-                "name": "get_expenses",
-                "description": "Get all expenses from FreshBooks",
+                "name": "lookup_record",
+                "description": "Look up one record's ids, dates, amounts and statuses by id from the local snapshot, without an API call when the snapshot is warm",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {},
-                    "required": []
+                    "properties": {
+                        "resource": {"type": "string", "enum": list(SCHEMAS), "description": "Resource of the record"},
+                        "id": {"type": "integer", "description": "Record id"}
+                    },
+                    "required": ["resource", "id"]
                 }
             },
             {
-                "name": "get_time_entries",
-                "description": "Get all time entries from FreshBooks",
+                "name": "aggregate",
+                "description": "Count, sum, average, min or max a column of a resource from the local snapshot, optionally grouped by another column and filtered by equality",
                 "inputSchema": {
                     "type": "object",
-                    "properties": {},
-                    "required": []
+                    "properties": {
+                        "resource": {"type": "string", "enum": list(SCHEMAS), "description": "Resource to aggregate"},
+                        "metric": {"type": "string", "enum": list(METRICS), "description": "Aggregate function (default count)"},
+                        "column": {"type": "string", "description": "Numeric column for sum/avg/min/max, e.g. amount, outstanding, duration"},
+                        "group_by": {"type": "string", "description": "Column to group by, e.g. v3_status, currency_code, customerid"},
+                        "where": {"type": "object", "description": "Equality filters on snapshot columns, e.g. {\"v3_status\": \"paid\"}"}
+                    },
+                    "required": ["resource"]
+                }
+            },
+            {
+                "name": "resolve_intent",
+                "description": "Map a natural-language request to the FreshBooks tool that handles it, using the oi-manifest.json intents",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "text": {"type": "string", "description": "The user's request"}
+                    },
+                    "required": ["text"]
+                }
+            },
+            {
+                "name": "extract_arguments",
+                "description": "Extract create_client, create_invoice or create_project arguments from a natural-language request, resolving client names to ids",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "tool_name": {"type": "string", "enum": sorted(REQUIRED), "description": "Create tool to extract arguments for"},
+                        "text": {"type": "string", "description": "The user's request"}
+                    },
+                    "required": ["tool_name", "text"]
+                }
+            },
+            {
+                "name": "register_webhooks",
+                "description": "Register a public URL that forwards to this server's webhook listener for FreshBooks events",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "uri": {"type": "string", "description": "Callback URL FreshBooks will POST events to"},
+                        "events": {"type": "array", "items": {"type": "string"}, "description": "Event names (default: create, update and delete of clients, invoices, projects, expenses and time entries)"}
+                    },
+                    "required": ["uri"]
+                }
+            },
+            {
+                "name": "generate_invoices_from_time",
+                "description": "Invoice every client for its unbilled time entries in a date range: one invoice per client, one line per project at the project's rate. Dry run by default",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "start_date": {"type": "string", "description": "First day of time entries to bill (YYYY-MM-DD)"},
+                        "end_date": {"type": "string", "description": "Last day of time entries to bill (YYYY-MM-DD)"},
+                        "client_ids": {"type": "array", "items": {"type": "integer"}, "description": "Only bill these clients"},
+                        "default_rate": {"type": "number", "description": "Hourly rate for time whose project has no rate"},
+                        "date": {"type": "string", "description": "Invoice date (YYYY-MM-DD, default today)"},
+                        "due_date": {"type": "string", "description": "Invoice due date (YYYY-MM-DD)"},
+                        "dry_run": {"type": "boolean", "description": "Only return the invoices that would be created (default true)"},
+                        "concurrency": {"type": "integer", "description": f"Invoices created at once (default {DEFAULT_CONCURRENCY})"}
+                    },
+                    "required": ["start_date", "end_date"]
                 }
             },
+            {
+                "name": "get_outbox_status",
+                "description": "Get the status of creates queued with queue=true: one item by local id, or the most recent items",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "local_id": {"type": "string", "description": "Local id returned when the create was queued"},
+                        "status": {"type": "string", "enum": list(STATUSES), "description": "Only list items in this state"},
+                        "limit": {"type": "integer", "description": "Maximum number of items to list (default 50)"}
+                    }
+                }
+            },
+            {
+                "name": "get_request_metrics",
+                "description": "Get API concurrency and queue wait times, overall and per endpoint, how many requests were turned away, and how many reads were hedged",
+                "inputSchema": {"type": "object", "properties": {}}
+            },
             {
                 "name": "create_client",
                 "description": "Create a new client in FreshBooks",
@@ -402,9 +1201,12 @@ class FreshBooksSimpleOAuthMCPServer:
                         "city": {"type": "string", "description": "Client's city"},
                         "state": {"type": "string", "description": "Client's state/province"},
                         "country": {"type": "string", "description": "Client's country"},
-                        "postal_code": {"type": "string", "description": "Client's postal/ZIP code"}
+                        "postal_code": {"type": "string", "description": "Client's postal/ZIP code"},
+                        "text": TEXT_PROPERTY,
+                        "queue": QUEUE_PROPERTY,
+                        "allow_duplicate": ALLOW_DUPLICATE_PROPERTY
                     },
-                    "required": ["first_name", "last_name"]
+                    "anyOf": _required_or_text(["first_name", "last_name"])
                 }
             },
             {
@@ -417,9 +1219,12 @@ class FreshBooksSimpleOAuthMCPServer:
                         "lines": {"type": "array", "description": "Invoice line items", "items": {"type": "object"}},
                         "date": {"type": "string", "description": "Invoice date (YYYY-MM-DD)"},
                         "due_date": {"type": "string", "description": "Due date (YYYY-MM-DD)"},
-                        "notes": {"type": "string", "description": "Invoice notes"}
+                        "notes": {"type": "string", "description": "Invoice notes"},
+                        "text": TEXT_PROPERTY,
+                        "queue": QUEUE_PROPERTY,
+                        "allow_duplicate": ALLOW_DUPLICATE_PROPERTY
                     },
-                    "required": ["client_id", "lines"]
+                    "anyOf": _required_or_text(["client_id", "lines"])
                 }
             },
             {
@@ -432,9 +1237,12 @@ class FreshBooksSimpleOAuthMCPServer:
                         "client_id": {"type": "integer", "description": "Client ID"},
                         "description": {"type": "string", "description": "Project description"},
                         "bill_method": {"type": "string", "description": "Billing method (project_rate, task_rate, staff_rate)"},
-                        "rate": {"type": "number", "description": "Project rate"}
+                        "rate": {"type": "number", "description": "Project rate"},
+                        "text": TEXT_PROPERTY,
+                        "queue": QUEUE_PROPERTY,
+                        "allow_duplicate": ALLOW_DUPLICATE_PROPERTY
                     },
-                    "required": ["name", "client_id"]
+                    "anyOf": _required_or_text(["name", "client_id"])
                 }
             }
         ]
@@ -459,15 +1267,37 @@ class FreshBooksSimpleOAuthMCPServer:
             elif tool_name == "get_identity":
                 result = await self._handle_get_identity()
             elif tool_name == "get_clients":
-                result = await self._handle_get_clients()
+                result = await self._handle_get_clients(arguments)
+            elif tool_name == "search_clients":
+                result = await self._handle_search_clients(arguments)
             elif tool_name == "get_invoices":
-                result = await self._handle_get_invoices()
+                result = await self._handle_get_invoices(arguments)
             elif tool_name == "get_projects":
-                result = await self._handle_get_projects()
+                result = await self._handle_get_projects(arguments)
             elif tool_name == "get_expenses":
-                result = await self._handle_get_expenses()
+                result = await self._handle_get_expenses(arguments)
             elif tool_name == "get_time_entries":
-                result = await self._handle_get_time_entries()
+                result = await self._handle_get_time_entries(arguments)
+            elif tool_name == "get_changes_since":
+                result = await self._handle_get_changes_since(arguments)
+            elif tool_name == "export_resource":
+                result = await self._handle_export_resource(arguments)
+            elif tool_name == "lookup_record":
+                result = await self._handle_lookup_record(arguments)
+            elif tool_name == "aggregate":
+                result = await self._handle_aggregate(arguments)
+            elif tool_name == "resolve_intent":
+                result = {"intent": resolve_intent(arguments.get("text", ""))}
+            elif tool_name == "extract_arguments":
+                result = await self._handle_extract_arguments(arguments)
+            elif tool_name == "register_webhooks":
+                result = await self._handle_register_webhooks(arguments)
+            elif tool_name == "generate_invoices_from_time":
+                result = await self._handle_generate_invoices_from_time(arguments)
+            elif tool_name == "get_outbox_status":
+                result = await self._handle_get_outbox_status(arguments)
+            elif tool_name == "get_request_metrics":
+                result = await self._handle_get_request_metrics()
             elif tool_name == "create_client":
                 result = await self._handle_create_client(arguments)
             elif tool_name == "create_invoice":
@@ -493,6 +1323,16 @@ class FreshBooksSimpleOAuthMCPServer:
                     ]
                 }
             }
+        except Overloaded as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {
+                    "code": -32603,
+                    "message": str(e),
+                    "data": {"retryable": True, "retry_after": e.retry_after}
+                }
+            }
         except Exception as e:
             return {
                 "jsonrpc": "2.0",
@@ -524,37 +1364,14 @@ class FreshBooksSimpleOAuthMCPServer:
             self.callback_server.auth_code = None
             self.callback_server.auth_error = None
             
-            # Create SSL context with self-signed certificate
-            context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            # Generate a temporary self-signed certificate
-            cert_file = tempfile.NamedTemporaryFile(mode='w', suffix='.pem', delete=False)
-            key_file = tempfile.NamedTemporaryFile(mode='w', suffix='.pem', delete=False)
-            
-            try:
-                # Generate self-signed certificate using openssl
-                subprocess.run([
-                    'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-keyout', key_file.name,
-                    '-out', cert_file.name, '-days', '1', '-nodes', '-subj', '/CN=localhost'
-                ], check=True, capture_output=True)
-                
-                context.load_cert_chain(cert_file.name, key_file.name)
-                self.callback_server.socket = context.wrap_socket(self.callback_server.socket, server_side=True)
-                
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                # Fallback: create a simple SSL context without certificate
-                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-                # This will cause a certificate warning but should work
-                self.callback_server.socket = context.wrap_socket(self.callback_server.socket, server_side=True)
+            # Serve the callback over TLS with the cached self-signed certificate
+            context = callback_ssl_context()
+            self.callback_server.socket = context.wrap_socket(self.callback_server.socket, server_side=True)
             
             # Start server in background thread
-            server_thread = threading.Thread(target=self.callback_server.serve_forever)
-            server_thread.daemon = True
-            server_thread.start()
+            self.callback_thread = threading.Thread(target=self.callback_server.serve_forever)
+            self.callback_thread.daemon = True
+            self.callback_thread.start()
             
             # Get authorization URL
             auth_url = await self.freshbooks_client.start_oauth_flow()
@@ -581,13 +1398,13 @@ class FreshBooksSimpleOAuthMCPServer:
                     
                     # Save token for future use
                     self._save_token(
-                        token_response['access_token'],
+                        token_response,
                         self.freshbooks_client.account_id,
                         self.freshbooks_client.business_id
                     )
                     
                     # Stop callback server
-                    self.callback_server.shutdown()
+                    self._stop_callback_server()
                     
                     return {
                         "success": "Authentication successful!",
@@ -599,7 +1416,7 @@ class FreshBooksSimpleOAuthMCPServer:
                 
                 elif self.callback_server.auth_error:
                     # Stop callback server
-                    self.callback_server.shutdown()
+                    self._stop_callback_server()
                     
                     return {
                         "error": f"Authentication failed: {self.callback_server.auth_error}"
@@ -608,7 +1425,7 @@ class FreshBooksSimpleOAuthMCPServer:
                 await asyncio.sleep(1)
             
             # Timeout
-            self.callback_server.shutdown()
+            self._stop_callback_server()
             
             return {
                 "error": "Authentication timeout. Please try again."
@@ -616,32 +1433,48 @@ class FreshBooksSimpleOAuthMCPServer:
             
         except Exception as e:
             if self.callback_server:
-                self.callback_server.shutdown()
+                self._stop_callback_server()
             
             return {"error": str(e)}
     
+    def _stop_callback_server(self):
+        """Stop the callback server and release its port."""
+        if self.callback_thread and self.callback_thread.is_alive():
+            self.callback_server.shutdown()
+        self.callback_server.server_close()
+        self.callback_thread = None
+    
     async def _ensure_authenticated(self) -> bool:
         """Ensure we have a valid access token."""
-        # Try to load existing token
-        token_data = self._load_token()
-        if token_data:
-            # Initialize client if not already done
-            if not self.freshbooks_client:
-                client_id = os.getenv("FRESHBOOKS_CLIENT_ID")
-                client_secret = os.getenv("FRESHBOOKS_CLIENT_SECRET")
-                
-                if not client_id or not client_secret:
-                    return False
-                
-                self.freshbooks_client = FreshBooksOAuthClient(client_id, client_secret)
+        # Initialize client if not already done
+        if not self.freshbooks_client:
+            client_id = os.getenv("FRESHBOOKS_CLIENT_ID")
+            client_secret = os.getenv("FRESHBOOKS_CLIENT_SECRET")
             
-            # Set the access token
-            await self.freshbooks_client.set_access_token(token_data['access_token'])
-            self.freshbooks_client.account_id = token_data.get('account_id')
-            self.freshbooks_client.business_id = token_data.get('business_id')
-            return True
+            if not client_id or not client_secret:
+                return False
+            
+            self.freshbooks_client = FreshBooksOAuthClient(client_id, client_secret)
         
-        return False
+        # Load the shared token, refreshing it if this process wins the lock
+        token_data = await self.token_store.get_valid_token(self.freshbooks_client.refresh_access_token)
+        if not token_data:
+            return False
+        
+        if token_data['access_token'] != self.freshbooks_client.access_token:
+            await self.freshbooks_client.set_access_token(token_data['access_token'])
+        self.freshbooks_client.account_id = token_data.get('account_id')
+        self.freshbooks_client.business_id = token_data.get('business_id')
+        return True
+    
+    def _list_options(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract list tool options from tool arguments."""
+        return {
+            "fields": arguments.get("fields"),
+            "filters": arguments.get("filters"),
+            "max_pages": arguments.get("max_pages", 1),
+            "include": arguments.get("include"),
+        }
     
     async def _handle_get_identity(self) -> Dict[str, Any]:
         """Handle get identity request."""
@@ -650,121 +1483,470 @@ class FreshBooksSimpleOAuthMCPServer:
         
         return await self.freshbooks_client.get_identity()
     
-    async def _handle_get_clients(self) -> Dict[str, Any]:
+    async def _handle_get_clients(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get clients request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.get_clients()
+        return await self.freshbooks_client.get_clients(**self._list_options(arguments))
     
-    async def _handle_get_invoices(self) -> Dict[str, Any]:
+    async def _handle_search_clients(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle search clients request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        return await self.freshbooks_client.search_clients(
+            query=arguments.get("query", ""),
+            limit=arguments.get("limit", DEFAULT_LIMIT)
+        )
+    
+    async def _handle_get_invoices(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get invoices request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.get_invoices()
+        return await self.freshbooks_client.get_invoices(**self._list_options(arguments))
     
-    async def _handle_get_projects(self) -> Dict[str, Any]:
+    async def _handle_get_projects(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get projects request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.get_projects()
+        return await self.freshbooks_client.get_projects(**self._list_options(arguments))
     
-    async def _handle_get_expenses(self) -> Dict[str, Any]:
+    async def _handle_get_expenses(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get expenses request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.get_expenses()
+        return await self.freshbooks_client.get_expenses(**self._list_options(arguments))
     
-    async def _handle_get_time_entries(self) -> Dict[str, Any]:
+    async def _handle_get_time_entries(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get time entries request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.get_time_entries()
+        return await self.freshbooks_client.get_time_entries(**self._list_options(arguments))
     
-    async def _handle_create_client(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle create client request."""
+    async def _handle_get_changes_since(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle get changes since request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        try:
+            return await self.freshbooks_client.changes_since(
+                resource=arguments.get("resource"),
+                since=arguments.get("since"),
+                sync_token=arguments.get("sync_token"),
+                fields=arguments.get("fields")
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    async def _handle_export_resource(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle export resource request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        try:
+            return await self.freshbooks_client.export_resource(
+                arguments.get("resource"),
+                export_path(arguments.get("output", "")),
+                fmt=arguments.get("format"),
+                fields=arguments.get("fields"),
+                filters=arguments.get("filters"),
+                resume=arguments.get("resume", True)
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    async def _handle_lookup_record(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle lookup record request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        return await self.freshbooks_client.lookup_record(arguments.get("resource"), arguments.get("id"))
+    
+    async def _handle_aggregate(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle aggregate request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.create_client(
-            first_name=arguments.get("first_name"),
-            last_name=arguments.get("last_name"),
-            email=arguments.get("email"),
-            phone=arguments.get("phone"),
-            address=arguments.get("address"),
-            city=arguments.get("city"),
-            state=arguments.get("state"),
-            country=arguments.get("country"),
-            postal_code=arguments.get("postal_code")
+        try:
+            return await self.freshbooks_client.aggregate(
+                arguments.get("resource"),
+                metric=arguments.get("metric", "count"),
+                column=arguments.get("column"),
+                group_by=arguments.get("group_by"),
+                where=arguments.get("where")
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    async def _extract(self, tool_name: str, text: str) -> Dict[str, Any]:
+        """Run the argument extractor, resolving client names when authenticated."""
+        client_index = None
+        if tool_name != "create_client" and await self._ensure_authenticated() and self.freshbooks_client.account_id:
+            await self.freshbooks_client.ensure_client_index()
+            client_index = self.freshbooks_client.client_index
+        return extract_arguments(tool_name, text, client_index)
+    
+    async def _merge_text_arguments(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill arguments missing from a create call out of its ``text`` argument.
+        
+        Returns the merged arguments, or an error dict naming the required
+        arguments that are still missing.
+        """
+        if not arguments.get("text"):
+            return arguments
+        extracted = await self._extract(tool_name, arguments["text"])
+        merged = dict(extracted["arguments"])
+        merged.update({key: value for key, value in arguments.items() if key != "text" and value is not None})
+        missing = [field for field in REQUIRED[tool_name] if merged.get(field) is None]
+        if missing:
+            error = {"error": f"Could not determine: {', '.join(missing)}", "missing": missing, "arguments": merged}
+            for key in ("client_name", "client_candidates"):
+                if key in extracted:
+                    error[key] = extracted[key]
+            return error
+        return merged
+    
+    async def _preflight(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and normalize create arguments before anything is sent.
+        
+        Returns the normalized arguments, or an error dict listing every
+        invalid field.
+        """
+        normalized, errors = validate(tool_name, arguments)
+        if not errors and "client_id" in normalized:
+            problem = await self.freshbooks_client.check_client(normalized["client_id"])
+            if problem:
+                errors.append({"field": "client_id", "message": problem})
+        if errors:
+            return {"error": describe_errors(errors), "invalid": errors}
+        return normalized
+    
+    async def _handle_extract_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle extract arguments request."""
+        return await self._extract(arguments.get("tool_name"), arguments.get("text", ""))
+    
+    async def _handle_register_webhooks(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle register webhooks request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        result = await self.freshbooks_client.register_webhooks(arguments.get("uri"), arguments.get("events"))
+        if self.webhook_listener is None:
+            result["warning"] = "FRESHBOOKS_WEBHOOK_PORT is not set, so this server is not listening for events"
+        return result
+    
+    async def _on_webhook(self, event: WebhookEvent):
+        """Apply a verified webhook event once authenticated."""
+        if await self._ensure_authenticated():
+            await self.freshbooks_client.apply_event(event)
+    
+    def _enqueue(self, tool_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a create in the outbox and make sure it is being drained."""
+        if self.outbox is None:
+            self.outbox = Outbox()
+        local_id = self.outbox.enqueue(self.freshbooks_client.account_id, tool_name, payload)
+        self._start_outbox_drainer()
+        return {"local_id": local_id, "status": "queued"}
+    
+    def _start_outbox_drainer(self):
+        """Drain the outbox of the authenticated account in the background."""
+        if self._outbox_drainer is not None and not self._outbox_drainer.done():
+            return
+        self._outbox_drainer = detached(self._drain_outbox())
+    
+    async def _drain_outbox(self):
+        async def send(tool_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+            if not await self._ensure_authenticated():
+                return {"error": "Not authenticated. Please call 'authenticate' first."}
+            return await getattr(self.freshbooks_client, tool_name)(**payload)
+        
+        await self.outbox.drain(
+            self.freshbooks_client.account_id, send, self.freshbooks_client.find_created, self.write_limiter
         )
     
-    async def _handle_create_invoice(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle create invoice request."""
+    async def _handle_generate_invoices_from_time(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle generate invoices from time request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.create_invoice(
-            client_id=arguments.get("client_id"),
-            lines=arguments.get("lines"),
+        return await self.freshbooks_client.generate_invoices_from_time(
+            start_date=arguments.get("start_date"),
+            end_date=arguments.get("end_date"),
+            client_ids=arguments.get("client_ids"),
+            default_rate=arguments.get("default_rate"),
             date=arguments.get("date"),
             due_date=arguments.get("due_date"),
-            notes=arguments.get("notes")
+            dry_run=arguments.get("dry_run", True),
+            concurrency=arguments.get("concurrency", DEFAULT_CONCURRENCY),
+            limiter=self.write_limiter
         )
     
+    async def _handle_get_outbox_status(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle get outbox status request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        if self.outbox is None:
+            self.outbox = Outbox()
+        local_id = arguments.get("local_id")
+        if local_id:
+            item = self.outbox.get(local_id)
+            return item if item is not None else {"error": f"No queued create with local id {local_id}"}
+        account_id = self.freshbooks_client.account_id
+        return {
+            "counts": self.outbox.counts(account_id),
+            "items": self.outbox.items(account_id, status=arguments.get("status"), limit=arguments.get("limit", 50)),
+        }
+    
+    async def _handle_get_request_metrics(self) -> Dict[str, Any]:
+        """Handle get request metrics request."""
+        if not self.freshbooks_client:
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        return {**self.freshbooks_client.transport.stats(), "hedging": self.freshbooks_client.hedging.stats()}
+    
+    async def _handle_create_client(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle create client request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        arguments = await self._merge_text_arguments("create_client", arguments)
+        if "error" in arguments:
+            return arguments
+        arguments = await self._preflight("create_client", arguments)
+        if "error" in arguments:
+            return arguments
+        
+        payload = {
+            "first_name": arguments.get("first_name"),
+            "last_name": arguments.get("last_name"),
+            "email": arguments.get("email"),
+            "phone": arguments.get("phone"),
+            "address": arguments.get("address"),
+            "city": arguments.get("city"),
+            "state": arguments.get("state"),
+            "country": arguments.get("country"),
+            "postal_code": arguments.get("postal_code"),
+            "allow_duplicate": bool(arguments.get("allow_duplicate"))
+        }
+        if arguments.get("queue"):
+            return self._enqueue("create_client", payload)
+        return await self.freshbooks_client.create_client(**payload)
+    
+    async def _handle_create_invoice(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle create invoice request."""
+        if not await self._ensure_authenticated():
+            return {"error": "Not authenticated. Please call 'authenticate' first."}
+        
+        arguments = await self._merge_text_arguments("create_invoice", arguments)
+        if "error" in arguments:
+            return arguments
+        arguments = await self._preflight("create_invoice", arguments)
+        if "error" in arguments:
+            return arguments
+        
+        payload = {
+            "client_id": arguments.get("client_id"),
+            "lines": arguments.get("lines"),
+            "date": arguments.get("date"),
+            "due_date": arguments.get("due_date"),
+            "notes": arguments.get("notes"),
+            "allow_duplicate": bool(arguments.get("allow_duplicate"))
+        }
+        if arguments.get("queue"):
+            result = self._enqueue("create_invoice", payload)
+        else:
+            result = await self.freshbooks_client.create_invoice(**payload)
+        if "error" not in result:
+            result["computed_total"] = arguments["total"]
+        return result
+    
     async def _handle_create_project(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Handle create project request."""
         if not await self._ensure_authenticated():
             return {"error": "Not authenticated. Please call 'authenticate' first."}
         
-        return await self.freshbooks_client.create_project(
-            name=arguments.get("name"),
-            client_id=arguments.get("client_id"),
-            description=arguments.get("description"),
-            bill_method=arguments.get("bill_method", "project_rate"),
-            rate=arguments.get("rate")
-        )
+        arguments = await self._merge_text_arguments("create_project", arguments)
+        if "error" in arguments:
+            return arguments
+        arguments = await self._preflight("create_project", arguments)
+        if "error" in arguments:
+            return arguments
+        
+        payload = {
+            "name": arguments.get("name"),
+            "client_id": arguments.get("client_id"),
+            "description": arguments.get("description"),
+            "bill_method": arguments.get("bill_method", "project_rate"),
+            "rate": arguments.get("rate"),
+            "allow_duplicate": bool(arguments.get("allow_duplicate"))
+        }
+        if arguments.get("queue"):
+            return self._enqueue("create_project", payload)
+        return await self.freshbooks_client.create_project(**payload)
+    
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        if method == "initialize":
+            return await self.handle_initialize(request)
+        if method == "tools/list":
+            return await self.handle_list_tools(request)
+        if method == "tools/call":
+            params = request.get("params", {})
+            if params.get("name") in READ_ONLY_TOOLS and progress_token(request) is None:
+                key = json.dumps([params.get("name"), params.get("arguments", {})], sort_keys=True, default=str)
+                response = await self.single_flight.run(key, lambda: self._call_tool(request))
+                return dict(response, id=request.get("id"))
+            return await self._call_tool(request)
+        return {
+            "jsonrpc": "2.0",
+            "id": request.get("id"),
+            "error": {
+                "code": -32601,
+                "message": f"Unknown method: {method}"
+            }
+        }
+    
+    async def _call_tool(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        tool_name = request.get("params", {}).get("name")
+        try:
+            with reporting(progress_token(request), self._send_response):
+                return await with_deadline(tool_name, self.handle_call_tool(request))
+        except DeadlineExceeded as e:
+            return {
+                "jsonrpc": "2.0",
+                "id": request.get("id"),
+                "error": {
+                    "code": -32603,
+                    "message": str(e)
+                }
+            }
+    
+    @staticmethod
+    def _invalid(request_id: Any = None, message: str = "Invalid Request", code: int = -32600) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+    
+    async def _respond_batch(self, batch: List[Any]):
+        """Run a JSON-RPC batch concurrently and send its responses as one array."""
+        if not batch:
+            self._send_response(self._invalid())
+            return
+        responses: List[Dict[str, Any]] = []
+        calls = []
+        for request in batch:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                responses.append(self._invalid(request.get("id") if isinstance(request, dict) else None))
+            elif request["method"] == "notifications/cancelled":
+                self._cancel(request.get("params") or {})
+            elif "id" in request and request["id"] in self._in_flight:
+                # Answers to the same id could not be told apart
+                responses.append(self._invalid(request["id"], "Duplicate request id"))
+            elif "id" in request:
+                task = asyncio.create_task(self._dispatch(request))
+                self._in_flight[request["id"]] = task
+                calls.append((request["id"], task))
+        results = await asyncio.gather(*(task for _, task in calls), return_exceptions=True)
+        for (request_id, _), result in zip(calls, results):
+            self._in_flight.pop(request_id, None)
+            if isinstance(result, asyncio.CancelledError):
+                # Cancelled by the client, which expects no response
+                continue
+            if isinstance(result, BaseException):
+                result = {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32000, "message": f"Server internal error: {result}"}}
+            responses.append(result)
+        if responses:
+            self._send_response(responses)
+    
+    async def _respond(self, request: Dict[str, Any]):
+        request_id = request.get("id")
+        try:
+            response = await self._dispatch(request)
+        except asyncio.CancelledError:
+            # Cancelled by the client, which expects no response
+            return
+        except Exception as e:
+            self._send_error(f"Server internal error: {e}", request_id)
+            return
+        finally:
+            self._in_flight.pop(request_id, None)
+        self._send_response(response)
+    
+    def _cancel(self, params: Dict[str, Any]):
+        task = self._in_flight.get(params.get("requestId"))
+        if task is not None:
+            task.cancel()
     
     async def run(self):
         """Run the MCP server."""
+        self.stdio = StdioTransport()
+        await self.stdio.start()
+        self.webhook_listener = listener_from_env(self._on_webhook)
+        if self.webhook_listener is not None:
+            self.webhook_listener.start()
+        # Resume creates a previous run queued but did not finish sending
+        if await self._ensure_authenticated() and self.freshbooks_client.account_id:
+            self.outbox = Outbox()
+            if self.outbox.pending(self.freshbooks_client.account_id):
+                self._start_outbox_drainer()
+        
+        # Requests run as tasks so a slow call does not hold up the ones
+        # behind it and a notifications/cancelled can stop it
         while True:
             try:
-                line = await asyncio.to_thread(sys.stdin.readline)
+                try:
+                    line = await self.stdio.readline()
+                except ValueError as e:
+                    self._send_error(f"Request too large: {e}")
+                    continue
                 if not line:
                     break
                 
-                request = json.loads(line.strip())
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    self._send_response(self._invalid(message="Parse error", code=-32700))
+                    continue
+                if isinstance(request, list):
+                    task = asyncio.create_task(self._respond_batch(request))
+                    self._batches.add(task)
+                    task.add_done_callback(self._batches.discard)
+                    continue
+                if not isinstance(request, dict):
+                    self._send_response(self._invalid())
+                    continue
                 method = request.get("method")
                 
-                if method == "initialize":
-                    response = await self.handle_initialize(request)
-                elif method == "initialized":
-                    # No response needed for initialized notification
+                if method == "notifications/cancelled":
+                    self._cancel(request.get("params") or {})
+                elif "id" not in request:
+                    # No response is due for other notifications (initialized, ...)
                     continue
-                elif method == "tools/list":
-                    response = await self.handle_list_tools(request)
-                elif method == "tools/call":
-                    response = await self.handle_call_tool(request)
+                elif not isinstance(method, str):
+                    self._send_response(self._invalid(request["id"]))
+                elif request["id"] in self._in_flight:
+                    # Answers to the same id could not be told apart
+                    self._send_response(self._invalid(request["id"], "Duplicate request id"))
                 else:
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request.get("id"),
-                        "error": {
-                            "code": -32601,
-                            "message": f"Unknown method: {method}"
-                        }
-                    }
-                
-                self._send_response(response)
+                    self._in_flight[request["id"]] = asyncio.create_task(self._respond(request))
                 
-            except json.JSONDecodeError:
-                continue
             except Exception as e:
                 self._send_error(f"Server internal error: {e}")
-
+        
+        # Answer what is still running before shutting down
+        if self._in_flight or self._batches:
+            await asyncio.gather(*self._in_flight.values(), *self._batches, return_exceptions=True)
+        if self.webhook_listener is not None:
+            self.webhook_listener.stop()
+        if self._outbox_drainer is not None:
+            self._outbox_drainer.cancel()
+        await self.stdio.close()
 
 async def main():
     """Main entry point."""
@@ -0,0 +1,452 @@
+"""Memory-mapped columnar snapshots of an account's list resources.
+
+A snapshot keeps the columns tools aggregate and look up on (ids, foreign
+keys, dates, amounts, statuses and the client search fields) for every
+resource of one account in a single file. Each column is a packed array, so
+a new process maps the file and reads values straight out of the page cache
+without decoding anything; rows are sorted by id for binary-search lookups.
+
+File layout: the magic, a little-endian ``uint32`` header length, a JSON
+header (tables, row counts, column offsets, code dictionaries, sync tokens),
+then 8-byte aligned column data. Column kinds:
+
+- ``int``: ``int64``, missing values stored as ``INT_NULL``
+- ``float``: ``float64``, missing values stored as NaN
+- ``date``: ``int32`` ``YYYYMMDD``, 0 when missing
+- ``code``: ``uint16`` index into the column's dictionary, 0 when missing
+- ``str``: ``uint32`` end offsets into a UTF-8 blob; missing text reads back as ``""``
+"""
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from freshbooks_mcp.paths import state_path
+
+MAGIC = b"FBSNAP01"
+INT_NULL = -(1 << 63)
+# Seconds before a mapped snapshot is refreshed in the background
+DEFAULT_MAX_AGE = float(os.getenv("FRESHBOOKS_SNAPSHOT_MAX_AGE", "600"))
+
+_TYPECODES = {"int": "q", "float": "d", "date": "i", "code": "H"}
+
+# Resource -> column -> (kind, dotted source field)
+SCHEMAS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "clients": {
+        "id": ("int", "id"),
+        "organization": ("str", "organization"),
+        "fname": ("str", "fname"),
+        "lname": ("str", "lname"),
+        "email": ("str", "email"),
+        "currency_code": ("code", "currency_code"),
+        "vis_state": ("int", "vis_state"),
+    },
+    "invoices": {
+        "id": ("int", "id"),
+        "customerid": ("int", "customerid"),
+        "invoice_number": ("str", "invoice_number"),
+        "create_date": ("date", "create_date"),
+        "due_date": ("date", "due_date"),
+        "amount": ("float", "amount.amount"),
+        "outstanding": ("float", "outstanding.amount"),
+        "currency_code": ("code", "currency_code"),
+        "v3_status": ("code", "v3_status"),
+        "payment_status": ("code", "payment_status"),
+        "vis_state": ("int", "vis_state"),
+    },
+    "projects": {
+        "id": ("int", "id"),
+        "client_id": ("int", "client_id"),
+        "title": ("str", "title"),
+        "billing_method": ("code", "billing_method"),
+        "rate": ("float", "rate"),
+        "active": ("code", "active"),
+        "complete": ("code", "complete"),
+    },
+    "expenses": {
+        "id": ("int", "id"),
+        "clientid": ("int", "clientid"),
+        "projectid": ("int", "projectid"),
+        "categoryid": ("int", "categoryid"),
+        "date": ("date", "date"),
+        "amount": ("float", "amount.amount"),
+        "currency_code": ("code", "amount.code"),
+        "vendor": ("str", "vendor"),
+        "vis_state": ("int", "vis_state"),
+    },
+    "time_entries": {
+        "id": ("int", "id"),
+        "client_id": ("int", "client_id"),
+        "project_id": ("int", "project_id"),
+        "started_at": ("date", "started_at"),
+        "duration": ("int", "duration"),
+        "billable": ("code", "billable"),
+        "billed": ("code", "billed"),
+    },
+}
+
+NUMERIC_KINDS = ("int", "float")
+METRICS = ("count", "sum", "avg", "min", "max")
+
+
+def snapshot_path(account_id: str) -> str:
+    """Return the snapshot file of ``account_id``."""
+    return state_path(f"snapshot-{account_id}.fbsnap")
+
+
+def _lookup(record: Dict[str, Any], dotted: str) -> Any:
+    value: Any = record
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return INT_NULL
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _to_date(value: Any) -> int:
+    if not isinstance(value, str) or len(value) < 10:
+        return 0
+    try:
+        return int(value[0:4] + value[5:7] + value[8:10])
+    except ValueError:
+        return 0
+
+
+def _code_value(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def to_row(resource: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Project an API record onto the snapshot columns of ``resource``."""
+    return {column: _lookup(record, source) for column, (_, source) in SCHEMAS[resource].items()}
+
+
+def _encode_column(kind: str, values: List[Any], blobs: List[bytes]) -> Tuple[bytes, Dict[str, Any]]:
+    spec: Dict[str, Any] = {"kind": kind}
+    if kind == "int":
+        data = array("q", (_to_int(v) for v in values))
+    elif kind == "float":
+        data = array("d", (_to_float(v) for v in values))
+    elif kind == "date":
+        data = array("i", (_to_date(v) for v in values))
+    elif kind == "code":
+        dictionary: Dict[str, int] = {}
+        codes = array("H")
+        for value in values:
+            value = _code_value(value)
+            codes.append(0 if value is None else dictionary.setdefault(value, len(dictionary) + 1))
+        if len(dictionary) >= 1 << 16:
+            raise ValueError("Too many distinct values for a code column")
+        spec["values"] = list(dictionary)
+        data = codes
+    else:
+        ends = array("I")
+        blob = bytearray()
+        for value in values:
+            if value is not None:
+                blob += str(value).encode("utf-8")
+            ends.append(len(blob))
+        blobs.append(bytes(blob))
+        data = ends
+    return data.tobytes(), spec
+
+
+def write_snapshot(
+    path: str,
+    account_id: str,
+    tables: Dict[str, Iterable[Dict[str, Any]]],
+    tokens: Optional[Dict[str, str]] = None,
+    created_at: Optional[float] = None,
+):
+    """Atomically write ``tables`` (resource -> rows in column space) to ``path``."""
+    header: Dict[str, Any] = {
+        "account_id": account_id,
+        "created_at": created_at or time.time(),
+        "byteorder": sys.byteorder,
+        "tokens": tokens or {},
+        "tables": {},
+    }
+    chunks: List[Tuple[Dict[str, Any], str, bytes]] = []
+    for resource, rows in tables.items():
+        rows = sorted((row for row in rows if _to_int(row.get("id")) != INT_NULL), key=lambda row: int(row["id"]))
+        table = header["tables"][resource] = {"rows": len(rows), "columns": {}}
+        for column, (kind, _) in SCHEMAS[resource].items():
+            blobs: List[bytes] = []
+            data, spec = _encode_column(kind, [row.get(column) for row in rows], blobs)
+            table["columns"][column] = spec
+            chunks.append((spec, "offset", data))
+            for blob in blobs:
+                chunks.append((spec, "blob", blob))
+
+    # Offsets depend on the header length, which depends on the offsets
+    base = 0
+    while True:
+        position = base
+        for spec, key, data in chunks:
+            position += -position % 8
+            spec[key] = position
+            spec[key + "_length"] = len(data)
+            position += len(data)
+        encoded = json.dumps(header, separators=(",", ":")).encode()
+        start = len(MAGIC) + 4 + len(encoded)
+        start += -start % 8
+        if start <= base:
+            break  # any gap before the first column is zero-filled
+        base = start
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+            for spec, key, data in chunks:
+                f.write(b"\0" * (spec[key] - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class Snapshot:
+    """A mapped snapshot file; columns are zero-copy views into the mapping."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a snapshot")
+        (length,) = struct.unpack_from("<I", self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(view[start:start + length]))
+        if self.header.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{path} was written on a {self.header.get('byteorder')}-endian machine")
+        self._view = view
+        self._columns: Dict[Tuple[str, str], Any] = {}
+
+    @classmethod
+    def open(cls, path: str) -> Optional["Snapshot"]:
+        """Map ``path``, or return None if it is missing or unreadable."""
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def created_at(self) -> float:
+        return self.header["created_at"]
+
+    @property
+    def tokens(self) -> Dict[str, str]:
+        return self.header.get("tokens", {})
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def resources(self) -> List[str]:
+        return list(self.header["tables"])
+
+    def count(self, resource: str) -> int:
+        table = self.header["tables"].get(resource)
+        return table["rows"] if table else 0
+
+    def _spec(self, resource: str, column: str) -> Dict[str, Any]:
+        try:
+            return self.header["tables"][resource]["columns"][column]
+        except KeyError:
+            raise ValueError(f"Unknown column {resource}.{column}") from None
+
+    def column(self, resource: str, column: str):
+        """Return the raw packed values of a column (for ``str`` columns, the end offsets)."""
+        key = (resource, column)
+        values = self._columns.get(key)
+        if values is None:
+            spec = self._spec(resource, column)
+            typecode = _TYPECODES.get(spec["kind"], "I")
+            raw = self._view[spec["offset"]:spec["offset"] + spec["offset_length"]]
+            values = self._columns[key] = raw.cast(typecode)
+        return values
+
+    def value(self, resource: str, column: str, i: int) -> Any:
+        """Decode the value of row ``i``."""
+        spec = self._spec(resource, column)
+        raw = self.column(resource, column)[i]
+        kind = spec["kind"]
+        if kind == "int":
+            return None if raw == INT_NULL else raw
+        if kind == "float":
+            return None if math.isnan(raw) else raw
+        if kind == "date":
+            return f"{raw // 10000:04d}-{raw // 100 % 100:02d}-{raw % 100:02d}" if raw else None
+        if kind == "code":
+            return spec["values"][raw - 1] if raw else None
+        begin = self.column(resource, column)[i - 1] if i else 0
+        blob = spec["blob"]
+        return str(self._view[blob + begin:blob + raw], "utf-8")
+
+    def row(self, resource: str, i: int) -> Dict[str, Any]:
+        return {column: self.value(resource, column, i) for column in self.header["tables"][resource]["columns"]}
+
+    def values(self, resource: str, column: str) -> List[Any]:
+        """Decode a whole column."""
+        spec = self._spec(resource, column)
+        packed = self.column(resource, column)
+        kind = spec["kind"]
+        if kind == "int":
+            return [None if raw == INT_NULL else raw for raw in packed]
+        if kind == "float":
+            return [None if math.isnan(raw) else raw for raw in packed]
+        if kind == "date":
+            return [f"{raw // 10000:04d}-{raw // 100 % 100:02d}-{raw % 100:02d}" if raw else None for raw in packed]
+        if kind == "code":
+            labels = [None] + spec["values"]
+            return [labels[raw] for raw in packed]
+        blob = bytes(self._view[spec["blob"]:spec["blob"] + spec["blob_length"]]).decode("utf-8")
+        if len(blob) != spec["blob_length"]:
+            # Offsets count bytes; fall back to slicing the bytes for non-ASCII text
+            return [self.value(resource, column, i) for i in range(len(packed))]
+        begin = 0
+        decoded = []
+        for end in packed:
+            decoded.append(blob[begin:end])
+            begin = end
+        return decoded
+
+    def rows(self, resource: str) -> Iterator[Dict[str, Any]]:
+        """Decode every row, column by column."""
+        if not self.count(resource):
+            return
+        names = list(self.header["tables"][resource]["columns"])
+        for values in zip(*(self.values(resource, name) for name in names)):
+            yield dict(zip(names, values))
+
+    def find(self, resource: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Look a row up by id (binary search over the sorted id column)."""
+        if not self.count(resource):
+            return None
+        ids = self.column(resource, "id")
+        target = _to_int(record_id)
+        i = bisect_left(ids, target)
+        if i < len(ids) and ids[i] == target:
+            return self.row(resource, i)
+        return None
+
+    def _matcher(self, resource: str, where: Dict[str, Any]):
+        """Translate equality filters into (packed column, packed value) pairs."""
+        tests = []
+        for column, expected in where.items():
+            spec = self._spec(resource, column)
+            kind = spec["kind"]
+            if kind == "code":
+                expected = _code_value(expected)
+                packed = spec["values"].index(expected) + 1 if expected in spec["values"] else -1
+            elif kind == "date":
+                packed = _to_date(expected)
+            elif kind == "int":
+                packed = _to_int(expected)
+            elif kind == "float":
+                packed = _to_float(expected)
+            else:
+                raise ValueError(f"Cannot filter on text column {column}")
+            tests.append((self.column(resource, column), packed))
+        return tests
+
+    def aggregate(
+        self,
+        resource: str,
+        metric: str = "count",
+        column: Optional[str] = None,
+        group_by: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+    ) -> Dict[Any, Any]:
+        """Compute ``metric`` of ``column`` over rows matching ``where``, per ``group_by`` value."""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if metric != "count":
+            if column is None or self._spec(resource, column)["kind"] not in NUMERIC_KINDS:
+                raise ValueError(f"{metric} needs a numeric column of {resource}")
+        tests = self._matcher(resource, where or {})
+        values = self.column(resource, column) if metric != "count" else None
+        null = INT_NULL if values is not None and self._spec(resource, column)["kind"] == "int" else None
+        groups = self.column(resource, group_by) if group_by else None
+        if group_by and self._spec(resource, group_by)["kind"] == "str":
+            raise ValueError(f"Cannot group by text column {group_by}")
+
+        totals: Dict[Any, List[float]] = {}
+        for i in range(self.count(resource)):
+            if tests and not all(packed[i] == expected for packed, expected in tests):
+                continue
+            key = groups[i] if groups is not None else None
+            acc = totals.get(key)
+            if acc is None:
+                acc = totals[key] = [0, 0.0, math.inf, -math.inf]
+            if values is None:
+                acc[0] += 1
+                continue
+            value = values[i]
+            if value == null or value != value:
+                continue
+            acc[0] += 1
+            acc[1] += value
+            acc[2] = min(acc[2], value)
+            acc[3] = max(acc[3], value)
+
+        def finish(acc: List[float]) -> Any:
+            if metric == "count":
+                return acc[0]
+            if not acc[0]:
+                return None
+            return {"sum": acc[1], "avg": acc[1] / acc[0], "min": acc[2], "max": acc[3]}[metric]
+
+        if groups is None:
+            return {"value": finish(totals[None]) if None in totals else (0 if metric == "count" else None)}
+        spec = self._spec(resource, group_by)
+        result = {}
+        for key, acc in totals.items():
+            if spec["kind"] == "code":
+                label = spec["values"][key - 1] if key else None
+            elif spec["kind"] == "date":
+                label = f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}" if key else None
+            else:
+                label = None if key == INT_NULL else key
+            result[str(label)] = finish(acc)
+        return {"groups": result}
+
+    def close(self):
+        for values in self._columns.values():
+            values.release()
+        self._columns.clear()
+        self._view.release()
+        self._map.close()
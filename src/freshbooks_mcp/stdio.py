@@ -0,0 +1,102 @@
+"""Newline-delimited JSON-RPC over stdin/stdout on the event loop.
+
+``StdioTransport`` reads stdin through an asyncio ``StreamReader`` attached
+to the pipe, so waiting for a message costs no thread hop, and lines of up
+to ``FRESHBOOKS_STDIO_LINE_LIMIT`` bytes (default 64 MiB) are accepted.
+``send`` only encodes the message and queues it; a single writer task writes
+whatever has queued up in one call and waits for the pipe to drain, so a
+slow reader on stdout never blocks the event loop and bursts of responses
+and notifications go out in one write.
+
+Where stdin or stdout cannot be attached to the loop (a regular file, or
+Windows consoles and pipes), reads and writes fall back to a worker thread.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import Any, BinaryIO, Dict, List, Optional
+
+DEFAULT_LINE_LIMIT = int(os.getenv("FRESHBOOKS_STDIO_LINE_LIMIT", str(64 * 1024 * 1024)))
+
+
+class StdioTransport:
+    """JSON-RPC message framing over a pair of byte streams (stdin/stdout by default)."""
+
+    def __init__(self, stdin: Optional[BinaryIO] = None, stdout: Optional[BinaryIO] = None, limit: int = DEFAULT_LINE_LIMIT):
+        self.stdin = stdin or sys.stdin.buffer
+        self.stdout = stdout or sys.stdout.buffer
+        self.limit = limit
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: List[bytes] = []
+        self._ready = asyncio.Event()
+        self._closing = False
+        self._writer_task: Optional[asyncio.Task] = None
+        self.frames_written = 0
+        self.writes = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        try:
+            reader = asyncio.StreamReader(limit=self.limit)
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), self.stdin)
+            self._reader = reader
+        except (NotImplementedError, OSError, ValueError):
+            self._reader = None
+        try:
+            transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, self.stdout)
+            self._writer = asyncio.StreamWriter(transport, protocol, None, loop)
+        except (NotImplementedError, OSError, ValueError):
+            self._writer = None
+        self._writer_task = asyncio.create_task(self._write_loop())
+
+    async def readline(self) -> bytes:
+        """The next line from stdin, or ``b""`` at end of input.
+
+        Raises ``ValueError`` for a line longer than the limit; the line
+        is discarded and reading can continue.
+        """
+        if self._reader is None:
+            return await asyncio.to_thread(self.stdin.readline)
+        return await self._reader.readline()
+
+    def send(self, message: Dict[str, Any]):
+        """Queue ``message`` for the writer task."""
+        if self._writer_task is not None and self._writer_task.done():
+            return
+        self._pending.append(json.dumps(message).encode() + b"\n")
+        self._ready.set()
+
+    async def _write_loop(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if self._pending:
+                data, self._pending = b"".join(self._pending), []
+                self.frames_written += data.count(b"\n")
+                self.writes += 1
+                try:
+                    if self._writer is not None:
+                        self._writer.write(data)
+                        await self._writer.drain()
+                    else:
+                        await asyncio.to_thread(self._write_blocking, data)
+                except ConnectionError:
+                    # The client has gone; nobody is left to answer
+                    self._pending.clear()
+                    return
+            if self._closing and not self._pending:
+                return
+
+    def _write_blocking(self, data: bytes):
+        self.stdout.write(data)
+        self.stdout.flush()
+
+    async def close(self):
+        """Write what is still queued and stop the writer task."""
+        self._closing = True
+        self._ready.set()
+        if self._writer_task is not None:
+            await self._writer_task
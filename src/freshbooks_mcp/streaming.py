@@ -0,0 +1,233 @@
+"""Incremental decoding of FreshBooks list responses.
+
+``RecordStream`` is fed raw response bytes and yields each record of
+``response.result.<resource>`` as soon as it is complete, so callers can
+filter, project or write records without ever holding the whole decoded page.
+Only the small envelope around the record array is scanned in Python; every
+record is decoded by the C JSON decoder. A body without the record array
+(FreshBooks answers some failures with a 200 and an ``errors`` envelope)
+makes ``stream_records`` raise ``UnexpectedResponse`` rather than read as
+an empty page.
+"""
+
+import codecs
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+import httpx
+
+from freshbooks_mcp.progress import report
+from freshbooks_mcp.resources import MAX_PER_PAGE
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",:]}"
+_SCALAR = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+# Consumed text is dropped from the buffer once this many characters pile up
+_TRIM_THRESHOLD = 1 << 16
+
+
+class UnexpectedResponse(ValueError):
+    """A list response without its record array, usually an errors envelope."""
+
+    def __init__(self, resource: str, document: Any):
+        self.resource = resource
+        self.document = document
+        body = document.get("response", document) if isinstance(document, dict) else {}
+        errors = body.get("errors") if isinstance(body, dict) else None
+        if isinstance(errors, list) and errors:
+            detail = "; ".join(str(error.get("message", error)) if isinstance(error, dict) else str(error) for error in errors)
+        elif isinstance(body, dict) and (body.get("error") or body.get("message")):
+            detail = str(body.get("error") or body.get("message"))
+        else:
+            detail = f"no {resource} list in the response"
+        super().__init__(f"FreshBooks did not return {resource}: {detail}")
+
+
+class RecordStream:
+    """Push parser yielding the records of one FreshBooks list response."""
+
+    def __init__(self, resource: str, path: Optional[Sequence[str]] = None):
+        self.target = tuple(path) if path else ("response", "result", resource)
+        # Scalars next to the record array (page, pages, per_page, total)
+        self.meta: Dict[str, Any] = {}
+        # The fully decoded body, set by close() if it had no record array
+        self.document: Any = None
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[list] = []  # [kind, current key] with kind "o" or "a"
+        self._expect_key = False
+        self._in_target = False
+        self._found = False
+
+    @property
+    def found(self) -> bool:
+        """Whether the record array has been seen."""
+        return self._found
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Consume a chunk of the body and return the records it completed."""
+        self._buf += self._utf8.decode(data)
+        return self._scan(final=False)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Finish the body and return any remaining records."""
+        self._buf += self._utf8.decode(b"", final=True)
+        records = self._scan(final=True)
+        if not self._found:
+            self.document = json.loads(self._buf) if self._buf.strip() else None
+        elif self._stack:
+            raise ValueError("Truncated JSON response")
+        return records
+
+    def _on_scalar(self, value: Any):
+        path = tuple(frame[1] for frame in self._stack)
+        if path and path[:-1] == self.target[:-1]:
+            self.meta[path[-1]] = value
+
+    def _scan(self, final: bool) -> List[Dict[str, Any]]:
+        records = []
+        buf, pos, n = self._buf, self._pos, len(self._buf)
+        while True:
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= n:
+                break
+            c = buf[pos]
+
+            if self._in_target:
+                if c == ",":
+                    pos += 1
+                elif c == "]":
+                    self._in_target = False
+                    self._stack.pop()
+                    pos += 1
+                else:
+                    try:
+                        value, end = self._decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break
+                    if (not final and not isinstance(value, (dict, list, str))
+                            and (end == n or buf[end] not in _DELIMITERS)):
+                        break  # a number may continue in the next chunk
+                    records.append(value)
+                    pos = end
+                continue
+
+            if c == "{":
+                self._stack.append(["o", None])
+                self._expect_key = True
+                pos += 1
+            elif c == "[":
+                if not self._found and tuple(frame[1] for frame in self._stack) == self.target:
+                    self._found = self._in_target = True
+                self._stack.append(["a", None])
+                pos += 1
+            elif c in "}]":
+                self._stack.pop()
+                self._expect_key = False
+                pos += 1
+            elif c == ",":
+                self._expect_key = bool(self._stack) and self._stack[-1][0] == "o"
+                pos += 1
+            elif c == ":":
+                pos += 1
+            elif c == '"':
+                try:
+                    text, end = scanstring(buf, pos + 1)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                pos = end
+                if self._expect_key:
+                    self._stack[-1][1] = text
+                    self._expect_key = False
+                else:
+                    self._on_scalar(text)
+            else:
+                end = pos
+                while end < n and buf[end] not in _DELIMITERS:
+                    end += 1
+                if end == n and not final:
+                    break  # the literal may continue in the next chunk
+                token = buf[pos:end]
+                if not _SCALAR.fullmatch(token):
+                    raise ValueError(f"Invalid JSON at offset {pos}")
+                self._on_scalar(json.loads(token))
+                pos = end
+
+        if self._found and pos > _TRIM_THRESHOLD:
+            self._buf, self._pos = buf[pos:], 0
+        else:
+            self._pos = pos
+        return records
+
+
+def project(record: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Keep only ``fields`` of ``record``."""
+    return {field: record[field] for field in fields if field in record}
+
+
+def _lookup(record: Dict[str, Any], dotted: str) -> Any:
+    value: Any = record
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def matches(record: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Check ``record`` against equality ``filters`` (dotted keys allowed)."""
+    for key, expected in filters.items():
+        value = _lookup(record, key)
+        if value != expected and str(value) != str(expected):
+            return False
+    return True
+
+
+async def stream_records(
+    client: httpx.AsyncClient,
+    path: str,
+    resource: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: int = MAX_PER_PAGE,
+    max_pages: Optional[int] = 1,
+    meta: Optional[Dict[str, Any]] = None,
+    start_page: int = 1,
+    timeout: Any = httpx.USE_CLIENT_DEFAULT,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield records of ``resource`` page by page without buffering bodies.
+
+    Reading starts at ``start_page``; ``max_pages`` of ``None`` or ``0``
+    follows every page. When ``meta`` is given it is updated with the
+    pagination fields of the last page read. ``timeout`` overrides the
+    client's timeouts for each request.
+    """
+    page = start_page
+    while True:
+        query = dict(params or {})
+        query.update({"page": page, "per_page": per_page})
+        decoder = RecordStream(resource)
+        async with client.stream("GET", path, params=query, timeout=timeout) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                for record in decoder.feed(chunk):
+                    yield record
+            for record in decoder.close():
+                yield record
+        if not decoder.found:
+            raise UnexpectedResponse(resource, decoder.document)
+        if meta is not None:
+            meta.update(decoder.meta)
+        pages = int(decoder.meta.get("pages") or 1)
+        report(page, pages, f"{resource}: page {page} of {pages}")
+        if page >= pages or (max_pages and page - start_page + 1 >= max_pages):
+            break
+        page += 1
@@ -0,0 +1,150 @@
+"""Shared OAuth token cache for fleets of MCP server processes.
+
+Every server process reads the same token file. Writes go to a temporary file
+that is atomically renamed into place, so readers never observe a torn file.
+Refreshes are serialized through an exclusive ``flock`` on a sidecar lock
+file: the first process to find the token expired performs the refresh while
+the others wait, re-read the file and pick up the new token. Waiting polls
+the lock without blocking, so a cancelled waiter never ends up holding it.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Tokens written before expires_in was recorded are trusted for one hour
+DEFAULT_TOKEN_LIFETIME = 3600
+# Refresh slightly early so requests never race the expiry
+EXPIRY_MARGIN = 60
+# Seconds between attempts to take the refresh lock
+LOCK_POLL_INTERVAL = 0.05
+
+
+class TokenStore:
+    """File-backed token cache with atomic writes and single-flight refresh."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.expanduser("~/.freshbooks_token")
+        self.lock_path = self.path + ".lock"
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_stat: Optional[tuple] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def expires_at(token_data: Dict[str, Any]) -> float:
+        """Return when ``token_data`` stops being usable."""
+        lifetime = token_data.get("expires_in") or DEFAULT_TOKEN_LIFETIME
+        return token_data.get("timestamp", 0) + lifetime
+
+    def is_expired(self, token_data: Dict[str, Any]) -> bool:
+        """Check whether ``token_data`` is expired or about to expire."""
+        return time.time() >= self.expires_at(token_data) - EXPIRY_MARGIN
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the token file, reusing the parsed copy while it is unchanged."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._cached_stat == key:
+            return self._cached
+        try:
+            with open(self.path, 'r') as f:
+                token_data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return None
+        self._cached, self._cached_stat = token_data, key
+        return token_data
+
+    def save(self, token_data: Dict[str, Any]):
+        """Atomically replace the token file with owner-only permissions."""
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".freshbooks_token-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(token_data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _try_acquire(self) -> Optional[int]:
+        """Take the refresh lock if it is free and return its descriptor, else None."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+        return fd
+
+    async def _acquire(self) -> int:
+        """Wait until this process holds the refresh lock.
+
+        Each attempt either takes the lock or leaves nothing open, so
+        cancelling the wait cannot leak it.
+        """
+        while True:
+            fd = self._try_acquire()
+            if fd is not None:
+                return fd
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+    def _release(self, fd: int):
+        """Release the refresh lock."""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    async def get_valid_token(
+        self, refresh: Callable[[str], Awaitable[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Return a usable token, refreshing it if every copy has expired.
+
+        ``refresh`` receives the stored refresh token and must return the
+        FreshBooks token response. Only the process holding the lock calls it.
+        """
+        token_data = self.load()
+        if token_data and not self.is_expired(token_data):
+            return token_data
+        if not token_data or not token_data.get("refresh_token"):
+            return None
+
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            fd = await self._acquire()
+            try:
+                # Another process may have refreshed while we were waiting
+                token_data = self.load()
+                if token_data and not self.is_expired(token_data):
+                    return token_data
+                if not token_data or not token_data.get("refresh_token"):
+                    return None
+
+                token_response = await refresh(token_data["refresh_token"])
+                token_data = dict(token_data)
+                token_data.update({
+                    "access_token": token_response["access_token"],
+                    "refresh_token": token_response.get("refresh_token", token_data["refresh_token"]),
+                    "expires_in": token_response.get("expires_in"),
+                    "timestamp": time.time(),
+                })
+                self.save(token_data)
+                return token_data
+            finally:
+                self._release(fd)
@@ -0,0 +1,231 @@
+"""Pre-flight validation and normalization of create tool arguments.
+
+Each create tool has a field table compiled at import time into a list of
+coercers. ``validate`` runs them over the arguments and returns either the
+normalized arguments or every problem at once, each naming its field
+(``lines[1].unit_cost``), so a bad call is answered without an API round
+trip. Normalization turns numeric strings into numbers, accepts dates in the
+forms the argument extractor understands and rewrites them as ISO dates, and
+gives every invoice line a ``{"amount", "code"}`` unit cost. The invoice
+total is computed locally with ``Decimal``.
+
+Whether a ``client_id`` exists is not known here; callers check it against
+their cached clients.
+"""
+
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from freshbooks_mcp.extractors import DEFAULT_CURRENCY, parse_date
+
+BILL_METHODS = ("project_rate", "task_rate", "staff_rate", "service_rate", "business_rate")
+MAX_LINES = 100
+
+_CENTS = Decimal("0.01")
+_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+_CURRENCY = re.compile(r"[A-Z]{3}")
+
+
+class Invalid(ValueError):
+    """A field value that cannot be coerced; the message is shown to the caller."""
+
+
+class Field(NamedTuple):
+    name: str
+    coerce: Callable[[Any], Any]
+    required: bool = False
+
+
+def _string(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        raise Invalid("must be a string")
+    text = " ".join(str(value).split())
+    if not text:
+        raise Invalid("must not be empty")
+    return text
+
+
+def _email(value: Any) -> str:
+    text = _string(value)
+    if not _EMAIL.fullmatch(text):
+        raise Invalid(f"is not an email address: {text!r}")
+    return text
+
+
+def _integer(value: Any) -> int:
+    if isinstance(value, bool):
+        raise Invalid("must be an integer")
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise Invalid(f"must be an integer, not {value!r}") from None
+    if number != number.to_integral_value() or number <= 0:
+        raise Invalid(f"must be a positive integer, not {value!r}")
+    return int(number)
+
+
+def _decimal(value: Any) -> Decimal:
+    if isinstance(value, bool):
+        raise Invalid("must be a number")
+    try:
+        number = Decimal(str(value).replace(",", "").strip().lstrip("$€£"))
+    except InvalidOperation:
+        raise Invalid(f"must be a number, not {value!r}") from None
+    if not number.is_finite():
+        raise Invalid(f"must be a number, not {value!r}")
+    return number
+
+
+def _non_negative(value: Any) -> float:
+    number = _decimal(value)
+    if number < 0:
+        raise Invalid("must not be negative")
+    return float(number)
+
+
+def _date(value: Any) -> str:
+    parsed = parse_date(str(value)) if isinstance(value, str) else None
+    if parsed is None:
+        raise Invalid(f"is not a date: {value!r} (use YYYY-MM-DD)")
+    return parsed
+
+
+def _bill_method(value: Any) -> str:
+    method = _string(value).lower().replace(" ", "_").replace("-", "_")
+    if method not in BILL_METHODS:
+        raise Invalid(f"must be one of {', '.join(BILL_METHODS)}, not {value!r}")
+    return method
+
+
+def _money(value: Any, path: str, errors: List[Dict[str, str]]) -> Optional[Tuple[Decimal, str]]:
+    code = None
+    if isinstance(value, dict):
+        code = value.get("code")
+        value = value.get("amount")
+    if value is None:
+        errors.append({"field": path, "message": "is required"})
+        return None
+    try:
+        amount = _decimal(value)
+    except Invalid as e:
+        errors.append({"field": path, "message": str(e)})
+        return None
+    code = str(code).strip().upper() if code else DEFAULT_CURRENCY
+    if not _CURRENCY.fullmatch(code):
+        errors.append({"field": f"{path}.code", "message": f"is not a currency code: {code!r}"})
+        return None
+    return amount, code
+
+
+def _line(line: Any, path: str, errors: List[Dict[str, str]]) -> Optional[Tuple[Dict[str, Any], Decimal, str]]:
+    if not isinstance(line, dict):
+        errors.append({"field": path, "message": "must be an object"})
+        return None
+    count = len(errors)
+    name = line.get("name") or line.get("description")
+    if not name or not str(name).strip():
+        errors.append({"field": f"{path}.name", "message": "is required"})
+    try:
+        qty = _decimal(line.get("qty", 1))
+        if qty <= 0:
+            raise Invalid("must be greater than zero")
+    except Invalid as e:
+        errors.append({"field": f"{path}.qty", "message": str(e)})
+        qty = None
+    cost = _money(line.get("unit_cost", line.get("amount")), f"{path}.unit_cost", errors)
+    if len(errors) > count:
+        return None
+    amount, code = cost[0].quantize(_CENTS, ROUND_HALF_UP), cost[1]
+    normalized = {key: value for key, value in line.items() if key not in ("qty", "unit_cost", "amount")}
+    normalized["name"] = " ".join(str(name).split())
+    normalized["qty"] = str(qty.normalize()) if qty == qty.to_integral_value() else str(qty)
+    normalized["unit_cost"] = {"amount": str(amount), "code": code}
+    return normalized, (qty * amount).quantize(_CENTS, ROUND_HALF_UP), code
+
+
+def _lines(value: Any, errors: List[Dict[str, str]]) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, str]]]:
+    """Normalize invoice lines and total them; problems go to ``errors``."""
+    if not isinstance(value, list) or not value:
+        errors.append({"field": "lines", "message": "must be a non-empty list of line items"})
+        return None
+    if len(value) > MAX_LINES:
+        errors.append({"field": "lines", "message": f"has {len(value)} items; at most {MAX_LINES} are allowed"})
+        return None
+    lines, total, codes = [], Decimal(0), set()
+    for i, line in enumerate(value):
+        checked = _line(line, f"lines[{i}]", errors)
+        if checked is not None:
+            normalized, amount, code = checked
+            lines.append(normalized)
+            total += amount
+            codes.add(code)
+    if len(codes) > 1:
+        errors.append({"field": "lines", "message": f"mix currencies {', '.join(sorted(codes))}; use one per invoice"})
+    if len(lines) < len(value) or len(codes) > 1:
+        return None
+    return lines, {"amount": str(total), "code": codes.pop()}
+
+
+FIELDS: Dict[str, List[Field]] = {
+    "create_client": [
+        Field("first_name", _string, True),
+        Field("last_name", _string, True),
+        Field("email", _email),
+        Field("phone", _string),
+        Field("address", _string),
+        Field("city", _string),
+        Field("state", _string),
+        Field("country", _string),
+        Field("postal_code", _string),
+    ],
+    "create_invoice": [
+        Field("client_id", _integer, True),
+        Field("date", _date),
+        Field("due_date", _date),
+        Field("notes", _string),
+    ],
+    "create_project": [
+        Field("name", _string, True),
+        Field("client_id", _integer, True),
+        Field("description", _string),
+        Field("bill_method", _bill_method),
+        Field("rate", _non_negative),
+    ],
+}
+
+
+def validate(tool: str, arguments: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
+    """Coerce the arguments of create ``tool``.
+
+    Returns ``(normalized, errors)``; ``errors`` lists ``{"field",
+    "message"}`` and is empty when the arguments can be sent. Arguments that
+    are not fields of ``tool`` are passed through untouched. For invoices
+    ``normalized["total"]`` holds the locally computed ``{"amount", "code"}``.
+    """
+    normalized = dict(arguments)
+    errors: List[Dict[str, str]] = []
+    for field in FIELDS[tool]:
+        value = arguments.get(field.name)
+        if value is None or value == "":
+            normalized.pop(field.name, None)
+            if field.required:
+                errors.append({"field": field.name, "message": "is required"})
+            continue
+        try:
+            normalized[field.name] = field.coerce(value)
+        except Invalid as e:
+            errors.append({"field": field.name, "message": str(e)})
+    if tool == "create_invoice":
+        checked = _lines(arguments.get("lines"), errors)
+        if checked is not None:
+            normalized["lines"], normalized["total"] = checked
+        date, due_date = normalized.get("date"), normalized.get("due_date")
+        if isinstance(date, str) and isinstance(due_date, str) and due_date < date:
+            errors.append({"field": "due_date", "message": f"{due_date} is before the invoice date {date}"})
+    return normalized, errors
+
+
+def describe_errors(errors: List[Dict[str, str]]) -> str:
+    """One-line summary of ``validate`` errors."""
+    return "Invalid arguments: " + "; ".join(f"{error['field']} {error['message']}" for error in errors)
@@ -0,0 +1,333 @@
+"""Receive FreshBooks webhooks to keep local state fresh without polling.
+
+FreshBooks POSTs form-encoded events (``name=invoice.update&object_id=...``)
+to a registered callback URI. A new callback is first sent a
+``callback.verify`` event carrying a verifier that must be sent back to the
+API; every later event is signed with that verifier in the
+``X-FreshBooks-Hmac-SHA256`` header (base64 HMAC-SHA256 of the JSON-encoded
+event fields). Verifiers are kept in the state directory so restarts and
+sibling processes accept the same callbacks.
+
+``callback.verify`` events are not signed, so a verifier is only taken for
+a callback id that ``register_callbacks`` created and that has not been
+verified yet; verify events for any other id are ignored.
+
+``WebhookListener`` runs a small HTTP server on a thread and hands verified
+events to a coroutine on the server's event loop. Recorded events can be
+replayed against a listener for local testing::
+
+    python -m freshbooks_mcp.webhooks replay http://127.0.0.1:8765/webhooks/freshbooks events.ndjson --secret s3cret
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from freshbooks_mcp.paths import state_path
+from freshbooks_mcp.resources import SINGULAR
+
+SIGNATURE_HEADER = "X-FreshBooks-Hmac-SHA256"
+WEBHOOK_PATH = "/webhooks/freshbooks"
+VERIFY_EVENT = "callback.verify"
+
+# Event noun (``invoice`` in ``invoice.update``) -> list resource
+EVENT_RESOURCES = {noun: resource for resource, noun in SINGULAR.items()}
+DEFAULT_EVENTS = [
+    f"{noun}.{action}" for noun in EVENT_RESOURCES for action in ("create", "update", "delete")
+]
+
+
+class WebhookEvent(NamedTuple):
+    name: str
+    object_id: Optional[str]
+    account_id: Optional[str]
+    fields: Dict[str, str]
+
+    @property
+    def resource(self) -> Optional[str]:
+        """The list resource the event is about, if any."""
+        return EVENT_RESOURCES.get(self.name.rsplit(".", 1)[0])
+
+    @property
+    def action(self) -> str:
+        return self.name.rsplit(".", 1)[-1]
+
+
+def parse_fields(body: bytes, content_type: str = "") -> Dict[str, str]:
+    """Decode an event body (form-encoded, or JSON for recorded events)."""
+    text = body.decode("utf-8")
+    if content_type.startswith("application/json") or text.lstrip().startswith("{"):
+        return {key: str(value) for key, value in json.loads(text).items()}
+    return {key: values[-1] for key, values in urllib.parse.parse_qs(text, keep_blank_values=True).items()}
+
+
+def sign(verifier: str, fields: Dict[str, str]) -> str:
+    """Return the signature FreshBooks sends for ``fields``."""
+    digest = hmac.new(verifier.encode(), json.dumps(fields).encode(), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def _read_json(path: str, default: Any) -> Any:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+
+def _write_json(path: str, data: Any):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".webhook-verifiers-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class VerifierStore:
+    """Callback verifiers shared through a file in the state directory.
+
+    Ids of registered callbacks still waiting for their verifier are kept in
+    a second file next to it. Updates hold an ``flock`` on a sidecar lock
+    file so sibling processes do not lose each other's changes.
+    ``FRESHBOOKS_WEBHOOK_SECRET`` is accepted as an extra verifier, which is
+    what recorded-event replays sign with.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("webhook-verifiers.json")
+        self.pending_path = os.path.splitext(self.path)[0] + "-pending.json"
+        self.lock_path = self.path + ".lock"
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, str]:
+        return _read_json(self.path, {})
+
+    def pending(self) -> List[str]:
+        """Ids of registered callbacks whose verifier has not arrived."""
+        return _read_json(self.pending_path, [])
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                # Closing the descriptor releases the flock
+                os.close(fd)
+
+    def expect(self, callback_ids: Iterable[Any]):
+        """Accept one verifier for each of ``callback_ids``, registered by this server."""
+        with self._locked():
+            pending = self.pending()
+            pending.extend(str(callback_id) for callback_id in callback_ids if str(callback_id) not in pending)
+            _write_json(self.pending_path, pending)
+
+    def confirm(self, callback_id: str, verifier: str) -> bool:
+        """Store the verifier of ``callback_id`` if it is pending; return whether it was."""
+        if not callback_id or not verifier:
+            return False
+        with self._locked():
+            pending = self.pending()
+            if callback_id not in pending:
+                return False
+            verifiers = self.load()
+            verifiers[callback_id] = verifier
+            _write_json(self.path, verifiers)
+            pending.remove(callback_id)
+            _write_json(self.pending_path, pending)
+            return True
+
+    def verifiers(self) -> List[str]:
+        secrets = list(self.load().values())
+        if os.getenv("FRESHBOOKS_WEBHOOK_SECRET"):
+            secrets.append(os.getenv("FRESHBOOKS_WEBHOOK_SECRET"))
+        return secrets
+
+    def verify(self, fields: Dict[str, str], signature: Optional[str]) -> bool:
+        """Check ``signature`` against every known verifier in constant time."""
+        if not signature:
+            return False
+        return any(hmac.compare_digest(sign(verifier, fields), signature) for verifier in self.verifiers())
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Accepts webhook POSTs and forwards verified events to the listener."""
+
+    def do_POST(self):
+        listener: "WebhookListener" = self.server.listener
+        if urllib.parse.urlparse(self.path).path != listener.path:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            fields = parse_fields(self.rfile.read(length), self.headers.get("Content-Type", ""))
+        except (ValueError, UnicodeDecodeError):
+            self.send_error(400, "Malformed event")
+            return
+        name = fields.get("name", "")
+        if name == VERIFY_EVENT:
+            # Unsigned by design; anything but a pending callback of ours is dropped
+            if listener.verifiers.confirm(fields.get("object_id", ""), fields.get("verifier", "")):
+                listener.dispatch(WebhookEvent(name, fields.get("object_id"), fields.get("account_id"), fields))
+        elif not listener.verifiers.verify(fields, self.headers.get(SIGNATURE_HEADER)):
+            self.send_error(401, "Bad signature")
+            return
+        else:
+            listener.dispatch(WebhookEvent(name, fields.get("object_id"), fields.get("account_id"), fields))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        """Suppress log messages."""
+        pass
+
+
+def _report(event: WebhookEvent, done):
+    if not done.cancelled() and done.exception() is not None:
+        print(f"FreshBooks webhook {event.name} {event.object_id} failed: {done.exception()}", file=sys.stderr)
+
+
+class WebhookListener:
+    """Threaded HTTP endpoint delivering verified events to an async handler."""
+
+    def __init__(
+        self,
+        on_event: Callable[[WebhookEvent], Awaitable[Any]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str = WEBHOOK_PATH,
+        verifiers: Optional[VerifierStore] = None,
+    ):
+        self.on_event = on_event
+        self.path = path
+        self.verifiers = verifiers or VerifierStore()
+        self.httpd = ThreadingHTTPServer((host, port), _WebhookHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.listener = self
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def dispatch(self, event: WebhookEvent):
+        """Schedule ``on_event`` on the owning loop (called from handler threads)."""
+        future = asyncio.run_coroutine_threadsafe(self.on_event(event), self.loop)
+        future.add_done_callback(lambda done: _report(event, done))
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start serving; events are handled on ``loop`` (default: the running loop)."""
+        self.loop = loop or asyncio.get_running_loop()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread and self.thread.is_alive():
+            self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread = None
+
+
+def listener_from_env(on_event: Callable[[WebhookEvent], Awaitable[Any]]) -> Optional[WebhookListener]:
+    """Build a listener if ``FRESHBOOKS_WEBHOOK_PORT`` is set."""
+    port = os.getenv("FRESHBOOKS_WEBHOOK_PORT")
+    if not port:
+        return None
+    return WebhookListener(on_event, host=os.getenv("FRESHBOOKS_WEBHOOK_HOST", "127.0.0.1"), port=int(port))
+
+
+async def register_callbacks(
+    client: httpx.AsyncClient,
+    account_id: str,
+    uri: str,
+    events: Optional[List[str]] = None,
+    verifiers: Optional[VerifierStore] = None,
+) -> List[Dict[str, Any]]:
+    """Register ``uri`` for each of ``events`` and return the created callbacks.
+
+    Each callback is recorded in ``verifiers`` as pending, so its
+    ``callback.verify`` event is accepted.
+    """
+    verifiers = verifiers or VerifierStore()
+    callbacks = []
+    for event in events or DEFAULT_EVENTS:
+        response = await client.post(
+            f"/events/account/{account_id}/events/callbacks",
+            json={"callback": {"event": event, "uri": uri}},
+        )
+        response.raise_for_status()
+        callback = response.json()["response"]["result"]["callback"]
+        verifiers.expect([callback["callbackid"]])
+        callbacks.append(callback)
+    return callbacks
+
+
+async def confirm_callback(client: httpx.AsyncClient, account_id: str, callback_id: str, verifier: str) -> Dict[str, Any]:
+    """Send a callback's verifier back to FreshBooks to activate it."""
+    response = await client.put(
+        f"/events/account/{account_id}/events/callbacks/{callback_id}",
+        json={"callback": {"verifier": verifier}},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def replay(url: str, path: str, secret: str) -> int:
+    """POST recorded events (one JSON object of fields per line), signed with ``secret``."""
+    failures = 0
+    with httpx.Client(timeout=10.0) as client, open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            fields = {key: str(value) for key, value in json.loads(line).items()}
+            response = client.post(url, data=fields, headers={SIGNATURE_HEADER: sign(secret, fields)})
+            print(f"{response.status_code} {fields.get('name')} {fields.get('object_id')}")
+            failures += not response.is_success
+    return failures
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="FreshBooks webhook utilities")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay", help="POST recorded events to a listener")
+    replay_parser.add_argument("url")
+    replay_parser.add_argument("events", help="NDJSON file of event fields")
+    replay_parser.add_argument("--secret", default=os.getenv("FRESHBOOKS_WEBHOOK_SECRET"), required=not os.getenv("FRESHBOOKS_WEBHOOK_SECRET"))
+    args = parser.parse_args(argv)
+    sys.exit(1 if replay(args.url, args.events, args.secret) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Pre-forked HTTP worker pool for the standard FreshBooks MCP server.
+
+Every worker binds the same address with ``SO_REUSEPORT`` so the kernel
+spreads connections across processes, which keeps JSON decoding and encoding
+of large FreshBooks payloads from saturating a single event loop. Workers run
+the streamable HTTP transport in stateless mode (any worker can answer any
+request) and share responses through one SQLite cache; OAuth tokens are
+already shared through the token file. The supervisor restarts workers that
+exit unexpectedly, backing off when a worker keeps crashing on startup.
+"""
+
+import asyncio
+import multiprocessing
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+from freshbooks_mcp.cache import SQLiteResponseCache
+from freshbooks_mcp.paths import state_path
+
+# A worker that stays up this long is considered healthy again
+HEALTHY_AFTER = 10.0
+MAX_BACKOFF = 30.0
+
+
+def bind_reuseport(host: str, port: int) -> socket.socket:
+    """Create a listening socket that other workers can bind as well."""
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise RuntimeError("SO_REUSEPORT is not available on this platform; run with a single worker")
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    return sock
+
+
+def _run_worker(host: str, port: int, cache_path: str):
+    """Worker process entry point."""
+    from freshbooks_mcp.server import FreshBooksMCPServer
+
+    sock = bind_reuseport(host, port)
+    server = FreshBooksMCPServer(cache=SQLiteResponseCache(cache_path))
+    asyncio.run(server.run_http(host, port, sockets=[sock], stateless=True))
+
+
+def supervise(workers: int, host: str, port: int, cache_path: Optional[str] = None):
+    """Run ``workers`` HTTP worker processes until SIGINT or SIGTERM.
+
+    Must be called from the main thread so signal handlers can be installed.
+    """
+    cache_path = cache_path or state_path("response-cache.sqlite3")
+    # Fail fast in the supervisor if the address cannot be bound at all
+    bind_reuseport(host, port).close()
+
+    ctx = multiprocessing.get_context("spawn")
+    procs: Dict[int, multiprocessing.process.BaseProcess] = {}
+    started_at: Dict[int, float] = {}
+    backoff: Dict[int, float] = {}
+    restart_at: Dict[int, float] = {}
+    stopping = False
+
+    def start(slot: int):
+        proc = ctx.Process(
+            target=_run_worker,
+            args=(host, port, cache_path),
+            name=f"freshbooks-mcp-worker-{slot}",
+            daemon=True,
+        )
+        proc.start()
+        procs[slot] = proc
+        started_at[slot] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        for slot in range(workers):
+            start(slot)
+        print(f"FreshBooks MCP server: {workers} workers on http://{host}:{port}/mcp", file=sys.stderr)
+
+        while not stopping:
+            now = time.monotonic()
+            for slot, proc in list(procs.items()):
+                if proc.is_alive():
+                    continue
+                if slot not in restart_at:
+                    uptime = now - started_at[slot]
+                    delay = 0.5 if uptime >= HEALTHY_AFTER else min(backoff.get(slot, 0.25) * 2, MAX_BACKOFF)
+                    backoff[slot] = delay
+                    restart_at[slot] = now + delay
+                    print(
+                        f"FreshBooks MCP worker {slot} (pid {proc.pid}) exited with code {proc.exitcode}; "
+                        f"restarting in {delay:.1f}s",
+                        file=sys.stderr,
+                    )
+                elif now >= restart_at[slot]:
+                    del restart_at[slot]
+                    start(slot)
+            time.sleep(0.2)
+    finally:
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs.values():
+            proc.join(5)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from freshbooks_mcp import simple_oauth_server
+from freshbooks_mcp.billing import TimeLedger, plan_invoices
+
+
+def _entry(entry_id, client_id=5, project_id=None, seconds=3600, billed=False):
+    return {"id": entry_id, "client_id": client_id, "project_id": project_id, "duration": seconds,
+            "started_at": "2026-09-10T09:00:00", "billed": billed, "billable": True}
+
+
+def test_plan_lists_sorted_entry_ids():
+    ledger = TimeLedger("2026-09-01", "2026-09-30")
+    for entry in (_entry(12), _entry(11), _entry(13, project_id=7), _entry(14, billed=True)):
+        ledger.add(entry)
+    [plan], skipped = plan_invoices(ledger, {}, {7: {"title": "Site", "rate": "80"}}, default_rate=50)
+    assert skipped == []
+    assert plan["entry_ids"] == [11, 12, 13]
+    assert plan["entries"] == 3
+    assert [line["name"] for line in plan["arguments"]["lines"]] == ["Time", "Site"]
+
+
+class FakeApi:
+    def __init__(self, fail_marking=False):
+        self.entries = {11: _entry(11), 12: _entry(12)}
+        self.fail_marking = fail_marking
+        self.posted = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "GET" and path.endswith("/time_entries"):
+            unbilled = [entry for entry in self.entries.values() if not entry["billed"]]
+            return httpx.Response(200, json={"response": {"result": {"time_entries": unbilled, "page": 1, "pages": 1}}})
+        if request.method == "POST" and path.endswith("/invoices/invoices"):
+            self.posted += 1
+            invoice = dict(json.loads(request.content)["invoice"], id=900, invoice_number="0001")
+            return httpx.Response(200, json={"response": {"result": {"invoice": invoice}}})
+        if request.method == "GET" and path.endswith("/invoices/invoices/900"):
+            return httpx.Response(200, json={"response": {"result": {"invoice": {"id": 900, "vis_state": 0}}}})
+        if request.method == "PUT" and "/time_entries/" in path:
+            if self.fail_marking:
+                return httpx.Response(500)
+            self.entries[int(path.rsplit("/", 1)[-1])]["billed"] = True
+            return httpx.Response(200, json={"response": {"result": {}}})
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path))
+    freshbooks = simple_oauth_server.FreshBooksOAuthClient("id", "secret")
+    freshbooks.account_id = "ABC"
+
+    async def related(resource, ids):
+        return {}
+
+    monkeypatch.setattr(freshbooks, "_related", related)
+    return freshbooks
+
+
+def _generate(client, api, date):
+    async def run():
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(api), base_url="http://fake")
+        try:
+            return await client.generate_invoices_from_time(
+                "2026-09-01", "2026-09-30", default_rate=50, date=date, dry_run=False
+            )
+        finally:
+            await client.client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_created_invoice_marks_its_time_billed(client):
+    api = FakeApi()
+    [invoice] = _generate(client, api, "2026-10-01")["invoices"]
+    assert invoice["status"] == "created"
+    assert invoice["time_entries_billed"] == 2
+    assert all(entry["billed"] for entry in api.entries.values())
+    assert _generate(client, api, "2026-10-01")["invoices"] == []
+    assert api.posted == 1
+
+
+def test_rerun_with_another_date_is_deduplicated_on_entry_ids(client):
+    api = FakeApi(fail_marking=True)
+    [first] = _generate(client, api, "2026-10-01")["invoices"]
+    assert first["time_entries_unmarked"] == [11, 12]
+    [second] = _generate(client, api, "2026-10-02")["invoices"]
+    assert second["status"] == "deduplicated"
+    assert second["invoice_id"] == 900
+    assert api.posted == 1
@@ -0,0 +1,50 @@
+import pytest
+
+from freshbooks_mcp import delta
+from freshbooks_mcp.delta import DeltaCollector, decode_token, normalize_since, start_point
+
+
+@pytest.mark.parametrize("resource, since, expected", [
+    ("invoices", "2026-10-19", "2026-10-19 00:00:00"),
+    ("invoices", "2026-10-19 12:00", "2026-10-19 12:00:00"),
+    # Accounting filters are US Eastern: EDT in October, EST in January
+    ("invoices", "2026-10-19T12:00:00Z", "2026-10-19 08:00:00"),
+    ("clients", "2026-01-15T05:30:00+0000", "2026-01-15 00:30:00"),
+    ("projects", "2026-10-19T12:00:00+02:00", "2026-10-19T10:00:00Z"),
+    ("projects", "2026-10-19T23:30:00-05:00", "2026-10-20T04:30:00Z"),
+    ("time_entries", "2026-10-19T08:15:30.123Z", "2026-10-19T08:15:30Z"),
+])
+def test_normalize_since_converts_offsets(resource, since, expected):
+    assert normalize_since(resource, since) == expected
+
+
+def test_offsets_are_rejected_without_the_accounting_zone(monkeypatch):
+    monkeypatch.setattr(delta, "ZoneInfo", None)
+    with pytest.raises(ValueError):
+        normalize_since("invoices", "2026-10-19T12:00:00Z")
+    assert normalize_since("invoices", "2026-10-19 12:00:00") == "2026-10-19 12:00:00"
+    assert normalize_since("projects", "2026-10-19T12:00:00+02:00") == "2026-10-19T10:00:00Z"
+
+
+def test_unrecognized_since_is_rejected():
+    with pytest.raises(ValueError):
+        start_point("invoices", since="last tuesday")
+
+
+def test_window_skips_records_already_delivered_at_the_boundary():
+    point = start_point("invoices", since="2026-10-19 08:00:00")
+    collector = DeltaCollector(point)
+    assert collector.add({"id": 1, "updated": "2026-10-19 07:59:59"}) is False
+    assert collector.add({"id": 2, "updated": "2026-10-19 08:00:00"}) is True
+    assert collector.add({"id": 3, "updated": "2026-10-19 09:00:00", "vis_state": 1}) is True
+    assert collector.add({"id": 4, "updated": "2026-10-19 09:00:00"}) is True
+    result = collector.result()
+    assert [record["id"] for record in result["changed"]] == [2, 4]
+    assert result["deleted"] == [3]
+    next_point = decode_token(result["sync_token"])
+    assert next_point.since == "2026-10-19 09:00:00"
+    assert next_point.seen == ("3", "4")
+
+    again = DeltaCollector(next_point)
+    assert again.add({"id": 4, "updated": "2026-10-19 09:00:00"}) is False
+    assert again.add({"id": 5, "updated": "2026-10-19 09:00:00"}) is True
@@ -0,0 +1,72 @@
+import asyncio
+import csv
+import json
+import os
+
+import httpx
+import pytest
+
+from freshbooks_mcp.export import EXTRA_COLUMN, export_path, export_resource
+from freshbooks_mcp.records import Client
+
+PAGES = [
+    [{"id": 1, "organization": "Acme Corp"}],
+    [{"id": 2, "organization": "Globex", "late_field": "kept"}],
+]
+
+
+def _client() -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params.get("page", "1"))
+        result = {"clients": PAGES[page - 1], "page": page, "pages": len(PAGES)}
+        return httpx.Response(200, json={"response": {"result": result}})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://fake")
+
+
+def _export(output: str, **kwargs):
+    async def run():
+        async with _client() as client:
+            return await export_resource(client, "ABC", "clients", output, per_page=1, **kwargs)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path / "state"))
+    return tmp_path / "state"
+
+
+@pytest.mark.parametrize("name", ["", "/etc/passwd", "~/.bashrc", "../token", "a/../../token", "."])
+def test_export_path_rejects_paths_outside_the_export_dir(name):
+    with pytest.raises(ValueError):
+        export_path(name)
+
+
+def test_export_path_stays_inside_the_export_dir(state_dir):
+    path = export_path("2026/clients.csv")
+    assert path == os.path.realpath(state_dir / "exports" / "2026" / "clients.csv")
+    assert os.path.isdir(os.path.dirname(path))
+
+
+def test_existing_file_is_not_overwritten(tmp_path):
+    output = tmp_path / "clients.ndjson"
+    output.write_text("precious\n")
+    with pytest.raises(ValueError):
+        _export(str(output))
+    assert output.read_text() == "precious\n"
+
+    _export(str(output), overwrite=True)
+    assert [json.loads(line)["id"] for line in output.read_text().splitlines()] == [1, 2]
+
+
+def test_csv_keeps_columns_first_seen_on_later_pages(tmp_path):
+    output = tmp_path / "clients.csv"
+    _export(str(output))
+    with open(output, newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert list(rows[0]) == [*Client.FIELDS, EXTRA_COLUMN]
+    assert [row["organization"] for row in rows] == ["Acme Corp", "Globex"]
+    assert rows[0][EXTRA_COLUMN] == ""
+    assert json.loads(rows[1][EXTRA_COLUMN]) == {"late_field": "kept"}
@@ -0,0 +1,105 @@
+import datetime
+
+import pytest
+
+from freshbooks_mcp.extractors import extract_arguments, parse_date
+from freshbooks_mcp.search import ClientIndex
+from freshbooks_mcp.validation import validate
+
+TODAY = datetime.date(2026, 10, 19)
+
+CLIENTS = [
+    {"id": 1, "organization": "Acme Corp", "fname": "Wile", "lname": "Coyote", "email": "wile@acme.com", "vis_state": 0},
+    {"id": 2, "organization": "Globex", "fname": "Hank", "lname": "Scorpio", "email": "hank@globex.com", "vis_state": 0},
+    {"id": 3, "organization": "Initech", "fname": "Bill", "lname": "Lumbergh", "email": "bill@initech.com", "vis_state": 0},
+]
+
+
+@pytest.fixture
+def index():
+    client_index = ClientIndex()
+    client_index.load(CLIENTS)
+    return client_index
+
+
+@pytest.mark.parametrize("text", [
+    "invoice Globe Trotters Ltd $100 for setup",
+    "invoice Hanks Plumbing $50 for repairs",
+])
+def test_partial_name_match_is_offered_not_picked(index, text):
+    result = extract_arguments("create_invoice", text, index, today=TODAY)
+    assert "client_id" not in result["arguments"]
+    assert "client_id" in result["missing"]
+    assert [candidate["id"] for candidate in result["client_candidates"]] == [2]
+
+
+@pytest.mark.parametrize("text, client_id", [
+    ("invoice Globex $100 for setup", 2),
+    ("invoice Hank Scorpio $100 for setup", 2),
+    ("invoice Acme $5 for stickers", 1),
+    ("invoice Init $5 for stickers", 3),
+])
+def test_every_word_matching_resolves_client(index, text, client_id):
+    result = extract_arguments("create_invoice", text, index, today=TODAY)
+    assert result["arguments"]["client_id"] == client_id
+    assert "client_candidates" not in result
+
+
+def test_invoice_lines_and_dates(index):
+    result = extract_arguments(
+        "create_invoice", "invoice Acme for 3 hours of design at $120/hr, due in 30 days", index, today=TODAY
+    )
+    assert result["arguments"]["client_id"] == 1
+    assert result["arguments"]["lines"] == [{"name": "design", "qty": 3, "unit_cost": {"amount": "120.00", "code": "USD"}}]
+    assert result["arguments"]["due_date"] == "2026-11-18"
+    assert result["missing"] == []
+
+
+@pytest.mark.parametrize("text, qty, name", [
+    ("invoice Acme for 1,000 widgets at $2", 1000, "widgets"),
+    ("invoice Acme for 1,200 units at $1", 1200, "Services"),
+    ("invoice Acme for 2,500.5 hours of support at $10/hr", 2500.5, "support"),
+])
+def test_thousands_separator_in_quantity(index, text, qty, name):
+    [line] = extract_arguments("create_invoice", text, index, today=TODAY)["arguments"]["lines"]
+    assert (line["qty"], line["name"]) == (qty, name)
+
+
+@pytest.mark.parametrize("text, due_date", [
+    ("invoice Acme $100 for setup due March 5", "2027-03-05"),
+    ("invoice Acme $100 for setup due Nov 5", "2026-11-05"),
+    ("invoice Acme $100 for setup dated 2027-04-01 due March 5", "2028-03-05"),
+    ("invoice Acme $100 for setup due March 5, 2026", "2026-03-05"),
+])
+def test_yearless_due_date_is_not_before_the_invoice_date(index, text, due_date):
+    assert extract_arguments("create_invoice", text, index, today=TODAY)["arguments"]["due_date"] == due_date
+
+
+def test_fixed_price_is_not_a_bill_method(index):
+    result = extract_arguments("create_project", "project Site for Acme fixed price", index, today=TODAY)
+    assert "bill_method" not in result["arguments"]
+    _, errors = validate("create_project", {"name": "Site", "client_id": 1, "bill_method": "fixed_price"})
+    assert [error["field"] for error in errors] == ["bill_method"]
+
+
+def test_task_rate_bill_method(index):
+    result = extract_arguments("create_project", "project Site for Acme task rate at $80/hr", index, today=TODAY)
+    assert result["arguments"]["bill_method"] == "task_rate"
+    assert result["arguments"]["rate"] == 80.0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2026-10-05", "2026-10-05"),
+    ("10/5/2026", "2026-10-05"),
+    ("Oct 5, 2026", "2026-10-05"),
+    ("tomorrow", "2026-10-20"),
+    ("someday", None),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text, TODAY) == expected
+
+
+def test_parse_date_rolls_yearless_dates_after_a_reference():
+    assert parse_date("March 5", TODAY) == "2026-03-05"
+    assert parse_date("March 5", TODAY, after=TODAY) == "2027-03-05"
+    assert parse_date("5 December", TODAY, after=TODAY) == "2026-12-05"
@@ -0,0 +1,40 @@
+import multiprocessing
+
+from freshbooks_mcp.idempotency import FingerprintStore, fingerprint
+
+PER_PROCESS = 40
+
+
+def _add_many(path: str, prefix: str):
+    store = FingerprintStore(path)
+    for i in range(PER_PROCESS):
+        store.add(f"{prefix}-{i}", "invoices", i)
+
+
+def test_processes_sharing_a_store_keep_every_fingerprint(tmp_path):
+    path = str(tmp_path / "create-fingerprints.json")
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_add_many, args=(path, f"p{n}")) for n in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    assert len(FingerprintStore(path).load()) == 4 * PER_PROCESS
+
+
+def test_add_get_discard(tmp_path):
+    store = FingerprintStore(str(tmp_path / "create-fingerprints.json"), max_entries=2)
+    for key in ("a", "b", "c"):
+        store.add(key, "clients", key.upper())
+    assert store.get("a") is None
+    assert store.get("c")["id"] == "C"
+    store.discard("c")
+    assert store.get("c") is None
+
+
+def test_fingerprint_normalizes_equivalent_payloads():
+    first = {"client_id": "2", "lines": [{"name": "Design ", "qty": "2", "unit_cost": {"amount": "10.0"}}], "date": "2026-10-19"}
+    second = {"client_id": 2, "lines": [{"name": "design", "qty": 2.0, "unit_cost": {"amount": "10"}}], "date": "2026-10-19"}
+    assert fingerprint("create_invoice", "ABC", first) == fingerprint("create_invoice", "ABC", second)
+    assert fingerprint("get_invoices", "ABC", first) is None
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from freshbooks_mcp.deadlines import clamp_timeout
+from freshbooks_mcp.stdio import StdioTransport
+
+import mcp_server
+from mcp_server import FreshBooksMCPServer
+
+IDENTITY = {"response": {"business_memberships": [{"business": {"id": 1, "account_id": "ABC"}}]}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_API_TOKEN", "token")
+    monkeypatch.setenv("FRESHBOOKS_TOOL_DEADLINES", "get_clients=0.2")
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/users/me"):
+            return httpx.Response(200, json=IDENTITY)
+        # Listing clients never finishes
+        await asyncio.sleep(30)
+        return httpx.Response(200, json={})
+
+    mcp = FreshBooksMCPServer()
+    mcp.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url="http://fake", event_hooks={"request": [clamp_timeout]}
+    )
+    mcp.sent = []
+    mcp._send_response = mcp.sent.append
+    return mcp
+
+
+def _call(request_id, tool):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": {"name": tool, "arguments": {}}}
+
+
+def test_tool_call_ends_at_its_deadline(server):
+    async def run():
+        server._in_flight[1] = asyncio.create_task(server._respond(_call(1, "get_clients")))
+        await asyncio.wait_for(server._in_flight[1], 5)
+
+    asyncio.run(run())
+    [response] = server.sent
+    assert response["id"] == 1
+    assert "deadline" in response["error"]["message"]
+
+
+def test_cancelled_call_gets_no_response(server):
+    async def run():
+        server._in_flight[7] = asyncio.create_task(server._respond(_call(7, "get_identity")))
+        server._in_flight[8] = asyncio.create_task(server._respond(_call(8, "get_clients")))
+        await asyncio.sleep(0.05)
+        server._cancel({"requestId": 8})
+        await asyncio.gather(*server._in_flight.values())
+
+    asyncio.run(run())
+    assert [response["id"] for response in server.sent] == [7]
+    assert server._in_flight == {}
+
+
+
+def run_over_pipes(server, monkeypatch, module, lines, count):
+    """Feed ``lines`` to ``server.run()`` through a pipe and return its first ``count`` messages."""
+    stdin_read, stdin_write = os.pipe()
+    stdout_read, stdout_write = os.pipe()
+    monkeypatch.setattr(
+        module, "StdioTransport", lambda: StdioTransport(open(stdin_read, "rb"), open(stdout_write, "wb"))
+    )
+    with open(stdin_write, "wb") as stdin:
+        stdin.write(b"".join(line + b"\n" for line in lines))
+    asyncio.run(server.run())
+    with open(stdout_read, "rb") as stdout:
+        return [json.loads(stdout.readline()) for _ in range(count)]
+
+
+@pytest.fixture
+def piped(server, monkeypatch):
+    server._send_response = FreshBooksMCPServer._send_response.__get__(server)
+    return lambda lines, count: run_over_pipes(server, monkeypatch, mcp_server, lines, count)
+
+
+def _line(message) -> bytes:
+    return json.dumps(message).encode()
+
+
+def test_run_answers_pipelined_requests_over_stdio(piped):
+    responses = piped([
+        _line({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}),
+        _line({"jsonrpc": "2.0", "method": "notifications/initialized"}),
+        _line({"jsonrpc": "2.0", "id": 2, "method": "tools/list", "params": {}}),
+    ], 2)
+    assert sorted(response["id"] for response in responses) == [1, 2]
+
+
+def test_batch_gets_one_array_response(piped):
+    [responses] = piped([_line([
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        _call(2, "get_identity"),
+        5,
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+    ])], 1)
+    by_id = {response["id"]: response for response in responses if "result" in response}
+    errors = [(response["id"], response["error"]["code"]) for response in responses if "error" in response]
+    assert sorted(by_id) == [1, 2]
+    assert "serverInfo" in by_id[1]["result"]
+    assert sorted(errors, key=str) == [(2, -32600), (None, -32600)]
+
+
+@pytest.mark.parametrize("line, code", [
+    (b"[]", -32600),
+    (b"42", -32600),
+    (b'"tools/list"', -32600),
+    (b'{"jsonrpc": "2.0", "id": 1, "method": ', -32700),
+])
+def test_malformed_input_gets_a_jsonrpc_error(piped, line, code):
+    [response] = piped([b"", line], 1)
+    assert response["id"] is None
+    assert response["error"]["code"] == code
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freshbooks_mcp.limits import RateLimiter
+from freshbooks_mcp.outbox import Outbox
+
+PAYLOAD = {"first_name": "Wile", "last_name": "Coyote"}
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://fake/clients")
+    return httpx.HTTPStatusError(f"HTTP {status}", request=request, response=httpx.Response(status, request=request))
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = Outbox(str(tmp_path / "outbox.sqlite3"))
+    yield box
+    box.close()
+
+
+def _deliver_all(outbox, outcomes, existing=None):
+    """Deliver the item once per outcome (an exception to raise or a result), ignoring backoff."""
+    sends, checks = [], []
+
+    async def send(tool, payload):
+        sends.append(tool)
+        outcome = outcomes[len(sends) - 1]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    async def find_existing(tool, payload, created_at):
+        checks.append(tool)
+        return existing
+
+    async def run():
+        limiter = RateLimiter(rate=1000, burst=1000)
+        for _ in outcomes:
+            outbox._conn.execute("UPDATE outbox SET next_attempt_at = 0")
+            row = outbox.claim("ABC")
+            if row is None:
+                break
+            await outbox._deliver(row, send, find_existing, limiter)
+
+    asyncio.run(run())
+    return sends, checks
+
+
+@pytest.mark.parametrize("error", [_status_error(502), httpx.ReadTimeout("slow"), httpx.RemoteProtocolError("dropped")])
+def test_unknown_outcome_checks_for_the_record_before_resending(outbox, error):
+    local_id = outbox.enqueue("ABC", "create_client", PAYLOAD)
+    sends, checks = _deliver_all(outbox, [error, None], existing={"id": 42})
+    assert sends == ["create_client"]
+    assert checks == ["create_client"]
+    item = outbox.get(local_id)
+    assert item["status"] == "done"
+    assert item["remote_id"] == "42"
+
+
+def test_rate_limited_send_is_retried_without_a_check(outbox):
+    local_id = outbox.enqueue("ABC", "create_client", PAYLOAD)
+    created = {"response": {"result": {"client": {"id": 7}}}}
+    sends, checks = _deliver_all(outbox, [_status_error(429), created])
+    assert sends == ["create_client", "create_client"]
+    assert checks == []
+    assert outbox.get(local_id)["remote_id"] == "7"
+
+
+def test_uncertain_item_stays_uncertain_after_a_429(outbox):
+    local_id = outbox.enqueue("ABC", "create_client", PAYLOAD)
+    sends, checks = _deliver_all(outbox, [_status_error(503), _status_error(429), {"client": {"id": 8}}])
+    assert checks == ["create_client", "create_client"]
+    assert outbox.get(local_id)["status"] == "done"
+
+
+def test_client_error_fails_the_item(outbox):
+    local_id = outbox.enqueue("ABC", "create_client", PAYLOAD)
+    _deliver_all(outbox, [_status_error(422)])
+    assert outbox.get(local_id)["status"] == "failed"
@@ -0,0 +1,47 @@
+import random
+import string
+
+from freshbooks_mcp.search import ClientIndex
+
+
+def _records(rng, count):
+    def name():
+        return "".join(rng.choice(string.ascii_lowercase[:6]) for _ in range(rng.randint(3, 7)))
+
+    return [
+        {"id": rng.randint(1, count // 2), "organization": f"{name()} {name()}", "fname": name(), "email": f"{name()}@example.com"}
+        for _ in range(count)
+    ]
+
+
+def test_bulk_load_matches_one_by_one_upserts():
+    rng = random.Random(7)
+    records = _records(rng, 400)
+    loaded, upserted = ClientIndex(), ClientIndex()
+    loaded.upsert({"id": 10_000, "organization": "Gone Away"})
+    loaded.load(records)
+    for record in records:
+        upserted.upsert(record)
+    assert loaded._vocabulary == sorted(upserted._postings) == upserted._vocabulary
+    assert loaded._postings == upserted._postings
+    assert loaded.get(10_000) is None
+    for query in ("abc", "face", records[-1]["fname"], records[0]["email"]):
+        assert loaded.search(query, limit=25) == upserted.search(query, limit=25)
+
+
+def test_index_stays_searchable_after_a_failed_load():
+    index = ClientIndex()
+    index.load([{"id": 1, "organization": "Acme Corp"}])
+
+    def failing():
+        yield {"id": 2, "organization": "Globex"}
+        raise RuntimeError("connection lost")
+
+    try:
+        index.load(failing())
+    except RuntimeError:
+        pass
+    assert index._vocabulary == sorted(index._postings)
+    assert [row["id"] for row in index.search("glob")] == [2]
+    index.upsert({"id": 3, "organization": "Acme Labs"})
+    assert {row["id"] for row in index.search("acme")} == {1, 3}
@@ -0,0 +1,16 @@
+from freshbooks_mcp.cache import ResponseCache, SQLiteResponseCache
+from freshbooks_mcp.server import FreshBooksMCPServer
+
+
+def test_single_process_caches_only_with_a_configured_ttl(monkeypatch):
+    monkeypatch.delenv("FRESHBOOKS_CACHE_TTL", raising=False)
+    assert FreshBooksMCPServer().cache is None
+
+    monkeypatch.setenv("FRESHBOOKS_CACHE_TTL", "30")
+    assert isinstance(FreshBooksMCPServer().cache, ResponseCache)
+
+
+def test_worker_cache_is_kept(tmp_path, monkeypatch):
+    monkeypatch.delenv("FRESHBOOKS_CACHE_TTL", raising=False)
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite3"))
+    assert FreshBooksMCPServer(cache=cache).cache is cache
@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from freshbooks_mcp import simple_oauth_server
+from freshbooks_mcp.simple_oauth_server import FreshBooksSimpleOAuthMCPServer
+from test_mcp_server import run_over_pipes
+
+
+@pytest.fixture
+def piped(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.delenv("FRESHBOOKS_CLIENT_ID", raising=False)
+    monkeypatch.delenv("FRESHBOOKS_WEBHOOK_PORT", raising=False)
+    server = FreshBooksSimpleOAuthMCPServer()
+    return lambda lines, count: run_over_pipes(server, monkeypatch, simple_oauth_server, lines, count)
+
+
+def _initialize(request_id):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "initialize", "params": {}}
+
+
+def test_duplicate_ids_in_a_batch_are_rejected(piped):
+    [responses] = piped([json.dumps([_initialize(1), _initialize(1), _initialize(2)]).encode()], 1)
+    assert sorted((response["id"], "result" in response) for response in responses) == [(1, False), (1, True), (2, True)]
+    [duplicate] = [response for response in responses if "error" in response]
+    assert duplicate["error"]["code"] == -32600
+
+
+@pytest.mark.parametrize("line, code", [
+    (b"[]", -32600),
+    (b"null", -32600),
+    (b"not json", -32700),
+])
+def test_malformed_input_gets_a_jsonrpc_error(piped, line, code):
+    [response, answered] = piped([line, json.dumps(_initialize(3)).encode()], 2)
+    assert response["id"] is None
+    assert response["error"]["code"] == code
+    assert answered["id"] == 3
+
+
+@pytest.mark.parametrize("max_pages, count, kept", [
+    (1, 100, True),
+    (0, 100, False),
+    (20, 2000, False),
+])
+def test_last_good_keeps_only_small_bounded_answers(tmp_path, monkeypatch, max_pages, count, kept):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path))
+    client = simple_oauth_server.FreshBooksOAuthClient("id", "secret")
+    client.account_id = "ABC"
+
+    async def iter_records(resource, fields, filters, max_pages, meta, timeout=None):
+        for i in range(count):
+            yield {"id": i}
+
+    monkeypatch.setattr(client, "iter_records", iter_records)
+    monkeypatch.setattr(client, "load_snapshot", lambda: None)
+
+    async def run():
+        try:
+            return await client._list_resource("clients", None, None, max_pages)
+        finally:
+            await client.close()
+
+    result = asyncio.run(run())
+    assert len(result["response"]["result"]["clients"]) == count
+    assert (len(client.last_good._entries) == 1) is kept
+
+
+def test_large_client_join_stays_inside_the_limiter(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path))
+    client = simple_oauth_server.FreshBooksOAuthClient("id", "secret")
+    client.account_id = "ABC"
+    monkeypatch.setattr(client, "load_snapshot", lambda: None)
+
+    async def handler(request):
+        await asyncio.sleep(0.001)
+        ids = [int(value) for value in request.url.params.get_list("search[userids][]")]
+        result = {"clients": [{"id": i, "organization": f"Org {i}"} for i in ids], "page": 1, "pages": 1}
+        return httpx.Response(200, json={"response": {"result": result}})
+
+    client.transport._transport = httpx.MockTransport(handler)
+    ids = set(range(1, 5001))
+
+    async def run():
+        try:
+            return await client._related("clients", ids)
+        finally:
+            await client.close()
+
+    found = asyncio.run(run())
+    assert found.keys() == ids
+    assert not client.breaker.is_open
+
+
+def test_degraded_read_rebuilds_the_last_good_answer(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path))
+    client = simple_oauth_server.FreshBooksOAuthClient("id", "secret")
+    client.account_id = "ABC"
+    invoices = [
+        {"id": i, "status": 2, "amount": {"amount": f"{i}.00", "code": "USD"}, "lines": [{"name": "Work"}]}
+        for i in range(3)
+    ]
+
+    async def iter_records(resource, fields, filters, max_pages, meta, timeout=None):
+        meta["total"] = len(invoices)
+        for record in invoices:
+            yield record
+
+    monkeypatch.setattr(client, "iter_records", iter_records)
+    monkeypatch.setattr(client, "load_snapshot", lambda: None)
+
+    async def run():
+        try:
+            return await client._list_resource("invoices", None, None, 1)
+        finally:
+            await client.close()
+
+    fresh = asyncio.run(run())
+    key = json.dumps([client.account_id, "invoices", None, None, 1], sort_keys=True)
+    degraded = client._degraded(key, "invoices", None, None, "circuit open")
+    assert degraded["stale"] is True
+    assert degraded["response"] == fresh["response"]
+
+
+def test_identical_creates_stay_serialized_after_a_failed_create(tmp_path, monkeypatch):
+    monkeypatch.setenv("FRESHBOOKS_MCP_STATE_DIR", str(tmp_path))
+    client = simple_oauth_server.FreshBooksOAuthClient("id", "secret")
+    client.account_id = "ABC"
+    gate = asyncio.Event()
+    posting = []
+    overlaps = []
+
+    async def post_create(path, body):
+        if not posting and not overlaps:
+            overlaps.append(0)
+            await gate.wait()
+            raise httpx.ConnectError("reset")
+        overlaps.append(len(posting))
+        posting.append(path)
+        await asyncio.sleep(0.01)
+        posting.pop()
+        return {}
+
+    monkeypatch.setattr(client, "_post_create", post_create)
+
+    def create():
+        return client._create_once("create_client", {"email": "a@example.com"}, "/clients", {}, False)
+
+    async def run():
+        try:
+            first = asyncio.create_task(create())
+            second = asyncio.create_task(create())
+            await asyncio.sleep(0)
+            gate.set()
+            with pytest.raises(httpx.ConnectError):
+                await first
+            await asyncio.gather(second, create())
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert overlaps == [0, 0, 0]
+    assert client._create_locks == {} and client._create_waiters == {}
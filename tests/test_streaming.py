@@ -0,0 +1,91 @@
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+
+from freshbooks_mcp.streaming import RecordStream, UnexpectedResponse, stream_records
+
+
+def _value(rng: random.Random, depth: int = 0):
+    kind = rng.randrange(8 if depth < 3 else 5)
+    if kind == 0:
+        return rng.choice([None, True, False])
+    if kind == 1:
+        return rng.randint(-10 ** 12, 10 ** 12)
+    if kind == 2:
+        return rng.uniform(-1e6, 1e6)
+    if kind in (3, 4):
+        return "".join(rng.choice('ab ,:{}[]"\\\n\té€😀') for _ in range(rng.randrange(12)))
+    if kind == 5:
+        return [_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"k{i}{rng.choice('ab]}')}": _value(rng, depth + 1) for i in range(rng.randrange(4))}
+
+
+def _document(rng: random.Random):
+    records = [{"id": i, **{f"f{j}": _value(rng, 1) for j in range(rng.randrange(5))}} for i in range(rng.randrange(6))]
+    result = {"page": 1, "per_page": 100, "pages": rng.randint(1, 9), "total": len(records), "note": _value(rng, 2)}
+    items = list(result.items()) + [("invoices", records)]
+    rng.shuffle(items)
+    return {"response": {"result": dict(items)}}, records
+
+
+def _chunks(data: bytes, rng: random.Random):
+    pos = 0
+    while pos < len(data):
+        size = rng.choice([1, 2, 3, 7, 64, 4096])
+        yield data[pos:pos + size]
+        pos += size
+
+
+def _decode(data: bytes, rng: random.Random):
+    stream = RecordStream("invoices")
+    records = []
+    for chunk in _chunks(data, rng):
+        records.extend(stream.feed(chunk))
+    records.extend(stream.close())
+    return stream, records
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_documents_and_chunkings_decode_like_json(seed):
+    rng = random.Random(seed)
+    document, records = _document(rng)
+    indent = rng.choice([None, 0, 2])
+    data = json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=indent).encode()
+    stream, decoded = _decode(data, rng)
+    assert decoded == records
+    assert stream.found
+    result = document["response"]["result"]
+    assert stream.meta == {key: value for key, value in result.items() if not isinstance(value, (dict, list))}
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_truncated_documents_are_rejected(seed):
+    rng = random.Random(seed)
+    document, records = _document(rng)
+    data = json.dumps(document).encode()
+    with pytest.raises(ValueError):
+        _decode(data[:rng.randrange(1, len(data) - 1)], rng)
+
+
+def _stream(body: bytes):
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake") as client:
+            return [record async for record in stream_records(client, "/invoices", "invoices")]
+
+    return asyncio.run(run())
+
+
+def test_errors_envelope_raises_instead_of_reading_as_empty():
+    body = {"response": {"errors": [{"errno": 1003, "field": "userid", "message": "The server could not verify that you are authorized"}]}}
+    with pytest.raises(UnexpectedResponse) as raised:
+        _stream(json.dumps(body).encode())
+    assert "not verify" in str(raised.value)
+    assert raised.value.document == body
+
+
+def test_empty_record_array_is_an_empty_page():
+    assert _stream(b'{"response": {"result": {"invoices": [], "page": 1, "pages": 1}}}') == []
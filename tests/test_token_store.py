@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from freshbooks_mcp.token_store import TokenStore
+
+EXPIRED = {"access_token": "old", "refresh_token": "r1", "expires_in": 3600, "timestamp": 0}
+
+
+@pytest.fixture
+def store(tmp_path):
+    token_store = TokenStore(str(tmp_path / "token"))
+    token_store.save(EXPIRED)
+    return token_store
+
+
+async def _refresh(refresh_token):
+    return {"access_token": "new", "refresh_token": "r2", "expires_in": 3600}
+
+
+def test_refresh_replaces_an_expired_token(store):
+    token = asyncio.run(store.get_valid_token(_refresh))
+    assert token["access_token"] == "new"
+    assert not store.is_expired(store.load())
+
+
+def test_cancelled_waiter_does_not_keep_the_lock(store):
+    async def run():
+        held = store._try_acquire()
+        waiter = asyncio.create_task(store.get_valid_token(_refresh))
+        await asyncio.sleep(0.2)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        store._release(held)
+        return await asyncio.wait_for(store.get_valid_token(_refresh), 2)
+
+    assert asyncio.run(run())["access_token"] == "new"
+
+
+def test_waiter_picks_up_a_token_refreshed_by_the_lock_holder(store):
+    calls = []
+
+    async def refresh(refresh_token):
+        calls.append(refresh_token)
+        return await _refresh(refresh_token)
+
+    async def run():
+        held = store._try_acquire()
+        waiter = asyncio.create_task(store.get_valid_token(refresh))
+        await asyncio.sleep(0.1)
+        store.save(dict(EXPIRED, access_token="other", timestamp=time.time()))
+        store._release(held)
+        return await waiter
+
+    assert asyncio.run(run())["access_token"] == "other"
+    assert calls == []
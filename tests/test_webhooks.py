@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+from freshbooks_mcp.webhooks import SIGNATURE_HEADER, VERIFY_EVENT, VerifierStore, WebhookListener, register_callbacks, sign
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.delenv("FRESHBOOKS_WEBHOOK_SECRET", raising=False)
+    return VerifierStore(str(tmp_path / "webhook-verifiers.json"))
+
+
+def _post(listener: WebhookListener, fields, signature=None) -> int:
+    headers = {SIGNATURE_HEADER: signature} if signature else {}
+    return httpx.post(listener.url, data=fields, headers=headers).status_code
+
+
+def _listen(store, on_events):
+    async def run():
+        events = []
+
+        async def on_event(event):
+            events.append(event)
+
+        listener = WebhookListener(on_event, verifiers=store)
+        listener.start()
+        try:
+            await asyncio.to_thread(on_events, listener)
+            await asyncio.sleep(0.05)
+        finally:
+            listener.stop()
+        return events
+
+    return asyncio.run(run())
+
+
+def test_verify_for_unknown_callback_is_ignored(store):
+    fields = {"name": VERIFY_EVENT, "object_id": "666", "verifier": "attacker"}
+    events = _listen(store, lambda listener: _post(listener, fields))
+    assert events == []
+    assert store.load() == {}
+
+
+def test_verifier_is_taken_once_for_a_registered_callback(store):
+    store.expect([2001])
+    event = {"name": "invoice.update", "object_id": "9"}
+
+    def post(listener):
+        assert _post(listener, {"name": VERIFY_EVENT, "object_id": "2001", "verifier": "real"}) == 200
+        assert _post(listener, {"name": VERIFY_EVENT, "object_id": "2001", "verifier": "second"}) == 200
+        assert _post(listener, event, sign("real", event)) == 200
+        assert _post(listener, event, sign("second", event)) == 401
+
+    events = _listen(store, post)
+    assert [e.name for e in events] == [VERIFY_EVENT, "invoice.update"]
+    assert store.load() == {"2001": "real"}
+    assert store.pending() == []
+
+
+def test_register_callbacks_marks_callbacks_pending(store):
+    def handler(request: httpx.Request) -> httpx.Response:
+        callback = {"callbackid": 7, "uri": "https://example.test/hook", "verified": False}
+        return httpx.Response(200, json={"response": {"result": {"callback": callback}}})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://fake") as client:
+            return await register_callbacks(client, "ABC", "https://example.test/hook", ["invoice.update"], store)
+
+    assert [callback["callbackid"] for callback in asyncio.run(run())] == [7]
+    assert store.pending() == ["7"]